@@ -1,56 +1,99 @@
+import argparse
 import json
 import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
 import os
 
-# Create folders
-os.makedirs("result_data", exist_ok=True)
-os.makedirs("result_visuals", exist_ok=True)
-os.makedirs("logs", exist_ok=True)
-os.makedirs("interim_data", exist_ok=True)
+from src.analysis.metrics_store import METRICS_DB, MetricsStore
+from src.data.resource_table import load_table
+from src.models.cache_config import cache_capacity
+from src.models.knapsack_solver import optimality_gap, solve
 
-# Load caching results from JSON file
-with open("interim_data/cache_results.json", "r") as f:
-    cache_results = json.load(f)
-
-# Load processed request dataset
-df = pd.read_csv("interim_data/processed_request_data.csv")
-
-# Cache capacity (assuming this is consistent across methods, adjust if needed)
-CACHE_CAPACITY_KB = df['size'].sum() * 0.1  # Example: 10% of total dataset size
+# Every metric takes the cache as a boolean mask over the resource table's rows
+# (table.mask(names)), so scoring is a masked sum instead of a string lookup per row
 
 # Compute cache hit rate
-def compute_cache_hit_rate(cache, df):
-    total_requests = df["frequency"].sum()
-    hits = df[df["resource"].isin(cache)]["frequency"].sum()
+def compute_cache_hit_rate(cached, table):
+    total_requests = table.frequency.sum()
+    hits = table.frequency[cached].sum()
     return hits / total_requests * 100
 
 # Compute latency reduction
-def compute_latency_reduction(cache, df):
-    total_latency_without_cache = (df["latency"] * df["frequency"]).sum()
-    cached_df = df[df["resource"].isin(cache)]
-    total_latency_with_cache = (cached_df["latency"] * cached_df["frequency"]).sum()
+def compute_latency_reduction(cached, table):
+    latency = table.latency * table.frequency
+    total_latency_without_cache = latency.sum()
+    total_latency_with_cache = latency[cached].sum()
     return ((total_latency_without_cache - total_latency_with_cache) / total_latency_without_cache) * 100
 
-# Compute cache size usage
-metrics = {}
-for method, cache in cache_results.items():
-    metrics[method] = {
-        "Cache Hit Rate (%)": compute_cache_hit_rate(cache, df),
-        "Latency Reduction (%)": compute_latency_reduction(cache, df),
-        "Cache Usage (KB)": df[df["resource"].isin(cache)]["size"].sum(),
-        "Max Cache Size (KB)": CACHE_CAPACITY_KB
-    }
-
-# Convert metrics to DataFrame and save
-metrics_df = pd.DataFrame.from_dict(metrics, orient="index")
-metrics_df.to_csv("result_data/performance_metrics.csv")
-
-# Save comprehensive metrics table to a separate file
-with open("logs/comprehensive_metrics.txt", "a") as file:
+# Distance of a method's cached request frequency from the knapsack optimum
+def compute_optimality_gap(cached, table, optimum):
+    return optimality_gap(table.frequency[cached].sum(), optimum.value)
+
+# Score every method in root/interim_data/cache_results.json, save
+# performance_metrics.csv, append the table to comprehensive_metrics.txt and
+# record it in the metrics store (default: root/result_data/metrics.sqlite) as
+# `iteration` (default: the next one)
+def run(root=".", iteration=None, metrics_db=None):
+    interim_dir = os.path.join(root, "interim_data")
+    result_dir = os.path.join(root, "result_data")
+    logs_dir = os.path.join(root, "logs")
+    os.makedirs(result_dir, exist_ok=True)
+    os.makedirs(logs_dir, exist_ok=True)
+
+    # Load caching results from JSON file
+    with open(os.path.join(interim_dir, "cache_results.json"), "r") as f:
+        cache_results = json.load(f)
+
+    # Resource table published by preprocessing (or built from processed_request_data.csv)
+    table = load_table(interim_dir)
+
+    # Cache capacity every method was given (see src/models/cache_config.py)
+    capacity = cache_capacity(table.size.sum())
+
+    # Optimal cached request frequency under the capacity every method was given
+    optimum = solve(table.frequency, table.size, capacity)
+
+    # Compute cache size usage
+    metrics = {}
+    for method, cache in cache_results.items():
+        cached = table.mask(cache)
+        metrics[method] = {
+            "Cache Hit Rate (%)": compute_cache_hit_rate(cached, table),
+            "Latency Reduction (%)": compute_latency_reduction(cached, table),
+            "Cache Usage (KB)": table.size[cached].sum(),
+            "Max Cache Size (KB)": capacity,
+            "Optimality Gap (%)": compute_optimality_gap(cached, table, optimum)
+        }
+    table.close()
+
+    # Convert metrics to DataFrame and save
+    metrics_df = pd.DataFrame.from_dict(metrics, orient="index")
+    metrics_df.to_csv(os.path.join(result_dir, "performance_metrics.csv"))
+
+    # Save comprehensive metrics table to a separate file
+    with open(os.path.join(logs_dir, "comprehensive_metrics.txt"), "a") as file:
+        write_comprehensive(file, metrics_df)
+
+    with MetricsStore(metrics_db or os.path.join(root, METRICS_DB)) as store:
+        store.record(store.next_iteration() if iteration is None else iteration, metrics_df)
+
+    print("Performance metrics saved without comparison plots.")
+    return metrics_df
+
+# One iteration's block of comprehensive_metrics.txt
+def write_comprehensive(file, metrics_df):
     file.write("--- Iteration ---\n")
     file.write(metrics_df.to_string())
     file.write("\n\n")
 
-print("Performance metrics saved without comparison plots.")
\ No newline at end of file
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score the cached selections of every method")
+    parser.add_argument("--root", default=".", help="run directory (holds interim_data/)")
+    parser.add_argument("--iteration", type=int, default=None, help="record as this iteration (default: next)")
+    parser.add_argument("--metrics-db", default=None, help=f"metrics store (default: root/{METRICS_DB})")
+    args = parser.parse_args(argv)
+    run(args.root, args.iteration, args.metrics_db)
+
+
+if __name__ == "__main__":
+    main()
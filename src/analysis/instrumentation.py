@@ -0,0 +1,298 @@
+import json
+import math
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+import numpy as np
+
+# Timers and counters for the hot paths of the pipeline.
+#
+# Off unless the WEBCACHE_PROFILE environment variable is set (before the
+# modules are imported):
+#
+#   WEBCACHE_PROFILE=1       stage wall/CPU time, counters, gauges, latency histograms
+#   WEBCACHE_PROFILE=alloc   the same plus tracemalloc allocations per stage
+#                            (much slower; use it for memory, not for timings)
+#
+# Disabled, every call is one global check: stage() hands back a shared no-op
+# context manager and @timed returns the function undecorated. Instrumented code
+# uses the module-level functions:
+#
+#   with instrumentation.stage("baseline.lru"):
+#       ...
+#   instrumentation.count("sgd.retries", retries)
+#   instrumentation.gauge("sgd.converged", True)
+#   instrumentation.observe("origin.request", seconds)
+#
+# pipeline_automation resets the profile at the start of every iteration and
+# writes it to the iteration's logs/profile.json.
+#
+#   WEBCACHE_PROFILE=1 python -m src.pipeline.pipeline_automation --iterations 2
+
+PROFILE_ENV = "WEBCACHE_PROFILE"
+PROFILE_FILE = "logs/profile.json"
+REPORT_PERCENTILES = (50, 95, 99)
+
+# Display buckets of the latency histogram (seconds)
+HISTOGRAM_EDGES = [0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0]
+
+
+# Log-bucketed latency histogram with a fixed relative error (HdrHistogram style):
+# memory is fixed by the value range, not by the number of samples
+class LatencyHistogram:
+    def __init__(self, min_value=1e-6, max_value=1e3, precision=0.01):
+        self.min_value = min_value
+        self.growth = 1.0 + precision
+        self._log_growth = math.log(self.growth)
+        self.counts = np.zeros(int(math.log(max_value / min_value) / self._log_growth) + 2, dtype=np.int64)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        if value <= self.min_value:
+            index = 0
+        else:
+            index = min(int(math.log(value / self.min_value) / self._log_growth) + 1, len(self.counts) - 1)
+        self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    # Upper edge of the bucket holding the p-th percentile (0 < p <= 100)
+    def percentile(self, p):
+        if not self.total:
+            return 0.0
+        rank = max(1, math.ceil(self.total * p / 100))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(self.min_value * self.growth ** index, self.max)
+
+    def mean(self):
+        return self.sum / self.total if self.total else 0.0
+
+    # Sample counts per display bucket: (-inf, edges[0]], (edges[0], edges[1]], ..., (edges[-1], inf)
+    def bucket_counts(self, edges=HISTOGRAM_EDGES):
+        uppers = self.min_value * self.growth ** np.arange(len(self.counts))
+        slots = np.searchsorted(np.asarray(edges), uppers, side="left")
+        return np.bincount(slots, weights=self.counts, minlength=len(edges) + 1).astype(np.int64)
+
+
+def _mode():
+    value = os.environ.get(PROFILE_ENV, "").strip().lower()
+    return "" if value in ("", "0", "off", "false", "no") else value
+
+
+ENABLED = bool(_mode())
+TRACE_ALLOCATIONS = _mode() == "alloc"
+
+
+# Accumulates one stage's runs: calls, wall and CPU (process) time, and with
+# allocation tracing the net and peak traced memory. tracemalloc has one peak
+# per process, so each stage resets it on entry and hands the peak it saw to
+# the stage it is nested in.
+class _Stage:
+    __slots__ = ("profiler", "name", "wall", "cpu", "memory", "peak")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        if self.profiler.trace_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            active = self.profiler.active_stages()
+            self.memory, peak = tracemalloc.get_traced_memory()
+            if active:
+                active[-1].peak = max(active[-1].peak, peak)
+            self.peak = 0
+            active.append(self)
+            tracemalloc.reset_peak()
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        net = peak = None
+        if self.profiler.trace_allocations:
+            active = self.profiler.active_stages()
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self.peak)
+            active.remove(self)
+            if active:
+                active[-1].peak = max(active[-1].peak, peak)
+            net, peak = current - self.memory, peak - self.memory
+        self.profiler.add_stage(self.name, wall, cpu, net, peak)
+        return False
+
+
+class Profiler:
+    def __init__(self, trace_allocations=False):
+        self.trace_allocations = trace_allocations
+        self.lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    # Stages open in this thread, outermost first
+    def active_stages(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def reset(self):
+        with self.lock:
+            self.stages = {}
+            self.counters = {}
+            self.gauges = {}
+            self.histograms = {}
+            self.started = time.perf_counter()
+            self.started_cpu = time.process_time()
+        if self.trace_allocations and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def add_stage(self, name, wall, cpu, net=None, peak=None):
+        with self.lock:
+            entry = self.stages.get(name)
+            if entry is None:
+                entry = self.stages[name] = {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_wall_s": 0.0}
+                if net is not None:
+                    entry.update(alloc_net_kb=0.0, alloc_peak_kb=0.0)
+            entry["calls"] += 1
+            entry["wall_s"] += wall
+            entry["cpu_s"] += cpu
+            entry["max_wall_s"] = max(entry["max_wall_s"], wall)
+            if net is not None:
+                entry["alloc_net_kb"] += net / 1024
+                entry["alloc_peak_kb"] = max(entry["alloc_peak_kb"], peak / 1024)
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(name, LatencyHistogram())
+        return histogram
+
+    def observe(self, name, seconds):
+        histogram = self.histogram(name)
+        with self.lock:
+            histogram.record(seconds)
+
+    # Fold a histogram recorded elsewhere (e.g. a load report's) into `name`
+    def merge(self, name, histogram):
+        target = self.histogram(name)
+        with self.lock:
+            target.merge(histogram)
+
+    def report(self, **context):
+        with self.lock:
+            histograms = {
+                name: {"count": histogram.total, "mean_s": histogram.mean(), "max_s": histogram.max,
+                       **{f"p{p}_s": histogram.percentile(p) for p in REPORT_PERCENTILES}}
+                for name, histogram in self.histograms.items()
+            }
+            return {
+                "context": context,
+                "wall_s": time.perf_counter() - self.started,
+                "cpu_s": time.process_time() - self.started_cpu,
+                "stages": {name: dict(entry) for name, entry in self.stages.items()},
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "histograms": histograms,
+            }
+
+    # Write the report as JSON (atomically: a reader never sees half a file)
+    def write(self, path, **context):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.report(**context), f, indent=2, default=str)
+        os.replace(temporary, path)
+        return path
+
+
+PROFILER = Profiler(TRACE_ALLOCATIONS)
+_NO_STAGE = nullcontext()
+
+
+# Turn instrumentation on from code (only affects @timed functions defined afterwards)
+def enable(trace_allocations=False):
+    global ENABLED
+    ENABLED = True
+    PROFILER.trace_allocations = trace_allocations
+
+
+def stage(name):
+    return PROFILER.stage(name) if ENABLED else _NO_STAGE
+
+
+def count(name, value=1):
+    if ENABLED:
+        PROFILER.count(name, value)
+
+
+def gauge(name, value):
+    if ENABLED:
+        PROFILER.gauge(name, value)
+
+
+def observe(name, seconds):
+    if ENABLED:
+        PROFILER.observe(name, seconds)
+
+
+def merge(name, histogram):
+    if ENABLED:
+        PROFILER.merge(name, histogram)
+
+
+# Decorator: time every call of the function as stage `name`
+def timed(name):
+    def decorate(function):
+        if not ENABLED:
+            return function
+
+        def wrapper(*args, **kwargs):
+            with PROFILER.stage(name):
+                return function(*args, **kwargs)
+        wrapper.__name__ = function.__name__
+        wrapper.__doc__ = function.__doc__
+        wrapper.__wrapped__ = function
+        return wrapper
+    return decorate
+
+
+def reset():
+    if ENABLED:
+        PROFILER.reset()
+
+
+# Write the profile to path (default: root/logs/profile.json); None when disabled
+def write_report(path=PROFILE_FILE, **context):
+    if not ENABLED:
+        return None
+    return PROFILER.write(path, **context)
@@ -1,104 +1,96 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import re
+import argparse
 import os
 
-# Directory structure
-os.makedirs("result_data", exist_ok=True)
-os.makedirs("result_visuals", exist_ok=True)
-os.makedirs("logs", exist_ok=True)
-os.makedirs("interim_data", exist_ok=True)
+import pandas as pd
+
+from src.analysis.metrics_store import METRICS_DB, MetricsStore, parse_comprehensive
 
-# File paths
+# File paths (relative to the run root)
 COMPREHENSIVE_FILE = "logs/comprehensive_metrics.txt"
 CUMULATIVE_FILE = "result_data/cumulative_performance_metrics.csv"
 AVERAGE_FILE = "result_data/average_performance_metrics.csv"
+CONFIDENCE_FILE = "result_data/metric_confidence_intervals.csv"
 
-# Step 1: Parse comprehensive_metrics.txt
-all_metrics = []
-current_iteration = 0
-
-with open(COMPREHENSIVE_FILE, "r") as f:
-    for line in f:
-        if "--- Iteration ---" in line:
-            current_iteration += 1
-        elif re.match(r"\s*(LRU|LFU|Greedy Knapsack|SGD-Based)", line):
-            parts = re.split(r"\s{2,}", line.strip())
-            if len(parts) >= 5:
-                method = parts[0]
-                try:
-                    chr = float(parts[1])
-                    lr = float(parts[2])
-                    usage = float(parts[3])
-                    max_size = float(parts[4])
-                    all_metrics.append({
-                        "Iteration": current_iteration,
-                        "Method": method,
-                        "Cache Hit Rate (%)": chr,
-                        "Latency Reduction (%)": lr,
-                        "Cache Usage (KB)": usage,
-                        "Max Cache Size (KB)": max_size
-                    })
-                except ValueError:
-                    continue  # Skip lines that can't be parsed
-
-# Step 2: Create cumulative DataFrame
-full_df = pd.DataFrame(all_metrics)
-full_df.to_csv(CUMULATIVE_FILE, index=False)
-
-# Step 3: Calculate average metrics
-if not full_df.empty:
-    average_df = full_df.groupby("Method").mean().reset_index()
-
-    # Add Cache Usage Percentage
+# Per-iteration graphs: (metric, title, file name)
+GRAPHS = [
+    ("Cache Hit Rate (%)", "Cache Hit Rate Over Iterations", "cache_hit_rate_iterations.png"),
+    ("Latency Reduction (%)", "Latency Reduction Over Iterations", "latency_reduction_iterations.png"),
+    ("Cache Usage (%)", "Cache Usage Percentage Over Iterations", "cache_usage_percentage_iterations.png"),
+]
+
+# Average table with Cache Usage (%) added
+def average_metrics(store):
+    average_df = store.averages()
     average_df["Cache Usage (%)"] = (average_df["Cache Usage (KB)"] / average_df["Max Cache Size (KB)"]) * 100
-    average_df.to_csv(AVERAGE_FILE, index=False)
-
-    print("\nAverage Cache Usage (%):")
-    print(average_df[["Method", "Cache Usage (%)"]])
-
-    # Step 4: Generate graphs
-    plt.style.use('dark_background')
-
-    # Cache Hit Rate
-    plt.figure(figsize=(10, 6))
-    for method in average_df["Method"]:
-        plt.plot(full_df[full_df["Method"] == method]["Iteration"],
-                 full_df[full_df["Method"] == method]["Cache Hit Rate (%)"], label=method)
-    plt.title("Cache Hit Rate Over Iterations")
-    plt.xlabel("Iteration")
-    plt.ylabel("Cache Hit Rate (%)")
-    plt.legend()
-    plt.grid(True, linestyle="--", alpha=0.5)
-    plt.savefig("result_visuals/cache_hit_rate_iterations.png")
-    plt.close()
-
-    # Latency Reduction
-    plt.figure(figsize=(10, 6))
-    for method in average_df["Method"]:
-        plt.plot(full_df[full_df["Method"] == method]["Iteration"],
-                 full_df[full_df["Method"] == method]["Latency Reduction (%)"], label=method)
-    plt.title("Latency Reduction Over Iterations")
-    plt.xlabel("Iteration")
-    plt.ylabel("Latency Reduction (%)")
-    plt.legend()
-    plt.grid(True, linestyle="--", alpha=0.5)
-    plt.savefig("result_visuals/latency_reduction_iterations.png")
-    plt.close()
-
-    # Cache Usage
-    plt.figure(figsize=(10, 6))
-    for method in average_df["Method"]:
-        usage_percent = (full_df[full_df["Method"] == method]["Cache Usage (KB)"] /
-                         full_df[full_df["Method"] == method]["Max Cache Size (KB)"]) * 100
-        plt.plot(full_df[full_df["Method"] == method]["Iteration"],
-                 usage_percent, label=method)
-    plt.title("Cache Usage Percentage Over Iterations")
-    plt.xlabel("Iteration")
-    plt.ylabel("Cache Usage (%)")
-    plt.legend()
-    plt.grid(True, linestyle="--", alpha=0.5)
-    plt.savefig("result_visuals/cache_usage_percentage_iterations.png")
-    plt.close()
-
-print("Summary analysis complete. CSV and graphs saved.")
\ No newline at end of file
+    return average_df
+
+# Iteration x method series of a metric (Cache Usage (%) derived from the KB columns)
+def metric_series(store, metric):
+    if metric == "Cache Usage (%)":
+        return store.series("Cache Usage (KB)") / store.series("Max Cache Size (KB)") * 100
+    return store.series(metric)
+
+# Cumulative, average and confidence-interval CSVs of everything in the store
+def write_tables(store, root="."):
+    full_df = store.frame()
+    full_df.to_csv(os.path.join(root, CUMULATIVE_FILE), index=False)
+    average_df = average_metrics(store) if not full_df.empty else pd.DataFrame()
+    average_df.to_csv(os.path.join(root, AVERAGE_FILE), index=False)
+    store.summary().to_csv(os.path.join(root, CONFIDENCE_FILE), index=False)
+    return full_df, average_df
+
+# Summarize every iteration in the metrics store (root/result_data/metrics.sqlite)
+# into the cumulative, average and confidence-interval CSVs and the per-iteration
+# graphs. A run that only left comprehensive_metrics.txt is imported first.
+def run(root=".", metrics_db=None):
+    result_visuals = os.path.join(root, "result_visuals")
+    os.makedirs(os.path.join(root, "result_data"), exist_ok=True)
+    os.makedirs(result_visuals, exist_ok=True)
+
+    with MetricsStore(metrics_db or os.path.join(root, METRICS_DB)) as store:
+        # Step 1: Import an older text log into an empty store
+        comprehensive = os.path.join(root, COMPREHENSIVE_FILE)
+        if store.iterations() == 0 and os.path.exists(comprehensive):
+            for iteration, metrics_df in parse_comprehensive(comprehensive):
+                store.record(iteration, metrics_df)
+
+        # Step 2: Cumulative, average and confidence-interval tables
+        full_df, average_df = write_tables(store, root)
+
+        if not full_df.empty:
+            print("\nAverage Cache Usage (%):")
+            print(average_df[["Method", "Cache Usage (%)"]])
+
+            # Step 3: Generate graphs (pyplot is only imported when there is something to plot)
+            import matplotlib
+            matplotlib.use("Agg")
+            import matplotlib.pyplot as plt
+
+            plt.style.use('dark_background')
+            for metric, title, file_name in GRAPHS:
+                series = metric_series(store, metric)
+                plt.figure(figsize=(10, 6))
+                for method in average_df["Method"]:
+                    plt.plot(series.index, series[method], label=method)
+                plt.title(title)
+                plt.xlabel("Iteration")
+                plt.ylabel(metric)
+                plt.legend()
+                plt.grid(True, linestyle="--", alpha=0.5)
+                plt.savefig(os.path.join(result_visuals, file_name))
+                plt.close()
+
+    print("Summary analysis complete. CSV and graphs saved.")
+    return full_df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize every recorded iteration into CSVs and graphs")
+    parser.add_argument("--root", default=".", help="run root (result_data/ and result_visuals/ go here)")
+    parser.add_argument("--metrics-db", default=None, help=f"metrics store (default: root/{METRICS_DB})")
+    args = parser.parse_args(argv)
+    run(args.root, args.metrics_db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import math
+import os
+import re
+import sqlite3
+
+import pandas as pd
+
+# Structured store of per-iteration metrics: one SQLite row per
+# (iteration, method, metric).
+#
+# analyze_results.py writes each iteration's table straight into it (the
+# pipeline's worker processes write concurrently; WAL mode plus a busy timeout
+# serialize them), and metric_summary_analysis.py / pipeline_automation.py read
+# the results back with SQL instead of re-parsing comprehensive_metrics.txt.
+# Triggers keep running sums (count, sum, sum of squares) per (method, metric) in
+# an aggregates table, so means and confidence intervals are read from a few
+# dozen rows however many iterations there are. Recording an iteration again
+# replaces its rows (and their contribution to the sums).
+#
+#   store = MetricsStore("result_data/metrics.sqlite")
+#   store.record(3, metrics_df)          # index = method, columns = metrics
+#   store.summary()                      # mean, std, 95% CI per (method, metric)
+#   store.series("Cache Hit Rate (%)")   # iteration x method
+
+METRICS_DB = "result_data/metrics.sqlite"
+Z_95 = 1.959964  # normal quantile of the two-sided 95% confidence interval
+BUSY_TIMEOUT = 60.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    iteration INTEGER NOT NULL,
+    method TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL,
+    method_order INTEGER NOT NULL,
+    metric_order INTEGER NOT NULL,
+    PRIMARY KEY (iteration, method, metric)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS aggregates (
+    method TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    square_total REAL NOT NULL,
+    iteration_total REAL NOT NULL,
+    metric_order INTEGER NOT NULL,
+    PRIMARY KEY (method, metric)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS metrics_insert AFTER INSERT ON metrics WHEN NEW.value IS NOT NULL
+BEGIN
+    INSERT INTO aggregates VALUES (NEW.method, NEW.metric, 1, NEW.value, NEW.value * NEW.value,
+                                   NEW.iteration, NEW.metric_order)
+    ON CONFLICT (method, metric) DO UPDATE SET
+        count = count + 1,
+        total = total + excluded.total,
+        square_total = square_total + excluded.square_total,
+        iteration_total = iteration_total + excluded.iteration_total,
+        metric_order = MIN(metric_order, excluded.metric_order);
+END;
+
+CREATE TRIGGER IF NOT EXISTS metrics_delete AFTER DELETE ON metrics WHEN OLD.value IS NOT NULL
+BEGIN
+    UPDATE aggregates SET
+        count = count - 1,
+        total = total - OLD.value,
+        square_total = square_total - OLD.value * OLD.value,
+        iteration_total = iteration_total - OLD.iteration
+    WHERE method = OLD.method AND metric = OLD.metric;
+    DELETE FROM aggregates WHERE method = OLD.method AND metric = OLD.metric AND count <= 0;
+END;
+"""
+
+
+class MetricsStore:
+    def __init__(self, path=METRICS_DB, timeout=BUSY_TIMEOUT):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    # Store one iteration's table (index = method, columns = metrics); an
+    # iteration recorded again replaces its earlier rows
+    def record(self, iteration, metrics_df):
+        rows = [(int(iteration), str(method), str(metric), float(value), method_order, metric_order)
+                for method_order, (method, values) in enumerate(metrics_df.iterrows())
+                for metric_order, (metric, value) in enumerate(values.items())]
+        with self.connection:
+            self.connection.execute("DELETE FROM metrics WHERE iteration = ?", (int(iteration),))
+            self.connection.executemany("INSERT INTO metrics VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    # First iteration number after the recorded ones
+    def next_iteration(self):
+        return (self.connection.execute("SELECT MAX(iteration) FROM metrics").fetchone()[0] or 0) + 1
+
+    def iterations(self):
+        return self.connection.execute("SELECT COUNT(DISTINCT iteration) FROM metrics").fetchone()[0]
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM metrics")
+            self.connection.execute("DELETE FROM aggregates")
+
+    def _metric_names(self):
+        return [name for name, in self.connection.execute(
+            "SELECT metric FROM aggregates GROUP BY metric ORDER BY MIN(metric_order), metric")]
+
+    # Wide per-iteration table: Iteration, Method, one column per metric
+    # (the layout of cumulative_performance_metrics.csv)
+    def frame(self):
+        long = pd.read_sql_query("SELECT iteration, method, metric, value, method_order FROM metrics",
+                                 self.connection)
+        if long.empty:
+            return pd.DataFrame(columns=["Iteration", "Method"])
+        wide = long.pivot_table(index=["iteration", "method_order", "method"], columns="metric",
+                                values="value", aggfunc="first", sort=True)
+        wide = wide.reindex(columns=self._metric_names()).reset_index()
+        wide = wide.drop(columns="method_order").rename(columns={"iteration": "Iteration", "method": "Method"})
+        wide.columns.name = None
+        return wide
+
+    # One metric per iteration: index Iteration, one column per method
+    def series(self, metric):
+        long = pd.read_sql_query("SELECT iteration, method, value FROM metrics WHERE metric = ?",
+                                 self.connection, params=(metric,))
+        series = long.pivot(index="iteration", columns="method", values="value")
+        series.index.name = "Iteration"
+        series.columns.name = None
+        return series
+
+    # Mean, sample standard deviation and normal 95% confidence interval per
+    # (method, metric), from the running sums
+    def summary(self):
+        rows = self.connection.execute(
+            "SELECT method, metric, count, total / count, square_total FROM aggregates "
+            "ORDER BY method, metric_order").fetchall()
+        records = []
+        for method, metric, count, mean, square_sum in rows:
+            variance = max(square_sum - count * mean * mean, 0.0) / (count - 1) if count > 1 else 0.0
+            half_width = Z_95 * math.sqrt(variance / count)
+            records.append({"Method": method, "Metric": metric, "Iterations": count, "Mean": mean,
+                            "Std": math.sqrt(variance), "CI95 Low": mean - half_width,
+                            "CI95 High": mean + half_width})
+        return pd.DataFrame(records, columns=["Method", "Metric", "Iterations", "Mean", "Std",
+                                              "CI95 Low", "CI95 High"])
+
+    # Mean of every metric per method (the layout of average_performance_metrics.csv)
+    def averages(self):
+        means = pd.read_sql_query(
+            "SELECT method, metric, total / count AS value, iteration_total / count AS iteration "
+            "FROM aggregates", self.connection)
+        if means.empty:
+            return pd.DataFrame(columns=["Method", "Iteration"])
+        wide = means.pivot(index="method", columns="metric", values="value")
+        wide = wide.reindex(columns=self._metric_names())
+        wide.insert(0, "Iteration", means.groupby("method")["iteration"].first())
+        wide = wide.reset_index().rename(columns={"method": "Method"})
+        wide.columns.name = None
+        return wide
+
+
+# Iteration tables of a comprehensive_metrics.txt written by older runs, as
+# (iteration, metrics_df) pairs
+def parse_comprehensive(path):
+    tables = []
+    block = None
+    with open(path, "r") as f:
+        for line in f:
+            if "--- Iteration ---" in line:
+                block = []
+                tables.append(block)
+            elif block is not None and line.strip():
+                block.append(re.split(r"\s{2,}", line.strip()))
+    for iteration, block in enumerate(tables, start=1):
+        if len(block) < 2:
+            continue
+        header, rows = block[0], block[1:]
+        values = {}
+        for parts in rows:
+            try:
+                values[parts[0]] = [float(value) for value in parts[1:len(header) + 1]]
+            except ValueError:
+                continue  # Skip lines that can't be parsed
+        if values:
+            width = min(len(row) for row in values.values())
+            yield iteration, pd.DataFrame.from_dict(values, orient="index", columns=header[:width])
@@ -0,0 +1,318 @@
+import argparse
+import os
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.trace_replay import ReplayEngine, resource_table
+from src.data.trace_format import TRACE_DTYPE, TraceReader, trace_exists
+from src.models.cache_baselines import knapsack_caching, request_sequence
+from src.models.cache_config import CACHE_FRACTION, cache_capacity
+from src.models.cache_policies import build_policy
+from src.models.sgd_core import adaptive_retry_optimizer, cleanup_selection
+
+# Miss-ratio curves: miss ratio as a function of cache capacity.
+#
+# LRU: one pass over the trace computes every request's byte stack distance
+# (total size of the distinct resources referenced since its previous request,
+# plus its own size) with a Fenwick tree over last-access positions. A request
+# hits an LRU cache of C KB iff its distance is <= C, so the whole curve comes
+# from one sorted distance array. The tree is compacted whenever it fills, so
+# memory follows the number of distinct resources, not the trace length.
+# With sizes this is the stack (inclusion) model of LRU, so the curve is an
+# approximation of the simulated LRU (cache_policies.LRUPolicy): that policy
+# never admits an object larger than the cache, while the model still counts its
+# bytes in every distance that spans it. With a few large videos in the catalog
+# the curve underestimates the hit ratio even at CACHE_FRACTION, so it is
+# labelled STACK_CURVE and LRUPolicy itself is replayed at the sweep capacities.
+#
+# SHARDS sampling (Waldspurger et al., FAST '15): with sample_rate R < 1 only
+# resources whose hash falls under R are tracked and distances are scaled by 1/R,
+# which cuts the work by about 1/R. The gap between the expected (R x total) and
+# the actual number of sampled requests is credited to the smallest distance
+# (SHARDS-adj), which removes most of the error from a skewed head of hot keys.
+# Sampling needs many distinct resources; keep R = 1 for small catalogs.
+#
+# Other policies (LFU, TinyLFU, Greedy Knapsack, SGD-Based) have no stack
+# property, so they are swept with LRU: the trace is replayed once per capacity.
+#
+#   python -m src.analysis.miss_ratio_curve
+#   python -m src.analysis.miss_ratio_curve --sample-rate 0.01 --sweep-points 8
+
+CURVE_FILE = "result_data/miss_ratio_curves.csv"
+PLOT_FILE = "result_visuals/miss_ratio_curves.png"
+SWEEP_POLICIES = ["LRU", "LFU", "Greedy Knapsack", "SGD-Based"]
+STACK_CURVE = "LRU (stack model)"
+MIN_TREE_SIZE = 1024
+HASH_BITS = 24
+
+
+# Byte stack distances of a stream of (key, size) requests
+class StackDistanceCounter:
+    def __init__(self, sample_rate=1.0):
+        self.sample_rate = sample_rate
+        self.last = {}  # key -> position of its latest request
+        self.key_size = {}
+        self.total = 0.0  # sum of the sizes currently in the tree
+        self.distances = array("d")
+        self.sizes = array("d")
+        self.requests_seen = 0  # before sampling
+        self.bytes_seen = 0.0
+        self._tree = array("d", bytes(8 * (MIN_TREE_SIZE + 1)))
+        self._next = 0
+
+    # Re-number the live positions 0..k-1 (in order) into a tree of 2k slots
+    def _compact(self):
+        live = sorted(self.last.items(), key=lambda item: item[1])
+        size = max(2 * len(live), MIN_TREE_SIZE)
+        self._tree = array("d", bytes(8 * (size + 1)))
+        self._next = 0
+        for key, _ in live:
+            self._add(self._next, self.key_size[key])
+            self.last[key] = self._next
+            self._next += 1
+
+    def _add(self, position, delta):
+        tree = self._tree
+        index = position + 1
+        length = len(tree)
+        while index < length:
+            tree[index] += delta
+            index += index & -index
+
+    # Sum of the tree over positions [0, position]
+    def _prefix(self, position):
+        tree = self._tree
+        index = position + 1
+        total = 0.0
+        while index:
+            total += tree[index]
+            index -= index & -index
+        return total
+
+    # Record the (already sampled) requests of one chunk
+    def feed(self, keys, sizes):
+        last = self.last
+        key_size = self.key_size
+        distances = self.distances
+        request_sizes = self.sizes
+        scale = 1.0 / self.sample_rate
+        inf = float("inf")
+        for key, size in zip(keys, sizes):
+            if self._next >= len(self._tree) - 1:
+                self._compact()
+            previous = last.get(key)
+            if previous is None:
+                distances.append(inf)
+                self.total += size
+            else:
+                distances.append((self.total - self._prefix(previous) + size) * scale)
+                self._add(previous, -size)
+            request_sizes.append(size)
+            self._add(self._next, size)
+            last[key] = self._next
+            key_size[key] = size
+            self._next += 1
+
+    # Hit and byte-hit ratios (%) of an LRU cache at each capacity (KB)
+    def curve(self, capacities):
+        distances = np.frombuffer(self.distances, dtype=np.float64)
+        sizes = np.frombuffer(self.sizes, dtype=np.float64)
+        capacities = np.asarray(capacities, dtype=np.float64)
+        if not len(distances):
+            return np.zeros(len(capacities)), np.zeros(len(capacities))
+        order = np.argsort(distances, kind="stable")
+        sorted_distances = distances[order]
+        cumulative_bytes = np.concatenate([[0.0], np.cumsum(sizes[order])])
+        fits = np.searchsorted(sorted_distances, capacities, side="right")
+        hits = fits.astype(np.float64)
+        kb_hit = cumulative_bytes[fits]
+        requests = float(len(distances))
+        kb_requested = cumulative_bytes[-1]
+        if self.sample_rate < 1.0 and self.requests_seen:
+            # SHARDS-adj: credit the sampling shortfall (or excess) at distance zero
+            requests = self.requests_seen * self.sample_rate
+            kb_requested = self.bytes_seen * self.sample_rate
+            hits += requests - len(distances)
+            kb_hit += kb_requested - cumulative_bytes[-1]
+        return (np.clip(hits / requests * 100, 0, 100),
+                np.clip(kb_hit / kb_requested * 100, 0, 100))
+
+
+# SHARDS spatial sampling: keep keys whose hash (splitmix64 finalizer) is below rate * 2^HASH_BITS
+def sample_mask(keys, sample_rate):
+    if sample_rate >= 1.0:
+        return np.ones(len(keys), dtype=np.bool_)
+    with np.errstate(over="ignore"):
+        hashed = keys.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        hashed = (hashed ^ (hashed >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        hashed = (hashed ^ (hashed >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        hashed ^= hashed >> np.uint64(31)
+    return (hashed >> np.uint64(64 - HASH_BITS)) < np.uint64(int(sample_rate * (1 << HASH_BITS)))
+
+
+# LRU hit / byte-hit curves from one pass over chunks of resource ids
+def lru_curve(chunks, sizes, capacities, sample_rate=1.0):
+    sizes = np.asarray(sizes, dtype=np.float64)
+    counter = StackDistanceCounter(sample_rate)
+    for keys in chunks:
+        keys = np.asarray(keys, dtype=np.int64)
+        counter.requests_seen += len(keys)
+        counter.bytes_seen += float(sizes[keys].sum())
+        keys = keys[sample_mask(keys, sample_rate)]
+        counter.feed(keys.tolist(), sizes[keys].tolist())
+    return counter.curve(capacities)
+
+
+# Requests of the run as chunks of trace records: the recorded trace when there
+# is one, otherwise a shuffled sequence with the processed frequencies
+def load_requests(root):
+    interim_dir = os.path.join(root, "interim_data")
+    trace_path = os.path.join(interim_dir, "request_trace")
+    processed_file = os.path.join(interim_dir, "processed_request_data.csv")
+    if trace_exists(trace_path):
+        reader = TraceReader(trace_path)
+        sizes, latencies = resource_table(reader, processed_file,
+                                          os.path.join(interim_dir, "web_resources.json"))
+        df = pd.DataFrame({"resource": reader.resources, "frequency": reader.frequencies(),
+                           "size": sizes, "latency": latencies})
+        return df, reader
+
+    df = pd.read_csv(processed_file)
+    records = np.zeros(int(df["frequency"].sum()), dtype=TRACE_DTYPE)
+    records["resource"] = request_sequence(df, seed=0)
+    records["status"] = 200
+    records["latency"] = df["latency"].to_numpy()[records["resource"]]
+    return df, _ArrayTrace(records)
+
+
+# In-memory stand-in for TraceReader.iter_chunks
+class _ArrayTrace:
+    def __init__(self, records):
+        self.records = records
+
+    def iter_chunks(self, chunk_size=1 << 16):
+        for start in range(0, len(self.records), chunk_size):
+            yield self.records[start:start + chunk_size]
+
+
+def _successful(reader):
+    for chunk in reader.iter_chunks():
+        yield chunk["resource"][chunk["status"] == 200]
+
+
+# Static selections (resource ids) of the offline methods at one capacity
+def offline_selection(method, df, capacity, seed=0):
+    if method == "Greedy Knapsack":
+        names = set(knapsack_caching(df.copy(), capacity))
+        return np.flatnonzero(df["resource"].isin(names).to_numpy()).tolist()
+    if method == "SGD-Based":
+        frequency = df["frequency"].to_numpy(dtype=np.float64)
+        size = df["size"].to_numpy(dtype=np.float64)
+        cache_prob, _, _, _ = adaptive_retry_optimizer(frequency, size, capacity,
+                                                       rng=np.random.default_rng(seed))
+        return np.flatnonzero(cleanup_selection(cache_prob, size, capacity)).tolist()
+    raise ValueError(f"No offline selection for {method!r}")
+
+
+# Replay the trace once per capacity through the simulated policies
+def sweep(reader, df, capacities, methods=SWEEP_POLICIES, seed=0):
+    sizes = df["size"].to_numpy(dtype=np.float64)
+    rows = []
+    for capacity in capacities:
+        capacity = int(capacity)
+        policies = {}
+        for method in methods:
+            if method in ("Greedy Knapsack", "SGD-Based"):
+                policies[method] = build_policy(method, capacity, offline_selection(method, df, capacity, seed))
+            else:
+                policies[method] = build_policy(method, capacity)
+        engine = ReplayEngine(policies, sizes, window_requests=1 << 62)
+        engine.run(reader)
+        for _, row in engine.summary().iterrows():
+            rows.append((row["Method"], capacity, row["Hit Ratio (%)"], row["Byte Hit Ratio (%)"]))
+    return rows
+
+
+def curve_frame(rows, total_size):
+    frame = pd.DataFrame(rows, columns=["Method", "Capacity (KB)", "Hit Ratio (%)", "Byte Hit Ratio (%)"])
+    frame.insert(2, "Capacity (%)", frame["Capacity (KB)"] / total_size * 100)
+    frame["Miss Ratio (%)"] = 100 - frame["Hit Ratio (%)"]
+    frame["Byte Miss Ratio (%)"] = 100 - frame["Byte Hit Ratio (%)"]
+    return frame.drop(columns=["Hit Ratio (%)", "Byte Hit Ratio (%)"])
+
+
+def plot_curves(frame, path, marker_fraction=CACHE_FRACTION):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.style.use('dark_background')
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+    for axis, column in zip(axes, ["Miss Ratio (%)", "Byte Miss Ratio (%)"]):
+        for method, group in frame.groupby("Method", sort=False):
+            style = "--" if method == STACK_CURVE else "o-"
+            axis.plot(group["Capacity (%)"], group[column], style, label=method, markersize=4)
+        axis.axvline(marker_fraction * 100, color="gray", linestyle=":", label="Configured capacity")
+        axis.set_xscale("log")
+        axis.set_title(f"{column.replace(' (%)', '')} Curve")
+        axis.set_xlabel("Cache Capacity (% of total size)")
+        axis.set_ylabel(column)
+        axis.grid(True, linestyle="--", alpha=0.5)
+        axis.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+# LRU stack-model curve at `points` capacities plus a sweep of the simulated
+# policies at `sweep_points` capacities, both between min_fraction and 100% of
+# the total size
+def run(root=".", sample_rate=1.0, points=200, sweep_points=12, min_fraction=0.001,
+        methods=SWEEP_POLICIES, seed=0, plot=True):
+    os.makedirs(os.path.join(root, "result_data"), exist_ok=True)
+    os.makedirs(os.path.join(root, "result_visuals"), exist_ok=True)
+
+    df, reader = load_requests(root)
+    sizes = df["size"].to_numpy(dtype=np.float64)
+    total_size = sizes.sum()
+    fractions = np.unique(np.append(np.geomspace(min_fraction, 1.0, points), CACHE_FRACTION))
+    capacities = np.array([cache_capacity(total_size, fraction) for fraction in fractions])
+
+    hit_ratio, byte_hit_ratio = lru_curve(_successful(reader), sizes, capacities, sample_rate)
+    rows = [(STACK_CURVE, int(capacity), hit, byte_hit)
+            for capacity, hit, byte_hit in zip(capacities, hit_ratio, byte_hit_ratio)]
+
+    if methods and sweep_points:
+        sweep_fractions = np.unique(np.append(np.geomspace(min_fraction, 1.0, sweep_points), CACHE_FRACTION))
+        sweep_capacities = [cache_capacity(total_size, fraction) for fraction in sweep_fractions]
+        rows.extend(sweep(reader, df, sweep_capacities, methods, seed))
+
+    frame = curve_frame(rows, total_size)
+    frame.to_csv(os.path.join(root, CURVE_FILE), index=False)
+    print(f"Miss-ratio curves saved to {os.path.join(root, CURVE_FILE)}")
+    if plot:
+        plot_curves(frame, os.path.join(root, PLOT_FILE))
+        print(f"Plot saved to {os.path.join(root, PLOT_FILE)}")
+    return frame
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Miss-ratio curves for every cache policy")
+    parser.add_argument("--sample-rate", type=float, default=1.0,
+                        help="SHARDS sampling rate for the LRU curve (1.0 = exact)")
+    parser.add_argument("--points", type=int, default=200, help="capacities on the LRU curve")
+    parser.add_argument("--sweep-points", type=int, default=12,
+                        help="capacities replayed for the simulated policies (0 = stack curve only)")
+    parser.add_argument("--min-fraction", type=float, default=0.001)
+    parser.add_argument("--policies", nargs="*", default=SWEEP_POLICIES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--root", default=".", help="run directory (holds interim_data/)")
+    args = parser.parse_args(argv)
+    run(args.root, sample_rate=args.sample_rate, points=args.points, sweep_points=args.sweep_points,
+        min_fraction=args.min_fraction, methods=args.policies, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
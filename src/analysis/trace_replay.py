@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data.trace_format import CHUNK_SIZE, TRACE_FILE, TraceReader
+from src.data.workload_generator import load_catalog
+from src.models.cache_config import CACHE_FRACTION, cache_capacity
+from src.models.cache_policies import DYNAMIC_POLICIES, build_policy
+
+# Trace replay engine: reads a request trace once and drives every cache policy
+# over it in lockstep, chunk by chunk.
+#
+# Each chunk of the memory-mapped trace is handed to every policy's
+# replay_hits() (online policies replay it request by request; precomputed
+# selections such as Greedy Knapsack and SGD-Based are a vectorized mask
+# lookup), and the per-request hit masks are folded into per-window totals with
+# bincount. Policies start cold; a static selection admits each selected
+# resource on its first request.
+#
+# The trace is read once, but the online policies still cost one Python call per
+# request each, and a lockstep run costs the sum of its policies. bench_replay
+# (100k objects, Zipf 0.9, one core) measures about 0.9M requests/s for LRU,
+# 0.35M for LFU and 0.25M for LRU + LFU + Greedy Knapsack together; a static
+# selection alone runs at several million.
+#
+# Reported per policy and window:
+#
+#   hit ratio        hits / requests
+#   byte hit ratio   KB served from cache / KB requested
+#   latency saved    sum of the origin latency of the requests that hit (s)
+#
+#   python -m src.analysis.trace_replay --window-seconds 1
+#   python -m src.analysis.trace_replay --window-requests 100000 --policies LRU LFU TinyLFU
+
+PROCESSED_FILE = "interim_data/processed_request_data.csv"
+RESOURCE_FILE = "interim_data/web_resources.json"
+CACHE_RESULTS_FILE = "interim_data/cache_results.json"
+WINDOWS_FILE = "result_data/trace_replay_windows.csv"
+SUMMARY_FILE = "result_data/trace_replay_summary.csv"
+
+
+# Running per-window sums for one policy; arrays grow as later windows appear
+class WindowTotals:
+    FIELDS = ("requests", "hits", "kb_requested", "kb_hit", "latency_saved")
+
+    def __init__(self):
+        self.sums = {field: np.zeros(0) for field in self.FIELDS}
+
+    def add(self, window, hits, kb, latency):
+        length = int(window.max()) + 1 if window.size else 0
+        for field, weights in (("requests", None), ("hits", hits.astype(np.float64)),
+                               ("kb_requested", kb), ("kb_hit", np.where(hits, kb, 0.0)),
+                               ("latency_saved", np.where(hits, latency, 0.0))):
+            counts = np.bincount(window, weights=weights, minlength=length)
+            total = self.sums[field]
+            if len(total) < len(counts):
+                total = np.concatenate([total, np.zeros(len(counts) - len(total))])
+            total[:len(counts)] += counts
+            self.sums[field] = total
+
+
+class ReplayEngine:
+    # policies: {name: CachePolicy} over integer resource ids
+    # sizes:    KB per resource id; latencies: origin seconds per resource id, or
+    #           None to use each request's recorded latency from the trace
+    # Windows are window_seconds of trace time when given, else window_requests requests.
+    def __init__(self, policies, sizes, latencies=None, window_seconds=None, window_requests=100_000):
+        self.policies = policies
+        self.sizes = np.asarray(sizes, dtype=np.float64)
+        self._size_list = self.sizes.tolist()
+        self.latencies = None if latencies is None else np.asarray(latencies, dtype=np.float64)
+        self.window_seconds = window_seconds
+        self.window_requests = window_requests
+        self.totals = {name: WindowTotals() for name in policies}
+        self.requests = 0
+        self.start_time = None
+        self.elapsed = 0.0
+
+    # Feed one chunk of trace records (TRACE_DTYPE) to every policy
+    def feed(self, chunk):
+        resource = chunk["resource"].astype(np.int64)
+        if self.window_seconds:
+            if self.start_time is None and len(chunk):
+                self.start_time = float(chunk["timestamp"][0])
+            window = ((chunk["timestamp"] - self.start_time) // self.window_seconds).astype(np.int64)
+            np.maximum(window, 0, out=window)
+        else:
+            window = (self.requests + np.arange(len(chunk))) // self.window_requests
+        kb = self.sizes[resource]
+        latency = self.latencies[resource] if self.latencies is not None else chunk["latency"].astype(np.float64)
+
+        keys = None
+        for name, policy in self.policies.items():
+            if policy.vectorized:
+                hits = policy.replay_hits(resource, self.sizes)
+            else:
+                if keys is None:
+                    keys = resource.tolist()  # Python ints are much faster to hash per request
+                hits = policy.replay_hits(keys, self._size_list)
+            self.totals[name].add(window, hits, kb, latency)
+        self.requests += len(chunk)
+
+    # Replay a whole TraceReader (only requests with the given status, 200 by default)
+    def run(self, reader, chunk_size=CHUNK_SIZE, status=200):
+        start = time.perf_counter()
+        for chunk in reader.iter_chunks(chunk_size):
+            if status is not None:
+                chunk = chunk[chunk["status"] == status]
+            self.feed(chunk)
+        self.elapsed += time.perf_counter() - start
+        return self
+
+    # One row per (policy, window)
+    def windows(self):
+        frames = []
+        for name, totals in self.totals.items():
+            sums = totals.sums
+            count = len(sums["requests"])
+            frame = pd.DataFrame({
+                "Method": name,
+                "Window": np.arange(count),
+                "Requests": sums["requests"].astype(np.int64),
+                "Hits": sums["hits"].astype(np.int64),
+                "Hit Ratio (%)": _percent(sums["hits"], sums["requests"]),
+                "Byte Hit Ratio (%)": _percent(sums["kb_hit"], sums["kb_requested"]),
+                "Latency Saved (s)": sums["latency_saved"],
+            })
+            if self.window_seconds:
+                frame.insert(2, "Window Start (s)", frame["Window"] * self.window_seconds)
+            frames.append(frame[frame["Requests"] > 0])
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    # Whole-trace totals per policy
+    def summary(self):
+        rows = []
+        for name, totals in self.totals.items():
+            sums = {field: float(values.sum()) for field, values in totals.sums.items()}
+            rows.append({
+                "Method": name,
+                "Requests": int(sums["requests"]),
+                "Hits": int(sums["hits"]),
+                "Hit Ratio (%)": _percent(sums["hits"], sums["requests"]),
+                "Byte Hit Ratio (%)": _percent(sums["kb_hit"], sums["kb_requested"]),
+                "Latency Saved (s)": sums["latency_saved"],
+            })
+        return pd.DataFrame(rows)
+
+
+def _percent(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    ratio = np.divide(numerator * 100, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+    return ratio if ratio.ndim else float(ratio)
+
+
+# Sizes (KB) and origin latencies (s) per trace resource id: from the catalog
+# arrays of a generated trace (workload_generator.py) when there are any, else
+# from the processed dataset when it covers the resource, else from the catalog
+def resource_table(reader, processed_file=PROCESSED_FILE, resource_file=RESOURCE_FILE):
+    catalog = load_catalog(reader.data_path, len(reader.resources))
+    if catalog is not None:
+        return catalog
+    sizes = {}
+    latencies = {}
+    if os.path.exists(resource_file):
+        with open(resource_file, "r") as f:
+            for name, entry in json.load(f).items():
+                sizes[name] = entry["size"]
+                latencies[name] = entry["latency"]
+    if os.path.exists(processed_file):
+        df = pd.read_csv(processed_file)
+        sizes.update(zip(df["resource"], df["size"]))
+        latencies.update(zip(df["resource"], df["latency"]))
+    return (np.array([sizes.get(name, 0) for name in reader.resources], dtype=np.float64),
+            np.array([latencies.get(name, 0.0) for name in reader.resources], dtype=np.float64))
+
+
+# Policies by method name; static methods take their selection (resource names)
+# from cache_results.json and are mapped to trace resource ids
+def build_policies(methods, capacity, reader, results_file=CACHE_RESULTS_FILE):
+    selections = {}
+    if os.path.exists(results_file):
+        with open(results_file, "r") as f:
+            selections = json.load(f)
+    ids = {name: index for index, name in enumerate(reader.resources)}
+    policies = {}
+    for method in methods:
+        if method in DYNAMIC_POLICIES:
+            policies[method] = build_policy(method, capacity)
+        elif method in selections:
+            selection = [ids[name] for name in selections[method] if name in ids]
+            policies[method] = build_policy(method, capacity, selection)
+        else:
+            print(f"Skipping {method}: no selection in {results_file}")
+    return policies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a request trace through every cache policy")
+    parser.add_argument("--trace", default=TRACE_FILE)
+    parser.add_argument("--policies", nargs="+",
+                        default=["LRU", "LFU", "Greedy Knapsack", "SGD-Based"])
+    parser.add_argument("--window-seconds", type=float, default=None)
+    parser.add_argument("--window-requests", type=int, default=100_000)
+    parser.add_argument("--latency", choices=["recorded", "catalog"], default="recorded",
+                        help="latency saved per hit: the trace's recorded latency or the resource's")
+    parser.add_argument("--capacity-fraction", type=float, default=CACHE_FRACTION)
+    args = parser.parse_args(argv)
+
+    os.makedirs("result_data", exist_ok=True)
+    reader = TraceReader(args.trace)
+    sizes, latencies = resource_table(reader)
+    capacity = cache_capacity(sizes.sum(), args.capacity_fraction)
+    policies = build_policies(args.policies, capacity, reader)
+
+    engine = ReplayEngine(policies, sizes, latencies if args.latency == "catalog" else None,
+                          args.window_seconds, args.window_requests)
+    engine.run(reader)
+
+    engine.windows().to_csv(WINDOWS_FILE, index=False)
+    summary = engine.summary()
+    summary.to_csv(SUMMARY_FILE, index=False)
+    print(summary.to_string(index=False))
+    rate = engine.requests / engine.elapsed if engine.elapsed else 0.0
+    print(f"Replayed {engine.requests} requests through {len(policies)} policies in {engine.elapsed:.2f}s "
+          f"({rate:,.0f} trace requests/s)")
+    print(f"Per-window results saved to {WINDOWS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import argparse
+
+import numpy as np
+
+from src.models.cache_policies import build_policy
+from src.server.cache_store import PIPELINE_BATCH, REDIS_URL, CacheStoreError, MemoryStore, RedisStore
+
+# Benchmark: per-operation latency of the proxy's cache stores.
+#
+# Runs the same workload against the in-process dict backend and against Redis:
+# a live server at --redis-url, else fakeredis (with lupa, for the Lua scripts)
+# if installed, else Redis is reported as skipped. Operations:
+#
+#   put        single-entry writes (size accounting included)
+#   admit      Zipf-popular resources admitted under an LRU policy at a budget of
+#              --capacity of the catalog, evictions included (one round trip each)
+#   get        single-key reads of cached entries
+#   get_many   batched reads of --batch keys (MGET on Redis)
+#   delete     single-entry deletes
+#
+#   python -m src.benchmarks.bench_cache_store --keys 10000 --value-kb 16
+#   python -m src.benchmarks.bench_cache_store --redis-url redis://127.0.0.1:6379/15
+
+
+# A RedisStore on a live server, on fakeredis, or None (with the reason)
+def redis_store(url, prefix):
+    try:
+        store = RedisStore(url, prefix=prefix)
+        store.client.ping()
+        return store, url
+    except Exception as e:  # redis-py missing, or no server
+        reason = f"no server at {url} ({e.__class__.__name__})"
+    try:
+        import fakeredis
+        import lupa  # noqa: F401 (fakeredis runs the Lua scripts with it)
+    except ImportError:
+        return None, reason + "; fakeredis/lupa not installed"
+    return RedisStore(prefix=prefix, client=fakeredis.FakeRedis()), "fakeredis"
+
+
+def run_backend(store, keys, sizes, value, workload, batch, capacity):
+    store.clear()
+    for key, size in zip(keys, sizes):
+        store.put(key, value, size)
+
+    policy = build_policy("LRU", capacity)
+    store.clear()
+    for index in workload:
+        if not policy.lookup(keys[index]):
+            store.admit(policy, keys[index], value, sizes[index])
+    cached = [key for key in keys if policy.lookup(key)]
+    assert abs(store.used - policy.used) < 1e-6, (store.used, policy.used)
+    assert len(store) == len(cached)
+
+    for key in cached:
+        store.get(key)
+    for start in range(0, len(cached), batch):
+        store.get_many(cached[start:start + batch])
+    for key in cached:
+        store.delete([key])
+    assert len(store) == 0 and abs(store.used) < 1e-6
+    return store.timings.summary()
+
+
+def print_summary(label, summary):
+    print(f"{label}")
+    print(f"  {'operation':<10} {'calls':>8} {'keys/call':>10} {'mean us':>10} {'p50 us':>10} "
+          f"{'p99 us':>10} {'keys/s':>12}")
+    for operation in ("put", "replace", "get", "get_many", "delete"):
+        entry = summary.get(operation)
+        if entry is None:
+            continue
+        name = "admit" if operation == "replace" else operation
+        keys_per_call = entry["keys"] / max(entry["calls"], 1)
+        rate = keys_per_call / (entry["mean_us"] / 1e6) if entry["mean_us"] else 0.0
+        print(f"  {name:<10} {entry['calls']:>8} {keys_per_call:>10.1f} {entry['mean_us']:>10.1f} "
+              f"{entry['p50_us']:>10.1f} {entry['p99_us']:>10.1f} {rate:>12,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache store per-operation latency")
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=50_000, help="Zipf requests for the admit phase")
+    parser.add_argument("--value-kb", type=int, default=16, help="stored value size (bytes x 1024)")
+    parser.add_argument("--batch", type=int, default=PIPELINE_BATCH, help="keys per get_many")
+    parser.add_argument("--capacity", type=float, default=0.1, help="LRU budget as a fraction of the catalog")
+    parser.add_argument("--redis-url", default=REDIS_URL)
+    parser.add_argument("--prefix", default="webcache-bench")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    keys = [f"/resource_{i}.dat" for i in range(args.keys)]
+    sizes = rng.integers(1, 2 * args.value_kb, args.keys).astype(float).tolist()
+    value = rng.bytes(args.value_kb * 1024)
+    workload = np.minimum(rng.zipf(1.2, args.requests) - 1, args.keys - 1)
+    capacity = args.capacity * sum(sizes)
+
+    print(f"{args.keys} keys, {args.value_kb} KB values, {args.requests} admit-phase requests\n")
+    print_summary("memory", run_backend(MemoryStore(), keys, sizes, value, workload, args.batch, capacity))
+
+    store, where = redis_store(args.redis_url, args.prefix)
+    if store is None:
+        print(f"\nredis: skipped, {where}")
+        return
+    try:
+        summary = run_backend(store, keys, sizes, value, workload, args.batch, capacity)
+    except CacheStoreError as e:
+        print(f"\nredis ({where}): failed, {e}")
+        return
+    finally:
+        store.clear()
+        store.close()
+    print()
+    print_summary(f"redis ({where})", summary)
+
+
+if __name__ == "__main__":
+    main()
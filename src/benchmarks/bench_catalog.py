@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from flask import Flask, jsonify
+
+# Benchmark: requests/sec of the origin handler with per-request JSON parsing
+# (the previous behaviour) versus the in-memory ResourceCatalog.
+#
+# Latencies in the generated catalog are zero so the numbers measure handler
+# overhead only. Requests go through Flask's test client, so no sockets are used.
+#
+#   python -m src.benchmarks.bench_catalog --resources 100 --requests 5000
+
+
+# Build a catalog shaped like the one simulate_requests.py generates
+def build_resources(num_resources):
+    return {
+        f"/resource_{i}.dat": {"size": random.randint(5, 50000), "latency": 0.0}
+        for i in range(1, num_resources + 1)
+    }
+
+
+# Previous serve_resource: re-open and parse the catalog on every GET
+def legacy_app(resource_file):
+    app = Flask("legacy_server")
+
+    @app.route('/<path:resource>', methods=['GET'])
+    def serve_resource(resource):
+        resource_path = f"/{resource}"
+        try:
+            with open(resource_file, "r") as f:
+                web_resources = json.load(f)
+        except Exception as e:
+            return jsonify({"error": "Resource file could not be loaded", "details": str(e)}), 500
+
+        if resource_path in web_resources:
+            time.sleep(web_resources[resource_path]["latency"])
+            return jsonify({
+                "message": f"Served {resource_path}",
+                "size": web_resources[resource_path]["size"]
+            })
+        return jsonify({"error": "Resource not found"}), 404
+
+    return app
+
+
+def measure(app, paths):
+    client = app.test_client()
+    start = time.perf_counter()
+    for path in paths:
+        response = client.get(path)
+        assert response.status_code == 200, response.status_code
+    elapsed = time.perf_counter() - start
+    return len(paths) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark origin catalog lookups")
+    parser.add_argument("--resources", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    resources = build_resources(args.resources)
+    paths = random.choices(list(resources), k=args.requests)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # server.py reads interim_data/web_resources.json relative to the working directory
+        previous_cwd = os.getcwd()
+        os.chdir(workdir)
+        sys.path.insert(0, previous_cwd)
+        try:
+            os.makedirs("interim_data", exist_ok=True)
+            with open("interim_data/web_resources.json", "w") as f:
+                json.dump(resources, f)
+
+            from src.server import server
+
+            legacy_rps = measure(legacy_app("interim_data/web_resources.json"), paths)
+            catalog_rps = measure(server.app, paths)
+        finally:
+            os.chdir(previous_cwd)
+
+    print(f"Catalog size: {args.resources} resources, {args.requests} requests")
+    print(f"Per-request json.load : {legacy_rps:10.0f} req/s")
+    print(f"In-memory catalog     : {catalog_rps:10.0f} req/s")
+    print(f"Speedup               : {catalog_rps / legacy_rps:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.analyze_results import write_comprehensive
+from src.analysis.metrics_store import MetricsStore, parse_comprehensive
+
+# Benchmark: metric summaries as runs grow, re-parsing comprehensive_metrics.txt
+# (the old metric_summary_analysis.py path) vs the metrics store's running aggregates.
+#
+#   python -m src.benchmarks.bench_metrics_summary --iterations 100 1000 5000
+
+METHODS = ["LRU", "LFU", "Greedy Knapsack", "SGD-Based"]
+METRICS = ["Cache Hit Rate (%)", "Latency Reduction (%)", "Cache Usage (KB)", "Max Cache Size (KB)",
+           "Optimality Gap (%)"]
+
+
+def iteration_tables(iterations, rng):
+    for iteration in range(1, iterations + 1):
+        yield iteration, pd.DataFrame(rng.uniform(0, 100, (len(METHODS), len(METRICS))),
+                                      index=METHODS, columns=METRICS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metric summary: text re-parsing vs metrics store")
+    parser.add_argument("--iterations", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'iterations':>10} {'record':>10} {'text parse':>12} {'store summary':>14} {'speedup':>9}")
+    for iterations in args.iterations:
+        rng = np.random.default_rng(args.seed)
+        with tempfile.TemporaryDirectory() as directory:
+            text_path = os.path.join(directory, "comprehensive_metrics.txt")
+            with open(text_path, "w") as f, MetricsStore(os.path.join(directory, "metrics.sqlite")) as store:
+                start = time.perf_counter()
+                for iteration, metrics_df in iteration_tables(iterations, rng):
+                    store.record(iteration, metrics_df)
+                    write_comprehensive(f, metrics_df)
+                record = (time.perf_counter() - start) / iterations
+
+            start = time.perf_counter()
+            frames = [metrics_df.assign(Iteration=iteration)
+                      for iteration, metrics_df in parse_comprehensive(text_path)]
+            pd.concat(frames).rename_axis("Method").reset_index().groupby("Method").mean()
+            legacy = time.perf_counter() - start
+
+            with MetricsStore(os.path.join(directory, "metrics.sqlite")) as store:
+                start = time.perf_counter()
+                store.summary()
+                store.averages()
+                summary = time.perf_counter() - start
+        print(f"{iterations:>10} {record * 1e3:>8.2f}ms {legacy:>11.3f}s {summary:>13.3f}s {legacy / summary:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+
+from src.models.cache_policies import LFUPolicy, LRUPolicy
+
+# Microbenchmark: cache policy operations/sec on a Zipf request trace.
+#
+# Replays the same trace through each online policy and, as a reference, through
+# a deque-based LRU with the same size-aware semantics (deque.remove on every hit,
+# as lru_caching used to do).
+#
+#   python -m src.benchmarks.bench_policies --objects 100000 --requests 2000000
+
+POLICIES = {
+    "LRU": lambda capacity: LRUPolicy(capacity),
+    "LFU": lambda capacity: LFUPolicy(capacity),
+    "LFU (decay)": lambda capacity: LFUPolicy(capacity, decay_interval=100000),
+    "TinyLFU": lambda capacity: LFUPolicy(capacity, admission="tinylfu", sketch_width=65536),
+}
+
+
+# Zipf-distributed trace over `objects` ids with a 10%-of-total capacity
+def build_workload(objects, requests, alpha, seed):
+    rng = np.random.default_rng(seed)
+    ranks = np.arange(1, objects + 1, dtype=np.float64)
+    probabilities = ranks ** -alpha
+    probabilities /= probabilities.sum()
+    trace = rng.choice(objects, size=requests, p=probabilities)
+    sizes = rng.integers(5, 500, size=objects)
+    capacity = int(sizes.sum() * 0.1)
+    return trace.tolist(), sizes.tolist(), capacity
+
+
+# Reference LRU using a deque for recency order
+def deque_lru(trace, sizes, capacity):
+    cache = deque()
+    cache_set = set()
+    used = 0
+    hits = 0
+    for key in trace:
+        if key in cache_set:
+            cache.remove(key)
+            cache.append(key)
+            hits += 1
+            continue
+        size = sizes[key]
+        if size > capacity:
+            continue
+        while used + size > capacity:
+            victim = cache.popleft()
+            cache_set.remove(victim)
+            used -= sizes[victim]
+        cache.append(key)
+        cache_set.add(key)
+        used += size
+    return hits
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache policy replay microbenchmark")
+    parser.add_argument("--objects", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=2000000)
+    parser.add_argument("--deque-requests", type=int, default=20000,
+                        help="prefix of the trace replayed by the O(n) deque LRU")
+    parser.add_argument("--alpha", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    trace, sizes, capacity = build_workload(args.objects, args.requests, args.alpha, args.seed)
+    print(f"{args.objects} objects, {args.requests} requests, capacity {capacity} KB")
+
+    for name, factory in POLICIES.items():
+        hits, elapsed = timed(factory(capacity).replay, trace, sizes)
+        print(f"{name:<12}: {len(trace) / elapsed:12.0f} ops/s  "
+              f"({elapsed:.2f}s, hit rate {hits / len(trace):.2%})")
+
+    prefix = trace[:args.deque_requests]
+    fast_hits = LRUPolicy(capacity).replay(prefix, sizes)
+    hits, elapsed = timed(deque_lru, prefix, sizes, capacity)
+    assert hits == fast_hits, (hits, fast_hits)
+    print(f"{'deque LRU':<12}: {len(prefix) / elapsed:12.0f} ops/s  "
+          f"({elapsed:.2f}s on the first {len(prefix)} requests)")
+
+
+if __name__ == "__main__":
+    main()
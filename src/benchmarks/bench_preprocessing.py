@@ -0,0 +1,72 @@
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data.data_preprocessing import (CATEGORY_RANGES, DEFAULT_RANGES, category_codes,
+                                         draw_size_and_latency)
+from src.data.workload_generator import CATEGORIES, resource_names
+
+# Benchmark: data_preprocessing size/latency assignment, per-row apply vs
+# category codes + vectorized draws.
+#
+# The per-row path is timed on the first --legacy-rows rows (it is linear in the
+# row count) and extrapolated to the full input.
+#
+#   python -m src.benchmarks.bench_preprocessing --rows 1000000
+
+
+# The per-row path: size and latency of a single resource (scalar form of
+# category_codes + draw_size_and_latency)
+def assign_size_and_latency(resource, rng=random):
+    ranges = next((CATEGORY_RANGES[name] for name in CATEGORY_RANGES if name in resource), DEFAULT_RANGES)
+    size = rng.randint(*ranges["size_range"])
+    latency = round(rng.uniform(*ranges["latency_range"]), 2)
+    return pd.Series([size, latency])
+
+
+def build_requests(rows, seed):
+    rng = np.random.default_rng(seed)
+    shares = np.array([CATEGORIES[name]["share"] for name in CATEGORIES])
+    category = rng.choice(len(shares), size=rows, p=shares / shares.sum()).astype(np.uint8)
+    return pd.DataFrame({"resource": resource_names(category), "frequency": rng.integers(1, 100, rows)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="data_preprocessing: per-row apply vs vectorized")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--legacy-rows", type=int, default=100_000,
+                        help="rows timed with the per-row apply (extrapolated to --rows)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    df = build_requests(args.rows, args.seed)
+    sample = df.head(min(args.legacy_rows, args.rows)).copy()
+
+    start = time.perf_counter()
+    sample[["size", "latency"]] = sample["resource"].apply(assign_size_and_latency, rng=random.Random(args.seed))
+    legacy = (time.perf_counter() - start) * args.rows / len(sample)
+
+    start = time.perf_counter()
+    codes = category_codes(df["resource"])
+    encoded = time.perf_counter() - start
+    size, latency = draw_size_and_latency(codes, np.random.default_rng(args.seed))
+    df["size"] = size
+    df["latency"] = latency
+    vectorized = time.perf_counter() - start
+
+    # Both paths must agree on the category of every sampled row
+    low = np.array([CATEGORIES[name]["size_range"][0] for name in CATEGORIES] + [0])[codes[:len(sample)]]
+    high = np.array([CATEGORIES[name]["size_range"][1] for name in CATEGORIES] + [0])[codes[:len(sample)]]
+    assert ((sample["size"] >= low) & (sample["size"] <= high)).all()
+
+    print(f"{args.rows} rows")
+    print(f"  per-row apply      {legacy:8.2f} s  (timed on {len(sample)} rows)")
+    print(f"  vectorized         {vectorized:8.2f} s  (category codes {encoded:.2f} s)")
+    print(f"  speedup            {legacy / vectorized:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from src.analysis.trace_replay import ReplayEngine
+from src.data.trace_format import TRACE_DTYPE, TraceReader, TraceWriter
+from src.models.cache_policies import LFUPolicy, LRUPolicy, StaticPolicy
+from src.models.knapsack_solver import greedy
+
+# Benchmark: trace replay throughput, per policy and for all policies in lockstep.
+#
+# Writes a Zipf trace to a temporary binary trace file, then replays it from the
+# memory map. Static policies (Greedy Knapsack, SGD-Based style selections) are
+# vectorized; online policies replay request by request.
+#
+#   python -m src.benchmarks.bench_replay --objects 100000 --requests 5000000
+
+
+def build_trace(path, objects, requests, alpha, seed):
+    rng = np.random.default_rng(seed)
+    ranks = np.arange(1, objects + 1, dtype=np.float64)
+    probabilities = ranks ** -alpha
+    probabilities /= probabilities.sum()
+    sizes = rng.integers(5, 500, size=objects).astype(np.float64)
+
+    with TraceWriter(path, [f"/resource_{i}.dat" for i in range(objects)]) as writer:
+        for start in range(0, requests, 1_000_000):
+            count = min(1_000_000, requests - start)
+            records = np.zeros(count, dtype=TRACE_DTYPE)
+            records["timestamp"] = (start + np.arange(count)) / 10_000.0
+            records["client"] = rng.integers(1, 1000, count)
+            records["resource"] = rng.choice(objects, size=count, p=probabilities)
+            records["status"] = 200
+            records["latency"] = rng.uniform(0.05, 1.5, count)
+            writer.extend(records)
+    return sizes, probabilities
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trace replay throughput")
+    parser.add_argument("--objects", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=5_000_000)
+    parser.add_argument("--alpha", type=float, default=0.9)
+    parser.add_argument("--window-requests", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "trace")
+        start = time.perf_counter()
+        sizes, probabilities = build_trace(path, args.objects, args.requests, args.alpha, args.seed)
+        print(f"Wrote {args.requests} requests ({os.path.getsize(path + '.bin') / 1e6:.0f} MB) "
+              f"in {time.perf_counter() - start:.2f}s")
+
+        reader = TraceReader(path)
+        capacity = int(sizes.sum() * 0.1)
+        # A knapsack selection on expected request counts stands in for the offline methods
+        selection = np.flatnonzero(greedy(probabilities * args.requests, sizes, capacity)).tolist()
+        policies = {
+            "LRU": lambda: LRUPolicy(capacity),
+            "LFU": lambda: LFUPolicy(capacity),
+            "Greedy Knapsack": lambda: StaticPolicy(capacity, selection, "Greedy Knapsack"),
+        }
+
+        print(f"{'policies':>32} {'seconds':>8} {'trace req/s':>13} {'hit ratio':>10}")
+        runs = [[name] for name in policies] + [list(policies)]
+        for names in runs:
+            engine = ReplayEngine({name: policies[name]() for name in names}, sizes,
+                                  window_requests=args.window_requests)
+            engine.run(reader)
+            summary = engine.summary()
+            ratios = "/".join(f"{ratio:.1f}" for ratio in summary["Hit Ratio (%)"])
+            label = " + ".join(names) if len(names) > 1 else names[0]
+            print(f"{label:>32} {engine.elapsed:>8.2f} {engine.requests / engine.elapsed:>13,.0f} {ratios:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.data.resource_table import ResourceTable
+
+# Benchmark: the processed DataFrame (re-read from CSV by every stage, caches
+# matched with df["resource"].isin(cache)) vs the array-backed resource table
+# (attached zero-copy from its memory-mapped file, caches as boolean masks).
+#
+# Per catalog size it reports memory (DataFrame incl. the name strings vs the
+# table's arrays), load time (read_csv vs attaching the saved table), scoring
+# time for --methods caches of 10% of the catalog (the four analyze_results
+# metrics each; the table's time includes interning the names on first use) and
+# the slowest of --workers processes opening the same saved table.
+#
+#   python -m src.benchmarks.bench_resource_table --sizes 10000 100000 1000000
+
+CATEGORIES = ["small_images", "large_images", "videos", "scripts", "css", "other"]
+
+
+def build_frame(objects, rng):
+    category = rng.integers(0, len(CATEGORIES), objects)
+    return pd.DataFrame({
+        "resource": [f"/{CATEGORIES[c]}_{i}.dat" for i, c in enumerate(category.tolist())],
+        "frequency": rng.zipf(1.3, objects).clip(1, 100_000),
+        "size": rng.integers(5, 50_000, objects),
+        "latency": np.round(rng.uniform(0.03, 2.0, objects), 2),
+    })
+
+
+# The four analyze_results metrics, as the string-matching version computed them
+def score_frame(cache, df):
+    hit_rate = df[df["resource"].isin(cache)]["frequency"].sum() / df["frequency"].sum() * 100
+    latency = (df["latency"] * df["frequency"]).sum()
+    cached_df = df[df["resource"].isin(cache)]
+    reduction = (latency - (cached_df["latency"] * cached_df["frequency"]).sum()) / latency * 100
+    usage = df[df["resource"].isin(cache)]["size"].sum()
+    gap = df[df["resource"].isin(cache)]["frequency"].sum()
+    return hit_rate, reduction, usage, gap
+
+
+def score_table(cache, table):
+    cached = table.mask(cache)
+    hit_rate = table.frequency[cached].sum() / table.frequency.sum() * 100
+    latency = table.latency * table.frequency
+    reduction = (latency.sum() - latency[cached].sum()) / latency.sum() * 100
+    return hit_rate, reduction, table.size[cached].sum(), table.frequency[cached].sum()
+
+
+def attach_and_score(path, cache):
+    start = time.perf_counter()
+    table = ResourceTable.open(path)
+    attached = time.perf_counter() - start
+    score_table(cache, table)
+    table.close()
+    return attached
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Processed DataFrame vs array-backed resource table")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--methods", type=int, default=4, help="caches scored per iteration")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'objects':>9} {'df MB':>8} {'table MB':>9} {'read_csv':>9} {'attach':>9} "
+          f"{'isin score':>11} {'mask score':>11} {'worker attach':>14}")
+    for objects in args.sizes:
+        rng = np.random.default_rng(args.seed)
+        df = build_frame(objects, rng)
+        caches = [df["resource"].sample(frac=0.1, random_state=seed).tolist() for seed in range(args.methods)]
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, "processed_request_data.csv")
+            df.to_csv(csv_path, index=False)
+            table_file = os.path.join(directory, "resource_table")
+            ResourceTable.from_frame(df).save(table_file)
+
+            start = time.perf_counter()
+            loaded = pd.read_csv(csv_path)
+            read_csv = time.perf_counter() - start
+            start = time.perf_counter()
+            table = ResourceTable.open(table_file)
+            attach = time.perf_counter() - start
+
+            start = time.perf_counter()
+            expected = [score_frame(cache, loaded) for cache in caches]
+            frame_score = time.perf_counter() - start
+            start = time.perf_counter()
+            scores = [score_table(cache, table) for cache in caches]
+            table_score = time.perf_counter() - start
+            assert np.allclose(expected, scores)
+
+            with ProcessPoolExecutor(args.workers) as pool:
+                timings = list(pool.map(attach_and_score, [table_file] * args.workers,
+                                        caches[:1] * args.workers))
+            table_mb = table.nbytes() / 2**20
+            table.close()
+
+        print(f"{objects:>9} {loaded.memory_usage(deep=True).sum() / 2**20:>8.1f} {table_mb:>9.1f} "
+              f"{read_csv:>8.3f}s {attach * 1e3:>7.2f}ms {frame_score:>10.3f}s {table_score:>10.3f}s "
+              f"{max(timings) * 1e3:>12.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.models import sgd_core
+from src.models.sgd_core import LAMBDA, SGD_ITERATIONS, THETA_CLIP
+
+# Benchmark: SGD cache optimizer runtime, pandas implementation vs the array core.
+#
+# The pandas version is the optimizer as it was before sgd_core.py (three column
+# writes per iteration, a DataFrame copy per retry and an iterrows cleanup). It is
+# timed per retry on the smaller catalogs only; the array core runs the full
+# adaptive retry loop at every size.
+#
+# The second table compares evaluating a whole learning-rate grid one candidate at
+# a time (pandas, and the array core) against batched_retry_optimizer, which
+# evaluates the grid as one (candidates x resources) matrix. The two array
+# versions come out about even: batching saves no per-candidate work.
+#
+#   python -m src.benchmarks.bench_sgd --sizes 1000 10000 100000 1000000
+
+
+def build_catalog(num_resources, rng):
+    return pd.DataFrame({
+        "resource": [f"/resource_{i}.dat" for i in range(num_resources)],
+        "frequency": rng.zipf(1.5, num_resources).clip(1, 1000),
+        "size": rng.integers(5, 50000, num_resources).astype(np.float64),
+    })
+
+
+def legacy_sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+# One retry of the previous pandas optimizer: update, enforce capacity, cleanup
+def legacy_retry(df, learning_rate, capacity):
+    df = df.copy()
+    df["theta"] = np.random.uniform(-0.1, 0.1, len(df))
+    for _ in range(SGD_ITERATIONS):
+        df["gradient"] = df["frequency"] - LAMBDA * df["size"]
+        df["theta"] += learning_rate * df["gradient"]
+        df["theta"] = np.clip(df["theta"], -THETA_CLIP, THETA_CLIP)
+        df["cache_prob"] = legacy_sigmoid(df["theta"])
+
+    total_usage = df["size"].dot(df["cache_prob"])
+    if total_usage > capacity:
+        df["cache_prob"] *= capacity / total_usage
+
+    df = df.copy()
+    df.sort_values("cache_prob", ascending=False, inplace=True)
+    cumulative_size = 0
+    selected = []
+    for index, row in df.iterrows():
+        if cumulative_size + row["size"] <= capacity:
+            selected.append(1)
+            cumulative_size += row["size"]
+        else:
+            selected.append(0)
+    df["cached"] = selected
+    df.sort_index(inplace=True)
+    return df
+
+
+# Evaluate every learning rate in the grid one after another with the array core
+def sequential_grid(frequency, size, capacity, learning_rates, seed):
+    rng = np.random.default_rng(seed)
+    grad = sgd_core.gradient(frequency, size)
+    for learning_rate in learning_rates:
+        theta0 = rng.uniform(-0.1, 0.1, len(size))
+        cache_prob = sgd_core.update_cache_probabilities(grad, theta0, learning_rate)
+        sgd_core.enforce_capacity(cache_prob, size, capacity)
+        sgd_core.cleanup_selection(cache_prob, size, capacity)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SGD optimizer benchmark")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--legacy-max-size", type=int, default=10000)
+    parser.add_argument("--candidates", type=int, default=sgd_core.MAX_RETRIES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'resources':>10} {'pandas s/retry':>15} {'array s/retry':>14} {'speedup':>8} "
+          f"{'array full run s':>17} {'retries':>8}")
+    for num_resources in args.sizes:
+        rng = np.random.default_rng(args.seed)
+        df = build_catalog(num_resources, rng)
+        capacity = int(df["size"].sum() * 0.1)
+        frequency = df["frequency"].to_numpy(dtype=np.float64)
+        size = df["size"].to_numpy(dtype=np.float64)
+
+        start = time.perf_counter()
+        sgd_core.adaptive_retry_optimizer(frequency, size, capacity, max_retries=1,
+                                          rng=np.random.default_rng(args.seed))
+        array_retry = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, _, retries, _ = sgd_core.adaptive_retry_optimizer(frequency, size, capacity,
+                                                             rng=np.random.default_rng(args.seed))
+        array_full = time.perf_counter() - start
+
+        if num_resources <= args.legacy_max_size:
+            start = time.perf_counter()
+            legacy_retry(df, sgd_core.ETA_INITIAL, capacity)
+            legacy = time.perf_counter() - start
+            legacy_text = f"{legacy:15.4f}"
+            speedup_text = f"{legacy / array_retry:7.0f}x"
+        else:
+            legacy_text = f"{'-':>15}"
+            speedup_text = f"{'-':>8}"
+
+        print(f"{num_resources:>10} {legacy_text} {array_retry:14.4f} {speedup_text} "
+              f"{array_full:17.4f} {retries:>8}")
+
+    learning_rates = sgd_core.learning_rate_grid(args.candidates)
+    print(f"\nLearning-rate grid of {args.candidates} candidates")
+    print(f"{'resources':>10} {'pandas sequential s':>20} {'array sequential s':>19} {'batched s':>10}")
+    for num_resources in args.sizes:
+        rng = np.random.default_rng(args.seed)
+        df = build_catalog(num_resources, rng)
+        capacity = int(df["size"].sum() * 0.1)
+        frequency = df["frequency"].to_numpy(dtype=np.float64)
+        size = df["size"].to_numpy(dtype=np.float64)
+
+        start = time.perf_counter()
+        sequential_grid(frequency, size, capacity, learning_rates, args.seed)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sgd_core.batched_retry_optimizer(frequency, size, capacity, learning_rates, seed=args.seed)
+        batched = time.perf_counter() - start
+
+        if num_resources <= args.legacy_max_size:
+            # Extrapolated from one pandas retry; running the whole grid takes minutes
+            start = time.perf_counter()
+            legacy_retry(df, sgd_core.ETA_INITIAL, capacity)
+            legacy_text = f"{(time.perf_counter() - start) * len(learning_rates):19.2f}~"
+        else:
+            legacy_text = f"{'-':>20}"
+
+        print(f"{num_resources:>10} {legacy_text} {sequential:19.4f} {batched:10.4f}")
+
+
+if __name__ == "__main__":
+    main()
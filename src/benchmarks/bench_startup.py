@@ -0,0 +1,64 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.cli import STAGES
+
+# Benchmark: startup cost of every stage, measured in fresh interpreters.
+#
+# For each stage module it reports the best wall time (of --repeat runs) of a
+# process that only imports the module, the same minus a bare `python -c pass`
+# (the import cost itself), and which heavy libraries the import pulled in. The
+# last column is `python -m src.cli <stage> --help`: argument parsing through
+# the CLI, which imports the stage module but never runs it. Processes run in an
+# empty temporary directory, so a module that touches files on import fails.
+#
+#   python -m src.benchmarks.bench_startup
+#   python -m src.benchmarks.bench_startup --repeat 10 --stages sgd simulate serve
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HEAVY_MODULES = ("pandas", "matplotlib.pyplot", "flask", "requests")
+IMPORT_SNIPPET = ("import sys, json; import {module}; "
+                  "print(json.dumps([name for name in {heavy!r} if name in sys.modules]))")
+
+
+def best_time(command, repeat, workdir):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    best, output = float("inf"), ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(command)} failed:\n{result.stderr}")
+        best, output = min(best, elapsed), result.stdout
+    return best, output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startup time of every pipeline stage")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        interpreter, _ = best_time([sys.executable, "-c", "pass"], args.repeat, workdir)
+        cli, _ = best_time([sys.executable, "-m", "src.cli", "--help"], args.repeat, workdir)
+        print(f"Bare interpreter: {interpreter * 1e3:.0f} ms, `src.cli --help`: {cli * 1e3:.0f} ms")
+        print(f"{'stage':<11} {'module':<38} {'process':>9} {'import':>9} {'cli help':>9}  loads")
+        for stage in args.stages:
+            module = STAGES[stage][0]
+            snippet = IMPORT_SNIPPET.format(module=module, heavy=HEAVY_MODULES)
+            process, output = best_time([sys.executable, "-c", snippet], args.repeat, workdir)
+            help_time, _ = best_time([sys.executable, "-m", "src.cli", stage, "--help"], args.repeat, workdir)
+            loads = ", ".join(json.loads(output)) or "-"
+            print(f"{stage:<11} {module:<38} {process * 1e3:>7.0f}ms {(process - interpreter) * 1e3:>7.0f}ms "
+                  f"{help_time * 1e3:>7.0f}ms  {loads}")
+
+
+if __name__ == "__main__":
+    main()
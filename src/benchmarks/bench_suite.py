@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.data.workload_generator import BoundedZipf, generate_catalog, resource_names
+from src.models import cache_baselines
+from src.models.cache_config import cache_capacity
+from src.models.sgd_core import adaptive_retry_optimizer, batched_retry_optimizer, cleanup_selection
+
+# Benchmark suite: the baselines and the SGD optimizer across catalog sizes, offline
+# on seeded synthetic workloads, with regression checks against a stored baseline.
+#
+# Each catalog comes from workload_generator (category sizes and latencies, bounded
+# Zipf popularity) with --requests-per-object requests per object (at most
+# --max-requests). For every method and size it records:
+#
+#   runtime_s        best of as many runs as fit in --min-time (at least one)
+#   peak_memory_mb   tracemalloc peak during one extra run (Python + NumPy allocations)
+#   hit_rate, byte_hit_rate, latency_reduction, cache_usage
+#                    of the final selection against the catalog's request counts, in %
+#                    (the analyze_results.py metrics)
+#
+# Results go to --output as JSON. With a baseline file (default: the one next to
+# this module) every (method, size) is compared against it: runtime or peak memory
+# more than --tolerance above the baseline, or any change in the hit metrics (the
+# workloads and methods are deterministic for a seed), is reported as a regression
+# and the exit status is 1. Runtime baselines are only comparable on the machine
+# that recorded them; refresh them there with --save-baseline.
+#
+#   python -m src.benchmarks.bench_suite
+#   python -m src.benchmarks.bench_suite --sizes 100 1000 10000 --methods LRU LFU
+#   python -m src.benchmarks.bench_suite --save-baseline
+
+SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+REQUESTS_PER_OBJECT = 10
+MAX_REQUESTS = 5_000_000
+MIN_TIME = 1.0
+TOLERANCE = 0.25
+HIT_TOLERANCE = 1e-6  # percentage points
+OUTPUT_FILE = "result_data/benchmark_suite.json"
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "suite_baseline.json")
+HIT_METRICS = ("hit_rate", "byte_hit_rate", "latency_reduction", "cache_usage")
+
+
+# Seeded catalog DataFrame (the processed_request_data.csv layout) plus its trace
+# of row positions
+def build_workload(objects, requests, seed):
+    rng = np.random.default_rng(seed)
+    category, size, latency = generate_catalog(objects, rng)
+    trace = BoundedZipf(objects).sample(rng, requests)
+    df = pd.DataFrame({"resource": resource_names(category).tolist(),
+                       "frequency": np.bincount(trace, minlength=objects),
+                       "size": size, "latency": latency})
+    return df, trace
+
+
+def run_lru(df, capacity, trace, seed):
+    return cache_baselines.lru_caching(df, capacity, trace)
+
+
+def run_lfu(df, capacity, trace, seed):
+    return cache_baselines.lfu_caching(df, capacity, trace)
+
+
+def run_knapsack(df, capacity, trace, seed):
+    return cache_baselines.knapsack_caching(df.copy(), capacity)
+
+
+def run_sgd(df, capacity, trace, seed):
+    frequency = df["frequency"].to_numpy(dtype=np.float64)
+    size = df["size"].to_numpy(dtype=np.float64)
+    cache_prob = adaptive_retry_optimizer(frequency, size, capacity, rng=np.random.default_rng(seed))[0]
+    return cleanup_selection(cache_prob, size, capacity)
+
+
+def run_sgd_batched(df, capacity, trace, seed):
+    frequency = df["frequency"].to_numpy(dtype=np.float64)
+    size = df["size"].to_numpy(dtype=np.float64)
+    cache_prob = batched_retry_optimizer(frequency, size, capacity, seed=seed)[0]
+    return cleanup_selection(cache_prob, size, capacity)
+
+
+METHODS = {
+    "LRU": run_lru,
+    "LFU": run_lfu,
+    "Greedy Knapsack": run_knapsack,
+    "SGD-Based": run_sgd,
+    "SGD-Based (batched)": run_sgd_batched,
+}
+
+
+# Boolean row mask of a selection (resource names, or a 0/1 array per row)
+def selection_mask(df, selection):
+    if isinstance(selection, np.ndarray) and len(selection) == len(df):
+        return selection.astype(bool)
+    rows = pd.Index(df["resource"]).get_indexer(selection)
+    mask = np.zeros(len(df), dtype=bool)
+    mask[rows[rows >= 0]] = True
+    return mask
+
+
+def hit_metrics(df, selection, capacity):
+    cached = selection_mask(df, selection)
+    frequency = df["frequency"].to_numpy(dtype=np.float64)
+    size = df["size"].to_numpy(dtype=np.float64)
+    latency = frequency * df["latency"].to_numpy(dtype=np.float64)
+    return {
+        "hit_rate": frequency[cached].sum() / frequency.sum() * 100,
+        "byte_hit_rate": (frequency * size)[cached].sum() / (frequency * size).sum() * 100,
+        "latency_reduction": latency[cached].sum() / latency.sum() * 100,
+        "cache_usage": size[cached].sum() / capacity * 100,
+    }
+
+
+def measure(method, df, capacity, trace, seed, min_time=MIN_TIME):
+    function = METHODS[method]
+    times = []
+    while not times or (sum(times) < min_time and len(times) < 100):
+        start = time.perf_counter()
+        selection = function(df, capacity, trace, seed)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function(df, capacity, trace, seed)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"runtime_s": min(times), "runs": len(times), "peak_memory_mb": peak / 2**20,
+            **hit_metrics(df, selection, capacity)}
+
+
+def environment():
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count()}
+
+
+def run(sizes=SIZES, methods=tuple(METHODS), seed=0, requests_per_object=REQUESTS_PER_OBJECT,
+        max_requests=MAX_REQUESTS, min_time=MIN_TIME):
+    results = []
+    for objects in sizes:
+        requests = min(objects * requests_per_object, max_requests)
+        df, trace = build_workload(objects, requests, seed)
+        capacity = cache_capacity(df["size"].sum())
+        for method in methods:
+            result = measure(method, df, capacity, trace, seed, min_time)
+            results.append({"method": method, "objects": objects, "requests": requests, **result})
+            print(f"{method:<20} {objects:>9} {result['runtime_s']:>10.4f} s {result['peak_memory_mb']:>9.1f} MB "
+                  f"{result['hit_rate']:>7.2f}% hits")
+            sys.stdout.flush()
+    return {"environment": environment(), "seed": seed, "requests_per_object": requests_per_object,
+            "max_requests": max_requests, "results": results}
+
+
+# Regressions of `report` against `baseline`: one message per (method, size)
+# whose runtime or peak memory grew by more than `tolerance`, or whose hit
+# metrics changed
+def compare(report, baseline, tolerance=TOLERANCE):
+    if (report["seed"], report["requests_per_object"], report["max_requests"]) != \
+            (baseline["seed"], baseline["requests_per_object"], baseline["max_requests"]):
+        return ["workload settings differ from the baseline (seed / requests); nothing compared"]
+    previous = {(entry["method"], entry["objects"]): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in report["results"]:
+        old = previous.get((entry["method"], entry["objects"]))
+        if old is None:
+            continue
+        label = f"{entry['method']} @ {entry['objects']}"
+        for field in ("runtime_s", "peak_memory_mb"):
+            if entry[field] > old[field] * (1 + tolerance):
+                regressions.append(f"{label}: {field} {old[field]:.4g} -> {entry[field]:.4g} "
+                                   f"(+{(entry[field] / old[field] - 1) * 100:.0f}%)")
+        for field in HIT_METRICS:
+            if abs(entry[field] - old[field]) > HIT_TOLERANCE:
+                regressions.append(f"{label}: {field} {old[field]:.4f} -> {entry[field]:.4f}")
+    return regressions
+
+
+def write_json(path, payload):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seeded benchmark suite with baseline regression checks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="catalog sizes (objects)")
+    parser.add_argument("--methods", nargs="+", choices=list(METHODS), default=list(METHODS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests-per-object", type=int, default=REQUESTS_PER_OBJECT)
+    parser.add_argument("--max-requests", type=int, default=MAX_REQUESTS)
+    parser.add_argument("--min-time", type=float, default=MIN_TIME,
+                        help="repeat each measurement until this many seconds have run")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="allowed relative runtime / memory growth over the baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args()
+
+    print(f"{'method':<20} {'objects':>9} {'runtime':>12} {'peak mem':>12} {'hit rate':>12}")
+    report = run(args.sizes, args.methods, args.seed, args.requests_per_object, args.max_requests,
+                 args.min_time)
+    write_json(args.output, report)
+    print(f"Results saved to {args.output}")
+
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print(f"Baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return
+    with open(args.baseline) as f:
+        regressions = compare(report, json.load(f), args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+        for message in regressions:
+            print(f"  {message}")
+        sys.exit(1)
+    print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
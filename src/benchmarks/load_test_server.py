@@ -0,0 +1,146 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+# Load test: how many concurrent simulated fetches each origin mode sustains.
+#
+# Every resource in the generated catalog has the same fixed latency, so an ideal
+# server finishes a wave of N concurrent requests in about one latency period no
+# matter how large N is. Effective concurrency = throughput x latency; where it
+# stops tracking the offered concurrency is the server's ceiling.
+#
+#   python -m src.benchmarks.load_test_server --levels 10 100 1000 2000
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Same settings as server.py's __main__ (HTTP/1.1 keep-alive, threaded) minus the reloader
+FLASK_COMMAND = (
+    "from werkzeug.serving import WSGIRequestHandler; "
+    "WSGIRequestHandler.protocol_version = 'HTTP/1.1'; "
+    "from src.server.server import app; app.run(port={port}, threaded=True)"
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, port, workdir):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    if mode == "flask":
+        command = [sys.executable, "-c", FLASK_COMMAND.format(port=port)]
+    else:
+        command = [sys.executable, "-m", "src.server.async_server", "--port", str(port)]
+    return subprocess.Popen(command, cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_for_port(port, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+async def connect(port, timeout):
+    return await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+
+
+# One virtual client: sequential GETs over a keep-alive connection, reconnecting
+# whenever the server answers with `Connection: close`
+async def client(port, paths, timeout, stats):
+    writer = None
+    try:
+        for path in paths:
+            if writer is None:
+                reader, writer = await connect(port, timeout)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+            length = 0
+            close = False
+            for line in head.split(b"\r\n")[1:]:
+                name, _, value = line.partition(b":")
+                name = name.strip().lower()
+                if name == b"content-length":
+                    length = int(value)
+                elif name == b"connection":
+                    close = value.strip().lower() == b"close"
+            await reader.readexactly(length)
+            if head.split(b" ", 2)[1] == b"200":
+                stats["ok"] += 1
+            else:
+                stats["errors"] += 1
+            if close:
+                writer.close()
+                writer = None
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+        stats["errors"] += 1
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def run_level(port, concurrency, requests_per_client, paths, timeout):
+    stats = {"ok": 0, "errors": 0}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(port, [paths[(c + r) % len(paths)] for r in range(requests_per_client)], timeout, stats)
+        for c in range(concurrency)
+    ))
+    return stats, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Origin server concurrency load test")
+    parser.add_argument("--modes", nargs="+", default=["flask", "async"], choices=["flask", "async"])
+    parser.add_argument("--levels", nargs="+", type=int, default=[10, 100, 500, 1000, 2000])
+    parser.add_argument("--requests-per-client", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--resources", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    paths = [f"/resource_{i}.dat" for i in range(1, args.resources + 1)]
+    resources = {path: {"size": 10, "latency": args.latency} for path in paths}
+
+    print(f"{'mode':>6} {'clients':>8} {'ok':>7} {'errors':>7} {'seconds':>8} "
+          f"{'req/s':>9} {'effective concurrency':>22}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "interim_data"))
+        with open(os.path.join(workdir, "interim_data", "web_resources.json"), "w") as f:
+            json.dump(resources, f)
+
+        for mode in args.modes:
+            port = free_port()
+            process = start_server(mode, port, workdir)
+            try:
+                if not wait_for_port(port):
+                    print(f"{mode} server did not start")
+                    continue
+                for concurrency in args.levels:
+                    stats, elapsed = asyncio.run(
+                        run_level(port, concurrency, args.requests_per_client, paths, args.timeout)
+                    )
+                    throughput = stats["ok"] / elapsed
+                    print(f"{mode:>6} {concurrency:>8} {stats['ok']:>7} {stats['errors']:>7} "
+                          f"{elapsed:>8.2f} {throughput:>9.0f} {throughput * args.latency:>22.0f}")
+            finally:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == "__main__":
+    main()
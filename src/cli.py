@@ -0,0 +1,59 @@
+import argparse
+import importlib
+import sys
+
+# Single entry point for every stage. Each subcommand forwards its arguments to
+# the stage module's main(argv), so `python -m src.cli sgd --seed 0` is the same
+# as `python -m src.models.sgd_cache_optimizer --seed 0`.
+#
+# Only the chosen stage's module is imported, after the arguments are parsed:
+# `--help`, the servers and the load generator never load pandas or matplotlib,
+# `serve` runs the asyncio origin so flask is loaded only by the `flask` stage,
+# and the data stages load pandas only once they run (see bench_startup.py for
+# the startup time of each).
+#
+#   python -m src.cli --help
+#   python -m src.cli simulate --mode closed --clients 5000
+#   python -m src.cli preprocess --seed 0 --root interim_data/runs/iteration_001
+#   python -m src.cli pipeline --iterations 50 --workers 4 --seed 0
+
+# Subcommand -> (module with a main(argv=None), description)
+STAGES = {
+    "serve": ("src.server.async_server", "origin server (asyncio)"),
+    "flask": ("src.server.server", "Flask origin server (loads flask)"),
+    "proxy": ("src.server.cache_proxy", "caching proxy in front of the origin"),
+    "simulate": ("src.pipeline.simulate_requests", "simulate client requests"),
+    "load": ("src.pipeline.load_generator", "asyncio load generator"),
+    "workload": ("src.data.workload_generator", "synthetic catalog and trace"),
+    "preprocess": ("src.data.data_preprocessing", "assign sizes and latencies"),
+    "sgd": ("src.models.sgd_cache_optimizer", "SGD cache optimizer"),
+    "baselines": ("src.models.cache_baselines", "LRU, LFU and greedy knapsack baselines"),
+    "analyze": ("src.analysis.analyze_results", "score every method's selection"),
+    "summary": ("src.analysis.metric_summary_analysis", "summary CSVs and graphs of all iterations"),
+    "replay": ("src.analysis.trace_replay", "replay the request trace through every policy"),
+    "mrc": ("src.analysis.miss_ratio_curve", "miss-ratio curves"),
+    "pipeline": ("src.pipeline.pipeline_automation", "the whole pipeline over many iterations"),
+}
+
+
+def stage_list():
+    return "stages:\n" + "\n".join(f"  {name:<12} {description}" for name, (_, description) in STAGES.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli", description="Run one stage of the web caching pipeline",
+        epilog=stage_list() + "\n\n`python -m src.cli <stage> --help` lists a stage's options.",
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("stage", choices=list(STAGES), metavar="stage", help="one of the stages below")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="arguments of the stage")
+    args = parser.parse_args(argv)
+
+    module = importlib.import_module(STAGES[args.stage][0])
+    # The stage's own usage and error messages name the subcommand
+    sys.argv = [f"python -m src.cli {args.stage}", *args.args]
+    module.main(args.args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,158 @@
-import pandas as pd
-import random
+import numpy as np
+import argparse
+import json
 import os
 
-# Create folders
-os.makedirs("result_data", exist_ok=True)
-os.makedirs("result_visuals", exist_ok=True)
-os.makedirs("logs", exist_ok=True)
-os.makedirs("interim_data", exist_ok=True)
-
-# Load request data
-df = pd.read_csv("interim_data/request_data.csv")
-
-# Generate realistic size and latency dynamically based on resource categories
-def assign_size_and_latency(resource):
-    if "small_images" in resource:
-        size = random.randint(10, 50)  # Small images (KB)
-        latency = round(random.uniform(0.05, 0.2), 2)  # Fast retrieval
-    elif "large_images" in resource:
-        size = random.randint(100, 500)  # Large images (KB)
-        latency = round(random.uniform(0.2, 0.5), 2)  # Medium latency
-    elif "videos" in resource:
-        size = random.randint(1000, 50000)  # Video files (KB)
-        latency = round(random.uniform(0.5, 2.0), 2)  # High latency
-    elif "scripts" in resource:
-        size = random.randint(5, 30)  # JavaScript files (KB)
-        latency = round(random.uniform(0.03, 0.1), 2)  # Very fast retrieval
-    elif "css" in resource:
-        size = random.randint(5, 30)  # CSS files (KB)
-        latency = round(random.uniform(0.03, 0.1), 2)  # Very fast retrieval
+from src.data.resource_table import ResourceTable, table_path
+from src.data.trace_format import TraceReader, trace_exists
+from src.models.checkpoint import CheckpointStore, align
+
+# pandas is imported inside the functions that build DataFrames, so importing the
+# category tables (workload_generator does) stays cheap.
+
+# Size (KB) and latency (s) ranges per resource category. A resource belongs to
+# the first category whose name appears in its path; anything else is DEFAULT.
+CATEGORY_RANGES = {
+    "small_images": {"size_range": (10, 50), "latency_range": (0.05, 0.2)},   # Fast retrieval
+    "large_images": {"size_range": (100, 500), "latency_range": (0.2, 0.5)},  # Medium latency
+    "videos": {"size_range": (1000, 50000), "latency_range": (0.5, 2.0)},     # High latency
+    "scripts": {"size_range": (5, 30), "latency_range": (0.03, 0.1)},         # Very fast retrieval
+    "css": {"size_range": (5, 30), "latency_range": (0.03, 0.1)},             # Very fast retrieval
+}
+DEFAULT_RANGES = {"size_range": (10, 500), "latency_range": (0.1, 0.5)}      # Default fallback
+CATEGORY_NAMES = list(CATEGORY_RANGES) + ["other"]
+
+# Per-category bounds as arrays indexed by category code
+def _bounds(field):
+    ranges = [CATEGORY_RANGES[name][field] for name in CATEGORY_RANGES] + [DEFAULT_RANGES[field]]
+    return np.array([low for low, _ in ranges]), np.array([high for _, high in ranges])
+
+# Category code of every resource (index into CATEGORY_NAMES) by vectorized
+# substring search, one category at a time in priority order over the rows not
+# matched yet (the if/elif order of the original per-row checks)
+def category_codes(resources):
+    import pandas as pd
+
+    resources = pd.Series(resources).reset_index(drop=True)
+    codes = np.full(len(resources), len(CATEGORY_RANGES), dtype=np.int8)
+    remaining = np.arange(len(resources))
+    for code, name in enumerate(CATEGORY_RANGES):
+        matched = resources.iloc[remaining].str.contains(name, regex=False).to_numpy(dtype=bool)
+        codes[remaining[matched]] = code
+        remaining = remaining[~matched]
+        if not remaining.size:
+            break
+    return codes
+
+# Draw sizes (KB) and latencies (s) for category codes in one vectorized pass
+def draw_size_and_latency(codes, rng):
+    size_low, size_high = _bounds("size_range")
+    latency_low, latency_high = _bounds("latency_range")
+    size = rng.integers(size_low[codes], size_high[codes] + 1)
+    latency = np.round(rng.uniform(latency_low[codes], latency_high[codes]), 2)
+    return size, latency
+
+# Size and latency of each resource from the origin's catalog (web_resources.json);
+# returns (size, latency, found mask), NaN where the catalog has no entry
+def catalog_values(resources, resource_file):
+    import pandas as pd
+
+    with open(resource_file, "r") as f:
+        catalog = pd.DataFrame.from_dict(json.load(f), orient="index")
+    rows = catalog.index.get_indexer(pd.Index(resources))
+    found = rows >= 0
+    size = np.full(len(rows), np.nan)
+    latency = np.full(len(rows), np.nan)
+    size[found] = catalog["size"].to_numpy(dtype=np.float64)[rows[found]]
+    latency[found] = catalog["latency"].to_numpy(dtype=np.float64)[rows[found]]
+    return size, latency, found
+
+# Preprocess root/interim_data/request_data.csv into processed_request_data.csv
+# and the resource table the later stages attach to (see resource_table.py).
+# source="random" draws every size and latency from the category ranges (the
+# original behaviour); source="catalog" takes them from the origin's
+# web_resources.json so the optimizer sees the sizes the server actually serves,
+# drawing only resources the catalog does not list. With checkpoint_dir,
+# resources seen by an earlier run keep the size and latency from the
+# "resource_stats" checkpoint (only new resources are drawn), and the
+# checkpoint's cumulative request counts are updated
+def run(root=".", seed=None, checkpoint_dir=None, source="random"):
+    import pandas as pd
+
+    interim_dir = os.path.join(root, "interim_data")
+    os.makedirs(interim_dir, exist_ok=True)
+
+    # Load request data (or aggregate it from the per-request trace)
+    request_file = os.path.join(interim_dir, "request_data.csv")
+    trace_path = os.path.join(interim_dir, "request_trace")
+    if not os.path.exists(request_file) and trace_exists(trace_path):
+        reader = TraceReader(trace_path)
+        df = pd.DataFrame({"resource": reader.resources, "frequency": reader.frequencies()})
     else:
-        size = random.randint(10, 500)  # Default fallback
-        latency = round(random.uniform(0.1, 0.5), 2)
+        df = pd.read_csv(request_file)
+
+    # Category codes once, then sizes and latencies for all rows at once
+    rng = np.random.default_rng(seed)
+    codes = category_codes(df["resource"])
+    size, latency = draw_size_and_latency(codes, rng)
+    df["size"] = size
+    df["latency"] = latency
+
+    resource_file = os.path.join(interim_dir, "web_resources.json")
+    if source == "catalog" and os.path.exists(resource_file):
+        catalog_size, catalog_latency, found = catalog_values(df["resource"], resource_file)
+        df.loc[found, "size"] = catalog_size[found].astype(np.int64)
+        df.loc[found, "latency"] = catalog_latency[found]
+        print(f"Took size and latency of {int(found.sum())}/{len(df)} resources from {resource_file}")
+    elif source == "catalog":
+        print(f"No catalog at {resource_file}; drawing sizes and latencies")
+    elif os.path.exists(resource_file):
+        print(f"Sizes and latencies drawn independently of {resource_file} (source='catalog' reuses it)")
+
+    if checkpoint_dir:
+        store = CheckpointStore(checkpoint_dir)
+        checkpoint = store.load("resource_stats")
+        total = df["frequency"].to_numpy(dtype=np.float64)
+        if checkpoint is not None:
+            arrays, metadata = checkpoint
+            size, found = align(arrays, df["resource"], "size")
+            latency, _ = align(arrays, df["resource"], "latency")
+            previous, _ = align(arrays, df["resource"], "total_frequency", fill=0.0)
+            df.loc[found, "size"] = size[found].astype(np.int64)
+            df.loc[found, "latency"] = latency[found]
+            total = total + previous
+            print(f"Reused size and latency of {int(found.sum())}/{len(df)} resources "
+                  f"from resource_stats step {metadata['step']}")
+        stats = {"resource": df["resource"].to_numpy(dtype=str),
+                 "size": df["size"].to_numpy(dtype=np.float64),
+                 "latency": df["latency"].to_numpy(dtype=np.float64),
+                 "total_frequency": total}
+        if checkpoint is not None:
+            # Keep resources this run did not request
+            missing = ~np.isin(arrays["resource"], stats["resource"])
+            stats = {field: np.concatenate([values, arrays[field][missing]]) for field, values in stats.items()}
+        store.save("resource_stats", stats)
+
+    # Save the updated dataset
+    processed_file = os.path.join(interim_dir, "processed_request_data.csv")
+    df.to_csv(processed_file, index=False)
+    print(f"Processed dataset saved to {processed_file}")
+
+    # Publish the same rows as a memory-mappable resource table for the later stages
+    ResourceTable.from_frame(df).save(table_path(interim_dir))
+    return df
+
 
-    return pd.Series([size, latency])
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Assign sizes and latencies to the requested resources")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--checkpoint-dir", default=None, help="reuse / save per-resource statistics here")
+    parser.add_argument("--source", choices=["random", "catalog"], default="random",
+                        help="draw sizes/latencies, or take them from web_resources.json")
+    parser.add_argument("--root", default=".", help="run directory (holds interim_data/)")
+    args = parser.parse_args(argv)
+    run(args.root, seed=args.seed, checkpoint_dir=args.checkpoint_dir, source=args.source)
 
-# Apply function to dynamically assign sizes and latencies
-df[["size", "latency"]] = df["resource"].apply(assign_size_and_latency)
 
-# Save the updated dataset
-df.to_csv("interim_data/processed_request_data.csv", index=False)
-print("Processed dataset saved to interim_data/processed_request_data.csv")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
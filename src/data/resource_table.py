@@ -0,0 +1,234 @@
+import json
+import mmap
+import os
+
+import numpy as np
+
+# Compact, array-backed table of a run's resources.
+#
+# Resource names are interned once: a resource's id is its row, and everything
+# else is a typed NumPy column indexed by id (the processed_request_data.csv
+# columns). Cache contents become boolean masks over the rows, so scoring a
+# selection is a masked sum instead of a string comparison per row:
+#
+#   table = ResourceTable.from_frame(df)
+#   cached = table.mask(cache_results["LRU"])    # names -> bool per row
+#   table.frequency[cached].sum()
+#
+# data_preprocessing publishes the table once as a memory-mapped file next to
+# the CSV, and the later stages of the same run attach to it zero-copy: read-only
+# views into the file's pages, which every process that opens it shares through
+# the page cache. Each pipeline iteration has its own catalog and so its own
+# table; nothing is shared between iterations.
+#
+#   table.save("interim_data/resource_table")       # .bin + .json sidecar
+#   table = ResourceTable.open("interim_data/resource_table")
+#
+# Layout: the columns back to back, each aligned to ALIGNMENT bytes; names are
+# fixed-width UTF-8 bytes. The sidecar records the count and each column's dtype
+# and offset.
+
+TABLE_VERSION = 1
+TABLE_FILE = "interim_data/resource_table"
+COLUMNS = ("frequency", "size", "latency")
+ALIGNMENT = 64
+INT32 = np.iinfo(np.int32)
+
+
+class ResourceTableError(Exception):
+    pass
+
+
+# Data and sidecar paths for a table given by base name (or by either file)
+def _paths(path):
+    base, extension = os.path.splitext(path)
+    if extension not in (".bin", ".json"):
+        base = path
+    return base + ".bin", base + ".json"
+
+
+# (field, dtype, offset) of every column and the bytes they take together
+def _layout(columns):
+    fields = []
+    offset = 0
+    for name, values in columns.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        fields.append([name, values.dtype.str, offset])
+        offset += values.nbytes
+    return fields, offset
+
+
+# Read-only column views into a buffer laid out as `fields`
+def _views(buffer, fields, count):
+    views = {}
+    for name, dtype, offset in fields:
+        values = np.frombuffer(buffer, dtype=np.dtype(dtype), count=count, offset=offset)
+        values.flags.writeable = False
+        views[name] = values
+    return views
+
+
+# Integer columns in 32 bits when every value fits (NumPy sums still accumulate
+# in 64 bits; cast before multiplying two of them). Floats are kept as they are,
+# so scores stay exact.
+def _compact(values):
+    values = np.asarray(values)
+    if values.dtype.kind in "iu" and values.dtype.itemsize > 4 and (
+            not values.size or (values.min() >= INT32.min and values.max() <= INT32.max)):
+        return values.astype(np.int32)
+    return values
+
+
+# Inverse of _compact for DataFrame consumers (the dtypes read_csv gives)
+def _widen(values):
+    return values.astype(np.int64) if values.dtype.kind in "iu" else values
+
+
+def _check(meta, source):
+    if meta.get("version") != TABLE_VERSION:
+        raise ResourceTableError(f"Unsupported resource table version {meta.get('version')!r} in {source}")
+
+
+class ResourceTable:
+    def __init__(self, resource, frequency, size, latency, owner=None):
+        self.resource = resource    # fixed-width UTF-8 names; id = row
+        self.frequency = frequency
+        self.size = size
+        self.latency = latency
+        self.owner = owner          # mmap the columns are views into (None: own arrays)
+        self._names = None
+        self._ids = None
+
+    @classmethod
+    def from_arrays(cls, resources, frequency, size, latency):
+        resource = np.asarray(resources)
+        if resource.dtype.kind != "S":
+            resource = np.array([name.encode("utf-8") for name in resource.astype(str).tolist()],
+                                dtype=np.bytes_)
+        return cls(resource, _compact(frequency), _compact(size), np.asarray(latency))
+
+    # Table of a processed_request_data.csv-style DataFrame (dtypes kept per column)
+    @classmethod
+    def from_frame(cls, df):
+        return cls.from_arrays(df["resource"].to_numpy(dtype=str), df["frequency"].to_numpy(),
+                               df["size"].to_numpy(), df["latency"].to_numpy())
+
+    @classmethod
+    def from_csv(cls, path):
+        import pandas as pd
+
+        return cls.from_frame(pd.read_csv(path))
+
+    def __len__(self):
+        return len(self.resource)
+
+    def columns(self):
+        return {"resource": self.resource, **{name: getattr(self, name) for name in COLUMNS}}
+
+    def nbytes(self):
+        return sum(values.nbytes for values in self.columns().values())
+
+    # Resource names as str (decoded once)
+    def names(self):
+        if self._names is None:
+            self._names = [name.decode("utf-8") for name in self.resource.tolist()]
+        return self._names
+
+    # Ids of `names` (any iterable of str); -1 for names not in the table
+    def ids(self, names):
+        if self._ids is None:
+            self._ids = {name: index for index, name in enumerate(self.names())}
+        lookup = self._ids.get
+        return np.fromiter((lookup(name, -1) for name in names), dtype=np.int64)
+
+    # Boolean mask of the rows named in `names` (e.g. a method's cache contents)
+    def mask(self, names):
+        ids = self.ids(names)
+        cached = np.zeros(len(self), dtype=np.bool_)
+        cached[ids[ids >= 0]] = True
+        return cached
+
+    # Names of the rows set in a boolean mask
+    def select(self, mask):
+        names = self.names()
+        return [names[index] for index in np.flatnonzero(mask)]
+
+    # The table as a DataFrame in the processed_request_data.csv layout (a copy,
+    # so it stays valid and writable after the table is closed)
+    def frame(self):
+        import pandas as pd
+
+        return pd.DataFrame({"resource": self.names(), "frequency": _widen(self.frequency),
+                             "size": _widen(self.size), "latency": self.latency}, copy=True)
+
+    # Write the table as a memory-mappable file (atomically, sidecar last, so a
+    # reader never sees a sidecar describing a half-written data file)
+    def save(self, path=TABLE_FILE):
+        data_path, meta_path = _paths(path)
+        os.makedirs(os.path.dirname(data_path) or ".", exist_ok=True)
+        columns = {name: np.ascontiguousarray(values) for name, values in self.columns().items()}
+        fields, total = _layout(columns)
+        temporary = f"{data_path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            for (name, _, offset) in fields:
+                f.seek(offset)
+                f.write(columns[name].tobytes())
+            f.truncate(total)
+        os.replace(temporary, data_path)
+        meta = {"version": TABLE_VERSION, "count": len(self), "fields": fields}
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+        return data_path
+
+    # Attach a saved table: every column is a read-only view into one shared,
+    # read-only mapping of the data file (nothing is copied or parsed)
+    @classmethod
+    def open(cls, path=TABLE_FILE):
+        data_path, meta_path = _paths(path)
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        _check(meta, meta_path)
+        if os.path.getsize(data_path) == 0:
+            buffer = b""
+        else:
+            with open(data_path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        views = _views(buffer, meta["fields"], meta["count"])
+        return cls(**views, owner=buffer)
+
+    # Drop the views and release the mapping. Views of the columns must not be
+    # held past close() (the mapping cannot be released under them: BufferError);
+    # masked selections and frame() are copies and stay valid.
+    def close(self):
+        owner, self.owner = self.owner, None
+        self.resource = self.frequency = self.size = self.latency = None
+        if isinstance(owner, mmap.mmap):
+            owner.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def table_exists(path=TABLE_FILE):
+    data_path, meta_path = _paths(path)
+    return os.path.exists(data_path) and os.path.exists(meta_path)
+
+
+def table_path(interim_dir):
+    return os.path.join(interim_dir, os.path.basename(TABLE_FILE))
+
+
+# Resource table of a run's interim_data: the one data_preprocessing published,
+# unless processed_request_data.csv is newer (edited or rewritten since), in
+# which case the table is built from the CSV
+def load_table(interim_dir):
+    path = table_path(interim_dir)
+    processed_file = os.path.join(interim_dir, "processed_request_data.csv")
+    if table_exists(path) and (not os.path.exists(processed_file)
+                               or os.path.getmtime(_paths(path)[1]) >= os.path.getmtime(processed_file)):
+        return ResourceTable.open(path)
+    return ResourceTable.from_csv(processed_file)
@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+# Per-request trace in a compact binary columnar-record format.
+#
+# A trace is two files:
+#   <name>.bin   packed little-endian records (TRACE_DTYPE, 22 bytes each),
+#                appended in chunks; memory-mappable with np.memmap
+#   <name>.json  sidecar with the format version, the record dtype, the number
+#                of records and the resource names (resource id = list index)
+#
+# Resource ids are integers, so a trace of millions of requests costs a few tens
+# of MB and every downstream stage can stream it chunk by chunk:
+#
+#   with TraceWriter("interim_data/request_trace", resource_list) as trace:
+#       trace.record(time.time(), client_id, "/videos_51.dat", 200, 0.84)
+#
+#   reader = TraceReader("interim_data/request_trace")
+#   for chunk in reader.iter_chunks():
+#       chunk["resource"], chunk["latency"], ...
+
+TRACE_VERSION = 1
+TRACE_DTYPE = np.dtype([
+    ("timestamp", "<f8"),  # seconds since the epoch at request start
+    ("client", "<u4"),
+    ("resource", "<u4"),   # index into the sidecar's resource list
+    ("status", "<u2"),     # HTTP status, 0 for a failed request
+    ("latency", "<f4"),    # seconds until the response was complete
+])
+TRACE_FILE = "interim_data/request_trace"
+CHUNK_SIZE = 1 << 16
+CATALOG_SUFFIX = ".catalog.npz"  # size/latency arrays workload_generator saves next to its traces
+
+
+# Data and sidecar paths for a trace given by base name (or by either file)
+def _paths(path):
+    base, extension = os.path.splitext(path)
+    if extension not in (".bin", ".json"):
+        base = path
+    return base + ".bin", base + ".json"
+
+
+# Catalog arrays belonging to a trace (see workload_generator.py)
+def catalog_path(trace_path):
+    return os.path.splitext(_paths(trace_path)[0])[0] + CATALOG_SUFFIX
+
+
+# Append-only trace writer. Records are buffered in a chunk_size array and
+# written a chunk at a time; safe to call from several threads.
+class TraceWriter:
+    def __init__(self, path, resources, chunk_size=CHUNK_SIZE):
+        self.data_path, self.meta_path = _paths(path)
+        # A NumPy array of names is kept as is (million-object catalogs)
+        self.resources = resources if isinstance(resources, np.ndarray) else list(resources)
+        self._ids = None
+        self.count = 0
+        self._buffer = np.zeros(chunk_size, dtype=TRACE_DTYPE)
+        self._pending = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.data_path) or ".", exist_ok=True)
+        self._file = open(self.data_path, "wb")
+        # A catalog saved for the trace being replaced no longer matches its ids;
+        # a generator writing a catalog saves it after the trace is closed
+        try:
+            os.remove(catalog_path(path))
+        except FileNotFoundError:
+            pass
+
+    def _flush(self):
+        if self._pending:
+            self._file.write(self._buffer[:self._pending].tobytes())
+            self.count += self._pending
+            self._pending = 0
+
+    # Resource name -> id, built on first use (only record() needs it)
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = {name: index for index, name in enumerate(self.resources)}
+        return self._ids
+
+    # Record one request by resource name
+    def record(self, timestamp, client, resource, status, latency):
+        self.append(timestamp, client, self.ids[resource], status, latency)
+
+    # Record one request by resource id
+    def append(self, timestamp, client, resource_id, status, latency):
+        with self._lock:
+            self._buffer[self._pending] = (timestamp, client, resource_id, status, latency)
+            self._pending += 1
+            if self._pending == len(self._buffer):
+                self._flush()
+
+    # Record a block of requests given as a TRACE_DTYPE array
+    def extend(self, records):
+        with self._lock:
+            self._flush()
+            self._file.write(np.ascontiguousarray(records, dtype=TRACE_DTYPE).tobytes())
+            self.count += len(records)
+
+    # Flush the last chunk and publish the sidecar (atomically, so a reader never
+    # sees a record count larger than the data written)
+    def close(self):
+        if self._file.closed:
+            return
+        with self._lock:
+            self._flush()
+            self._file.close()
+        meta = {
+            "version": TRACE_VERSION,
+            "dtype": [[name, TRACE_DTYPE.fields[name][0].str] for name in TRACE_DTYPE.names],
+            "count": self.count,
+        }
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            # Same JSON as json.dump(meta + resources), with the names written a
+            # slice at a time so a large catalog is never one Python list
+            f.write(json.dumps(meta)[:-1] + ', "resources": [')
+            for start in range(0, len(self.resources), CHUNK_SIZE):
+                names = self.resources[start:start + CHUNK_SIZE]
+                names = names.tolist() if isinstance(names, np.ndarray) else names
+                f.write(("," if start else "") + json.dumps(names)[1:-1])
+            f.write("]}")
+        os.replace(tmp_path, self.meta_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Read-only view of a trace. Nothing is loaded up front: records() memory-maps
+# the data file and iter_chunks() walks it in fixed-size slices.
+class TraceReader:
+    def __init__(self, path):
+        self.data_path, self.meta_path = _paths(path)
+        with open(self.meta_path, "r") as f:
+            meta = json.load(f)
+        if meta.get("version") != TRACE_VERSION:
+            raise ValueError(f"Unsupported trace version {meta.get('version')!r} in {self.meta_path}")
+        self.dtype = np.dtype([tuple(field) for field in meta["dtype"]])
+        self.count = meta["count"]
+        self.resources = meta["resources"]
+
+    def __len__(self):
+        return self.count
+
+    def records(self):
+        if not self.count:
+            return np.zeros(0, dtype=self.dtype)
+        return np.memmap(self.data_path, dtype=self.dtype, mode="r", shape=(self.count,))
+
+    def iter_chunks(self, chunk_size=CHUNK_SIZE):
+        records = self.records()
+        for start in range(0, self.count, chunk_size):
+            yield records[start:start + chunk_size]
+
+    # Successful requests per resource id, accumulated chunk by chunk
+    def frequencies(self, status=200):
+        counts = np.zeros(len(self.resources), dtype=np.int64)
+        for chunk in self.iter_chunks():
+            resource = chunk["resource"] if status is None else chunk["resource"][chunk["status"] == status]
+            counts += np.bincount(resource, minlength=len(self.resources))
+        return counts
+
+
+def trace_exists(path=TRACE_FILE):
+    data_path, meta_path = _paths(path)
+    return os.path.exists(data_path) and os.path.exists(meta_path)
+
+
+# Stream the successful requests of a trace as arrays of row positions into
+# `names` (e.g. the processed DataFrame's resource column); requests for
+# resources missing from `names` are skipped
+def iter_resource_positions(reader, names, chunk_size=CHUNK_SIZE, status=200):
+    position = {name: index for index, name in enumerate(names)}
+    mapping = np.array([position.get(name, -1) for name in reader.resources], dtype=np.int64)
+    for chunk in reader.iter_chunks(chunk_size):
+        resource = chunk["resource"] if status is None else chunk["resource"][chunk["status"] == status]
+        positions = mapping[resource]
+        yield positions[positions >= 0]
@@ -0,0 +1,249 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from src.data.data_preprocessing import CATEGORY_RANGES
+from src.data.trace_format import TRACE_DTYPE, TRACE_FILE, TraceWriter, catalog_path
+
+# Synthetic workloads for catalogs of 10^6-10^7 objects, written straight into
+# the binary trace format (src/data/trace_format.py).
+#
+# Everything is generated with NumPy a chunk at a time from one seeded Generator:
+#
+#   catalog      objects split over the simulate_requests.py categories; sizes
+#                uniform within each category's range (as simulate_requests.py
+#                draws them), or lognormal / Pareto; latencies from the
+#                data_preprocessing.py ranges
+#   popularity   exact Zipf bounded to the catalog: a precomputed CDF over the
+#                ranks and inverse-transform sampling (searchsorted), so no mass
+#                piles up on the last object the way clipping zipf() samples does
+#   locality     with probability `locality` a request repeats one of the last
+#                `locality_window` requests (resolved for a whole chunk at once
+#                by pointer jumping)
+#   drift        every `drift_interval` requests a random `drift_fraction` of
+#                the popularity ranks swap objects
+#   arrivals     Poisson at `rate` requests/s from `clients` clients
+#
+# Besides <output>.bin/.json, the catalog's sizes and latencies (aligned with the
+# trace's resource ids) go to <output>.catalog.npz, which trace_replay and
+# miss_ratio_curve read instead of a web_resources.json.
+#
+#   python -m src.data.workload_generator --objects 1000000 --requests 10000000 --seed 0
+
+DEFAULT_OBJECTS = 1_000_000
+DEFAULT_REQUESTS = 10_000_000
+ZIPF_ALPHA = 0.9
+CHUNK_REQUESTS = 1 << 20
+
+# Share of the catalog per category (the simulate_requests.py counts); size and
+# latency ranges come from data_preprocessing.CATEGORY_RANGES
+CATEGORY_SHARES = {"small_images": 0.3, "large_images": 0.2, "videos": 0.1, "scripts": 0.2, "css": 0.2}
+CATEGORIES = {name: {"share": share, **CATEGORY_RANGES[name]} for name, share in CATEGORY_SHARES.items()}
+SIZE_DISTRIBUTIONS = ("categories", "lognormal", "pareto")
+
+
+# Zipf over ranks 0..n-1 (P(rank r) ~ (r + 1)^-alpha), sampled by inverting its CDF
+class BoundedZipf:
+    def __init__(self, n, alpha=ZIPF_ALPHA):
+        self.n = n
+        self.alpha = alpha
+        weights = np.arange(1, n + 1, dtype=np.float64) ** -alpha
+        self.cdf = np.cumsum(weights)
+        self.cdf /= self.cdf[-1]
+
+    def pmf(self):
+        return np.diff(self.cdf, prepend=0.0)
+
+    def sample(self, rng, count):
+        ranks = np.searchsorted(self.cdf, rng.random(count), side="right")
+        return np.minimum(ranks, self.n - 1, out=ranks)
+
+
+# Catalog arrays: category code, size (KB) and origin latency (s) per object
+def generate_catalog(objects, rng, size_distribution="categories", size_median=50.0, size_sigma=1.5,
+                     pareto_alpha=1.2, pareto_min=5.0, max_size=50_000):
+    names = list(CATEGORIES)
+    shares = np.array([CATEGORIES[name]["share"] for name in names])
+    category = rng.choice(len(names), size=objects, p=shares / shares.sum()).astype(np.uint8)
+
+    low = np.array([CATEGORIES[name]["size_range"][0] for name in names])[category]
+    high = np.array([CATEGORIES[name]["size_range"][1] for name in names])[category]
+    if size_distribution == "categories":
+        size = rng.integers(low, high + 1)
+    elif size_distribution == "lognormal":
+        size = np.rint(rng.lognormal(np.log(size_median), size_sigma, objects))
+    elif size_distribution == "pareto":
+        size = np.rint(pareto_min * (1.0 + rng.pareto(pareto_alpha, objects)))
+    else:
+        raise ValueError(f"Unknown size distribution {size_distribution!r}; choose from {SIZE_DISTRIBUTIONS}")
+    size = np.clip(size, 1, max_size).astype(np.float64)
+
+    latency_low = np.array([CATEGORIES[name]["latency_range"][0] for name in names])[category]
+    latency_high = np.array([CATEGORIES[name]["latency_range"][1] for name in names])[category]
+    latency = np.round(rng.uniform(latency_low, latency_high), 2)
+    return category, size, latency
+
+
+# Resource names in the simulate_requests.py style: /<category>_<n>.dat (n from 1)
+def resource_names(category, chunk_size=CHUNK_REQUESTS):
+    prefixes = np.array([f"/{name}_" for name in CATEGORIES])
+    width = max(len(prefix) for prefix in prefixes) + len(str(len(category))) + len(".dat")
+    names = np.empty(len(category), dtype=f"<U{width}")
+    for start in range(0, len(category), chunk_size):
+        stop = min(start + chunk_size, len(category))
+        numbers = np.arange(start + 1, stop + 1).astype(str)
+        names[start:stop] = np.char.add(np.char.add(prefixes[category[start:stop]], numbers), ".dat")
+    return names
+
+
+# Replace the flagged requests by a copy of one of the previous `window` requests.
+# history: the last requests of the previous chunk. A repeated request can point
+# at another repeated one, so the chains are collapsed by pointer jumping.
+def apply_locality(objects, repeat, history, window, rng):
+    combined = np.concatenate([history, objects])
+    offset = len(history)
+    parent = np.arange(len(combined))
+    positions = np.flatnonzero(repeat) + offset
+    source = positions - rng.integers(1, window + 1, size=len(positions))
+    valid = source >= 0
+    parent[positions[valid]] = source[valid]
+    while True:
+        jumped = parent[parent]
+        if np.array_equal(jumped, parent):
+            break
+        parent = jumped
+    return combined[parent][offset:]
+
+
+class WorkloadGenerator:
+    def __init__(self, objects=DEFAULT_OBJECTS, alpha=ZIPF_ALPHA, seed=None, locality=0.0,
+                 locality_window=1000, drift_interval=None, drift_fraction=0.01, rate=10_000.0,
+                 clients=1000, start_time=0.0, **catalog_options):
+        self.rng = np.random.default_rng(seed)
+        self.objects = objects
+        self.zipf = BoundedZipf(objects, alpha)
+        self.locality = locality
+        self.locality_window = locality_window
+        self.drift_interval = drift_interval
+        self.drift_fraction = drift_fraction
+        self.rate = rate
+        self.clients = clients
+        self.clock = start_time
+        self.category, self.size, self.latency = generate_catalog(objects, self.rng, **catalog_options)
+        # Popularity rank -> object id; independent of category and id order
+        self.rank_object = self.rng.permutation(objects).astype(np.uint32)
+        self.generated = 0
+        self._history = np.zeros(0, dtype=np.uint32)
+        self._until_drift = drift_interval
+
+    # Swap the objects of a random drift_fraction of the popularity ranks
+    def drift(self):
+        count = max(2, int(self.objects * self.drift_fraction))
+        ranks = self.rng.choice(self.objects, size=min(count, self.objects), replace=False)
+        self.rank_object[ranks] = self.rng.permutation(self.rank_object[ranks])
+
+    # Next `count` requests as TRACE_DTYPE records (no drift inside one call)
+    def _block(self, count):
+        rng = self.rng
+        objects = self.rank_object[self.zipf.sample(rng, count)]
+        if self.locality > 0:
+            objects = apply_locality(objects, rng.random(count) < self.locality, self._history,
+                                     self.locality_window, rng)
+            self._history = objects[-self.locality_window:]
+
+        records = np.empty(count, dtype=TRACE_DTYPE)
+        arrivals = np.cumsum(rng.exponential(1.0 / self.rate, count))
+        records["timestamp"] = self.clock + arrivals
+        self.clock += float(arrivals[-1])
+        records["client"] = rng.integers(1, self.clients + 1, size=count)
+        records["resource"] = objects
+        records["status"] = 200
+        records["latency"] = self.latency[objects]
+        self.generated += count
+        return records
+
+    # Yield `requests` requests in chunks of at most chunk_size, drifting on schedule
+    def chunks(self, requests, chunk_size=CHUNK_REQUESTS):
+        remaining = requests
+        while remaining > 0:
+            count = min(chunk_size, remaining)
+            if self.drift_interval:
+                count = min(count, self._until_drift)
+            yield self._block(count)
+            remaining -= count
+            if self.drift_interval:
+                self._until_drift -= count
+                if self._until_drift == 0:
+                    self.drift()
+                    self._until_drift = self.drift_interval
+
+    def names(self):
+        return resource_names(self.category)
+
+    # Write `requests` requests to the trace at `path` plus its catalog arrays
+    def write(self, path, requests, chunk_size=CHUNK_REQUESTS):
+        with TraceWriter(path, self.names()) as writer:
+            for records in self.chunks(requests, chunk_size):
+                writer.extend(records)
+        save_catalog(path, self.size, self.latency, self.category)
+        return writer.count
+
+
+def save_catalog(trace_path, size, latency, category):
+    path = catalog_path(trace_path)
+    temporary = f"{path}.tmp.npz"
+    np.savez(temporary, size=size, latency=latency, category=category)
+    os.replace(temporary, path)
+    return path
+
+
+# (size, latency) arrays aligned with a generated trace's resource ids, or None.
+# With `resources` (the trace's resource count), a catalog of another length is
+# ignored too.
+def load_catalog(trace_path, resources=None):
+    path = catalog_path(trace_path)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as catalog:
+        if resources is not None and len(catalog["size"]) != resources:
+            return None
+        return catalog["size"], catalog["latency"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic request trace")
+    parser.add_argument("--objects", type=int, default=DEFAULT_OBJECTS)
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument("--alpha", type=float, default=ZIPF_ALPHA, help="Zipf exponent (any value >= 0)")
+    parser.add_argument("--size-distribution", choices=SIZE_DISTRIBUTIONS, default="categories")
+    parser.add_argument("--size-median", type=float, default=50.0, help="lognormal median size (KB)")
+    parser.add_argument("--size-sigma", type=float, default=1.5, help="lognormal sigma")
+    parser.add_argument("--pareto-alpha", type=float, default=1.2)
+    parser.add_argument("--pareto-min", type=float, default=5.0, help="Pareto minimum size (KB)")
+    parser.add_argument("--locality", type=float, default=0.0, help="probability of repeating a recent request")
+    parser.add_argument("--locality-window", type=int, default=1000)
+    parser.add_argument("--drift-interval", type=int, default=None, help="requests between popularity drifts")
+    parser.add_argument("--drift-fraction", type=float, default=0.01)
+    parser.add_argument("--rate", type=float, default=10_000.0, help="mean arrival rate (requests/s)")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--output", default=TRACE_FILE)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    generator = WorkloadGenerator(
+        args.objects, args.alpha, args.seed, args.locality, args.locality_window, args.drift_interval,
+        args.drift_fraction, args.rate, args.clients, size_distribution=args.size_distribution,
+        size_median=args.size_median, size_sigma=args.size_sigma, pareto_alpha=args.pareto_alpha,
+        pareto_min=args.pareto_min)
+    count = generator.write(args.output, args.requests)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {count} requests over {args.objects} objects to {args.output}.bin "
+          f"in {elapsed:.1f}s ({count / elapsed:,.0f} requests/s)")
+    print(f"Catalog: {generator.size.sum() / 1e6:.1f} GB total, saved to {catalog_path(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,118 +1,193 @@
-import pandas as pd
-import heapq
-from collections import deque
+import argparse
+import numpy as np
 import json
 import os
 
-# Create folders
-os.makedirs("result_data", exist_ok=True)
-os.makedirs("result_visuals", exist_ok=True)
-os.makedirs("logs", exist_ok=True)
-os.makedirs("interim_data", exist_ok=True)
+from src.analysis import instrumentation
+from src.data.resource_table import load_table
+from src.data.trace_format import TraceReader, iter_resource_positions, trace_exists
+from src.models.cache_config import cache_capacity
+from src.models.cache_policies import LFUPolicy, LRUPolicy
 
-# Open output file for writing logs
-output_file = open("logs/cache_baselines_output.txt", "w")
+# Log file of the current run (see run())
+output_file = None
 
 # Helper function to write logs to file
 def log(msg):
-    output_file.write(msg + "\n")
-
-# Load dataset
-df = pd.read_csv("interim_data/processed_request_data.csv")
-
-TOTAL_DATASET_SIZE = df["size"].sum()
-CACHE_CAPACITY = int(TOTAL_DATASET_SIZE * 0.1)
-
-log(f"Total dataset size: {TOTAL_DATASET_SIZE} KB")
-log(f"New cache capacity: {CACHE_CAPACITY} KB")
-
-# LRU Cache Implementation
-def lru_caching(df):
-    cache = deque()
-    cache_size = 0
-    cache_set = set()
-
-    for index, row in df.iterrows():
-        if row["resource"] in cache_set:
-            cache.remove(row["resource"])
-        elif cache_size + row["size"] <= CACHE_CAPACITY:
-            cache.append(row["resource"])
-            cache_set.add(row["resource"])
-            cache_size += row["size"]
-
-        if cache_size > CACHE_CAPACITY:
-            removed = cache.popleft()
-            cache_set.remove(removed)
-            cache_size -= df[df["resource"] == removed]["size"].values[0]
-
-    return list(cache)
-
-# LFU Cache Implementation
-def lfu_caching(df):
-    cache = []
-    cache_size = 0
-    cache_set = set()
-
-    df_sorted = df.sort_values(by="frequency", ascending=False)
-
-    log("\nLFU Sorted Resources (Highest Frequency First):")
-    log(df_sorted[["resource", "frequency"]].to_string(index=False))
-
-    for index, row in df_sorted.iterrows():
-        if cache_size + row["size"] <= CACHE_CAPACITY:
-            cache.append(row["resource"])
-            cache_set.add(row["resource"])
-            cache_size += row["size"]
-
-    return cache
-
-# Greedy Knapsack Caching
-def knapsack_caching(df):
-    cache = []
-    cache_size = 0
-    cache_set = set()
-
-    df["value_ratio"] = (df["frequency"] / df["size"]) * (1 / df["latency"] + 1)
-    df_sorted = df.sort_values(by="value_ratio", ascending=False)
-
-    log("\nGreedy Knapsack Sorted Resources (Highest Value-to-Size Ratio First):")
-    log(df_sorted[["resource", "value_ratio"]].to_string(index=False))
-
-    for index, row in df_sorted.iterrows():
-        if cache_size + row["size"] <= CACHE_CAPACITY:
-            cache.append(row["resource"])
-            cache_set.add(row["resource"])
-            cache_size += row["size"]
-
-    return cache
-
-# Execute caching methods
-lru_cache = lru_caching(df)
-lfu_cache = lfu_caching(df)
-knapsack_cache = knapsack_caching(df)
-
-# Load the SGD-optimized cache selection for comparison
-sgd_df = pd.read_csv("interim_data/optimized_cache_selection.csv")
-sgd_cache = list(sgd_df[sgd_df["cached"] == 1]["resource"])
-
-# Save results for later analysis
-results = {
-    "LRU": lru_cache,
-    "LFU": lfu_cache,
-    "Greedy Knapsack": knapsack_cache,
-    "SGD-Based": sgd_cache
-}
-
-with open("interim_data/cache_results.json", "w") as f:
-    json.dump(results, f)
-
-log("Cache comparison results saved.")
-
-# Log cache selections for debugging
-log("\nLRU Cache: " + str(lru_cache))
-log("\nLFU Cache: " + str(lfu_cache))
-log("\nGreedy Knapsack Cache: " + str(knapsack_cache))
-log("\nSGD-Based Cache: " + str(sgd_cache))
-
-# Close output file
-output_file.close()
\ No newline at end of file
+    if output_file is not None:
+        output_file.write(msg + "\n")
+
+# Request sequence for the trace-driven policies. Without a recorded trace the
+# aggregated frequencies are expanded into a shuffled sequence with the same counts
+def request_sequence(df, seed=None):
+    rng = np.random.default_rng(seed)
+    trace = np.repeat(np.arange(len(df)), df["frequency"].to_numpy().astype(np.int64))
+    rng.shuffle(trace)
+    return trace
+
+# Recorded request trace as chunks of row positions into df, streamed from the
+# binary trace file (see src/data/trace_format.py)
+def recorded_sequence(df, trace_path):
+    return iter_resource_positions(TraceReader(trace_path), df["resource"].tolist())
+
+# Feed a trace (one array of row positions, or an iterable of such chunks) to a
+# policy; returns (requests, hits)
+def replay_trace(policy, trace, sizes):
+    chunks = [trace] if isinstance(trace, (np.ndarray, list)) else trace
+    requests = hits = 0
+    for chunk in chunks:
+        requests += len(chunk)
+        hits += policy.replay(np.asarray(chunk).tolist(), sizes)
+    return requests, hits
+
+# LRU Cache Implementation: replay the request trace through an O(1) size-aware LRU.
+# Without a trace, the shuffled request_sequence(df, seed) is replayed
+def lru_caching(df, capacity, trace=None, seed=None):
+    if trace is None:
+        trace = request_sequence(df, seed)
+
+    policy = LRUPolicy(capacity)
+    with instrumentation.stage("baseline.lru"):
+        requests, hits = replay_trace(policy, trace, df["size"].tolist())
+    instrumentation.count("baseline.lru.requests", requests)
+    instrumentation.count("baseline.lru.hits", hits)
+    log(f"\nLRU replayed {requests} requests: {hits} hits")
+
+    # Cache contents from least to most recently used
+    resources = df["resource"].tolist()
+    return [resources[key] for key in policy.entries]
+
+# LFU Cache Implementation: stream the request trace through an O(1) size-aware LFU.
+# decay_interval / admission="tinylfu" enable aging (see LFUPolicy). Without a
+# trace, the shuffled request_sequence(df, seed) is replayed
+def lfu_caching(df, capacity, trace=None, decay_interval=None, admission=None, seed=None):
+    if trace is None:
+        trace = request_sequence(df, seed)
+
+    policy = LFUPolicy(capacity, decay_interval=decay_interval, admission=admission)
+    with instrumentation.stage("baseline.lfu"):
+        requests, hits = replay_trace(policy, trace, df["size"].tolist())
+    instrumentation.count("baseline.lfu.requests", requests)
+    instrumentation.count("baseline.lfu.hits", hits)
+    log(f"\nLFU replayed {requests} requests: {hits} hits")
+
+    # Cache contents from least to most frequently used
+    resources = df["resource"].tolist()
+    return [resources[key] for key in policy.ordered_keys()]
+
+# First fit over sizes in priority order: keep each one that still fits. Every
+# round accepts the longest prefix that fits (one cumsum), skips the first that
+# does not and drops the candidates larger than the space left. Returns a mask
+# over the positions.
+def first_fit(sorted_size, capacity):
+    selected = np.zeros(len(sorted_size), dtype=bool)
+    remaining = float(capacity)
+    candidates = np.arange(len(sorted_size))
+    while candidates.size:
+        candidates = candidates[sorted_size[candidates] <= remaining]
+        if not candidates.size:
+            break
+        cumulative = np.cumsum(sorted_size[candidates])
+        fit = int(np.searchsorted(cumulative, remaining, side="right"))
+        selected[candidates[:fit]] = True
+        if fit:
+            remaining -= cumulative[fit - 1]
+        candidates = candidates[fit + 1:]
+    return selected
+
+# Greedy Knapsack Caching: resources by value ratio, highest first, each kept
+# while it still fits. df is not modified
+@instrumentation.timed("baseline.greedy_knapsack")
+def knapsack_caching(df, capacity):
+    value_ratio = (df["frequency"] / df["size"]) * (1 / df["latency"] + 1)
+    # Row positions by descending ratio, ties in the order sort_values gives them
+    value_ratio = value_ratio.reset_index(drop=True).sort_values(ascending=False)
+    order = value_ratio.index.to_numpy()
+    resources = df["resource"].to_numpy()[order]
+
+    if output_file is not None:
+        import pandas as pd
+
+        log("\nGreedy Knapsack Sorted Resources (Highest Value-to-Size Ratio First):")
+        log(pd.DataFrame({"resource": resources, "value_ratio": value_ratio.to_numpy()}).to_string(index=False))
+
+    instrumentation.count("baseline.greedy_knapsack.rows", len(order))
+    size = df["size"].to_numpy(dtype=np.float64)
+    return resources[first_fit(size[order], capacity)].tolist()
+
+# Run every baseline on root/interim_data and save cache_results.json. The seed
+# fixes the shuffled request sequence the trace-driven policies replay.
+def run(root=".", seed=None):
+    global output_file
+    import pandas as pd
+
+    interim_dir = os.path.join(root, "interim_data")
+    logs_dir = os.path.join(root, "logs")
+    os.makedirs(interim_dir, exist_ok=True)
+    os.makedirs(logs_dir, exist_ok=True)
+
+    # Open output file for writing logs
+    output_file = open(os.path.join(logs_dir, "cache_baselines_output.txt"), "w")
+
+    # Load dataset (the resource table preprocessing published, as a DataFrame)
+    with load_table(interim_dir) as table:
+        df = table.frame()
+
+    TOTAL_DATASET_SIZE = df["size"].sum()
+    CACHE_CAPACITY = cache_capacity(TOTAL_DATASET_SIZE)
+
+    log(f"Total dataset size: {TOTAL_DATASET_SIZE} KB")
+    log(f"New cache capacity: {CACHE_CAPACITY} KB")
+
+    # Execute caching methods
+    # Replay the recorded trace when the simulator wrote one, otherwise a
+    # shuffled sequence with the recorded frequencies
+    trace_path = os.path.join(interim_dir, "request_trace")
+    if trace_exists(trace_path):
+        lru_cache = lru_caching(df, CACHE_CAPACITY, recorded_sequence(df, trace_path))
+        lfu_cache = lfu_caching(df, CACHE_CAPACITY, recorded_sequence(df, trace_path))
+    else:
+        trace = request_sequence(df, seed)
+        lru_cache = lru_caching(df, CACHE_CAPACITY, trace)
+        lfu_cache = lfu_caching(df, CACHE_CAPACITY, trace)
+    knapsack_cache = knapsack_caching(df, CACHE_CAPACITY)
+
+    # Load the SGD-optimized cache selection for comparison
+    sgd_df = pd.read_csv(os.path.join(interim_dir, "optimized_cache_selection.csv"))
+    sgd_cache = list(sgd_df[sgd_df["cached"] == 1]["resource"])
+
+    # Save results for later analysis
+    results = {
+        "LRU": lru_cache,
+        "LFU": lfu_cache,
+        "Greedy Knapsack": knapsack_cache,
+        "SGD-Based": sgd_cache
+    }
+
+    with open(os.path.join(interim_dir, "cache_results.json"), "w") as f:
+        json.dump(results, f)
+
+    log("Cache comparison results saved.")
+
+    # Log cache selections for debugging
+    log("\nLRU Cache: " + str(lru_cache))
+    log("\nLFU Cache: " + str(lfu_cache))
+    log("\nGreedy Knapsack Cache: " + str(knapsack_cache))
+    log("\nSGD-Based Cache: " + str(sgd_cache))
+
+    # Close output file
+    output_file.close()
+    output_file = None
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LRU, LFU and greedy knapsack baselines")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the shuffled request sequence")
+    parser.add_argument("--root", default=".", help="run directory (holds interim_data/)")
+    args = parser.parse_args(argv)
+    run(args.root, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+# Cache budget shared by every stage (optimizer, baselines, analysis, proxy,
+# replay): a fraction of the total size of the catalogued resources, in KB.
+CACHE_FRACTION = 0.1
+
+
+# Integer cache capacity (KB) for a catalog of total_size KB
+def cache_capacity(total_size, fraction=CACHE_FRACTION):
+    return int(total_size * fraction)
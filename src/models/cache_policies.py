@@ -0,0 +1,557 @@
+import functools
+import struct
+from collections import OrderedDict
+from hashlib import blake2b
+
+import numpy as np
+
+from src.models.online_sgd import OnlineSGDOptimizer
+
+# Online cache policies with a size-accounted capacity budget.
+#
+# A policy tracks which resources are resident and decides admissions and
+# evictions; it does not hold the cached bytes. Callers keep the objects and use
+# the keys returned by `admit` to drop evicted entries.
+#
+#   hit = policy.lookup(key)               # record the access, True if resident
+#   evicted = policy.admit(key, size)      # after a miss; None if not admitted
+#   hit = policy.access(key, size)         # both in one call
+#   hits = policy.replay(trace, sizes)     # a whole trace of integer keys
+#   flags = policy.replay_hits(trace, sizes)  # ...with a per-request hit mask
+
+
+class CachePolicy:
+    name = None
+    vectorized = False  # replay_hits() takes NumPy key arrays directly
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.used = 0
+
+    def lookup(self, key):
+        raise NotImplementedError
+
+    def admit(self, key, size):
+        raise NotImplementedError
+
+    def access(self, key, size):
+        if self.lookup(key):
+            return True
+        self.admit(key, size)
+        return False
+
+    # Replay a trace of integer keys where sizes[key] is each object's size
+    def replay(self, trace, sizes):
+        access = self.access
+        hits = 0
+        for key in trace:
+            if access(key, sizes[key]):
+                hits += 1
+        return hits
+
+    # Replay a trace and return a boolean NumPy array, True where the request hit
+    def replay_hits(self, trace, sizes):
+        access = self.access
+        flags = bytearray(len(trace))
+        for position, key in enumerate(trace):
+            if access(key, sizes[key]):
+                flags[position] = 1
+        return np.frombuffer(flags, dtype=np.bool_)
+
+    def __contains__(self, key):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+# Least Recently Used: resident keys in recency order, evict from the front
+class LRUPolicy(CachePolicy):
+    name = "LRU"
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.entries = OrderedDict()
+
+    def lookup(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return True
+        return False
+
+    def admit(self, key, size):
+        if size > self.capacity or key in self.entries:
+            return None
+        evicted = []
+        while self.used + size > self.capacity:
+            victim, victim_size = self.entries.popitem(last=False)
+            self.used -= victim_size
+            evicted.append(victim)
+        self.entries[key] = size
+        self.used += size
+        return evicted
+
+    # Same outcome as access() per request, with the ordered-dict operations bound
+    # to locals; every step is O(1) so multi-million-request traces take seconds
+    def replay(self, trace, sizes):
+        entries = self.entries
+        move_to_end = entries.move_to_end
+        popitem = entries.popitem
+        capacity = self.capacity
+        used = self.used
+        hits = 0
+        for key in trace:
+            if key in entries:
+                move_to_end(key)
+                hits += 1
+                continue
+            size = sizes[key]
+            if size > capacity:
+                continue
+            while used + size > capacity:
+                used -= popitem(last=False)[1]
+            entries[key] = size
+            used += size
+        self.used = used
+        return hits
+
+    # replay() that also records which requests hit
+    def replay_hits(self, trace, sizes):
+        entries = self.entries
+        move_to_end = entries.move_to_end
+        popitem = entries.popitem
+        capacity = self.capacity
+        used = self.used
+        flags = bytearray(len(trace))
+        position = -1
+        for key in trace:
+            position += 1
+            if key in entries:
+                move_to_end(key)
+                flags[position] = 1
+                continue
+            size = sizes[key]
+            if size > capacity:
+                continue
+            while used + size > capacity:
+                used -= popitem(last=False)[1]
+            entries[key] = size
+            used += size
+        self.used = used
+        return np.frombuffer(flags, dtype=np.bool_)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# Count-min sketch of access frequencies with periodic halving (TinyLFU aging).
+# Counters are 4-bit style (saturating at 15) in one bytearray row per hash, so
+# memory is fixed by `width` no matter how many distinct keys are seen. Keys are
+# hashed with blake2b rather than hash(), which is salted per process for str,
+# so admissions are the same in every run.
+_FOUR_WORDS = struct.Struct("<4Q")
+
+
+class CountMinSketch:
+    MAX_COUNT = 15
+    DEPTH = 4
+
+    def __init__(self, width, sample_size=None):
+        self.width = max(16, int(width))
+        self.rows = [bytearray(self.width) for _ in range(self.DEPTH)]
+        self.sample_size = sample_size or 10 * self.width
+        self.additions = 0
+
+    # Four row indexes, one per 64-bit word of a 256-bit blake2b digest of the key
+    def _indexes(self, key):
+        digest = blake2b(str(key).encode(), digest_size=32, person=b"countmin").digest()
+        width = self.width
+        a, b, c, d = _FOUR_WORDS.unpack(digest)
+        return (a % width, b % width, c % width, d % width)
+
+    def estimate(self, key):
+        a, b, c, d = self._indexes(key)
+        r0, r1, r2, r3 = self.rows
+        return min(r0[a], r1[b], r2[c], r3[d])
+
+    def increment(self, key):
+        indexes = self._indexes(key)
+        rows = self.rows
+        current = min(rows[0][indexes[0]], rows[1][indexes[1]], rows[2][indexes[2]], rows[3][indexes[3]])
+        if current < self.MAX_COUNT:
+            # Conservative update: only raise the counters at the current minimum
+            for row, index in zip(rows, indexes):
+                if row[index] == current:
+                    row[index] = current + 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.halve()
+
+    # Age every counter by half so old popularity fades
+    def halve(self):
+        for row in self.rows:
+            counters = np.frombuffer(row, dtype=np.uint8)
+            counters >>= 1
+        self.additions //= 2
+
+
+# Node of the frequency list: every resident key with the same access count,
+# kept in recency order so ties are broken least-recently-used first
+class _FrequencyNode:
+    __slots__ = ("count", "keys", "prev", "next")
+
+    def __init__(self, count):
+        self.count = count
+        self.keys = OrderedDict()
+        self.prev = self
+        self.next = self
+
+
+# Least Frequently Used with O(1) lookup, admission and eviction.
+#
+# Resident keys hang off a doubly linked list of frequency nodes in ascending
+# count order (Shah, Mitra & Matani's constant-time LFU). A hit moves the key to
+# the next node, the victim is always the oldest key of the first node. Only
+# resident keys carry counts, so memory is bounded by the cache contents.
+#
+# Optional aging:
+#   decay_interval  halve resident counts every N accesses (window-style LFU)
+#   admission="tinylfu"  admit a missed key only if a count-min sketch says it is
+#                   more popular than every victim it would displace
+class LFUPolicy(CachePolicy):
+    name = "LFU"
+
+    def __init__(self, capacity, decay_interval=None, admission=None, sketch_width=None):
+        super().__init__(capacity)
+        self.entries = {}
+        self.head = _FrequencyNode(0)
+        self.decay_interval = decay_interval
+        self.accesses = 0
+        self.sketch = None
+        if admission == "tinylfu":
+            self.sketch = CountMinSketch(sketch_width or 4096)
+        elif admission is not None:
+            raise ValueError(f"Unknown admission policy {admission!r}")
+
+    @staticmethod
+    def _insert_after(node, count):
+        new = _FrequencyNode(count)
+        new.prev = node
+        new.next = node.next
+        node.next.prev = new
+        node.next = new
+        return new
+
+    @staticmethod
+    def _unlink(node):
+        node.prev.next = node.next
+        node.next.prev = node.prev
+
+    def _tick(self, key):
+        self.accesses += 1
+        if self.sketch is not None:
+            self.sketch.increment(key)
+        if self.decay_interval and self.accesses % self.decay_interval == 0:
+            self.decay()
+
+    def lookup(self, key):
+        self._tick(key)
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+
+        node = entry[0]
+        target = node.next
+        if target is self.head or target.count != node.count + 1:
+            target = self._insert_after(node, node.count + 1)
+        size = node.keys.pop(key)
+        target.keys[key] = size
+        entry[0] = target
+        if not node.keys:
+            self._unlink(node)
+        return True
+
+    # access() per request with the hit path inlined; misses go through admit()
+    def replay(self, trace, sizes):
+        entries = self.entries
+        head = self.head
+        insert_after = self._insert_after
+        unlink = self._unlink
+        admit = self.admit
+        tick = self._tick if (self.sketch is not None or self.decay_interval) else None
+        hits = 0
+        for key in trace:
+            if tick is not None:
+                tick(key)
+            else:
+                self.accesses += 1
+            entry = entries.get(key)
+            if entry is None:
+                admit(key, sizes[key])
+                continue
+            hits += 1
+            node = entry[0]
+            target = node.next
+            if target is head or target.count != node.count + 1:
+                target = insert_after(node, node.count + 1)
+            target.keys[key] = node.keys.pop(key)
+            entry[0] = target
+            if not node.keys:
+                unlink(node)
+        return hits
+
+    # replay() that also records which requests hit
+    def replay_hits(self, trace, sizes):
+        entries = self.entries
+        head = self.head
+        insert_after = self._insert_after
+        unlink = self._unlink
+        admit = self.admit
+        tick = self._tick if (self.sketch is not None or self.decay_interval) else None
+        flags = bytearray(len(trace))
+        position = -1
+        for key in trace:
+            position += 1
+            if tick is not None:
+                tick(key)
+            else:
+                self.accesses += 1
+            entry = entries.get(key)
+            if entry is None:
+                admit(key, sizes[key])
+                continue
+            flags[position] = 1
+            node = entry[0]
+            target = node.next
+            if target is head or target.count != node.count + 1:
+                target = insert_after(node, node.count + 1)
+            target.keys[key] = node.keys.pop(key)
+            entry[0] = target
+            if not node.keys:
+                unlink(node)
+        return np.frombuffer(flags, dtype=np.bool_)
+
+    # Victims the admission of `size` would evict, least valuable first
+    def _victims(self, size):
+        needed = self.used + size - self.capacity
+        victims = []
+        node = self.head.next
+        while needed > 0 and node is not self.head:
+            for victim, victim_size in node.keys.items():
+                victims.append(victim)
+                needed -= victim_size
+                if needed <= 0:
+                    break
+            node = node.next
+        return victims
+
+    def admit(self, key, size):
+        if size > self.capacity or key in self.entries:
+            return None
+        victims = self._victims(size)
+        if self.sketch is not None and victims:
+            frequency = self.sketch.estimate(key)
+            if any(self.sketch.estimate(victim) >= frequency for victim in victims):
+                return None
+
+        for victim in victims:
+            node = self.entries.pop(victim)[0]
+            self.used -= node.keys.pop(victim)
+            if not node.keys:
+                self._unlink(node)
+
+        first = self.head.next
+        if first is self.head or first.count != 1:
+            first = self._insert_after(self.head, 1)
+        first.keys[key] = size
+        self.entries[key] = [first, size]
+        self.used += size
+        return victims
+
+    # Halve every resident count (rounding up, so counts stay >= 1), merging
+    # nodes that collapse onto the same count and keeping recency order
+    def decay(self):
+        merged = {}
+        node = self.head.next
+        while node is not self.head:
+            count = (node.count + 1) // 2
+            merged.setdefault(count, []).append(node.keys)
+            node = node.next
+
+        self.head.next = self.head.prev = self.head
+        tail = self.head
+        for count in sorted(merged):
+            tail = self._insert_after(tail, count)
+            for keys in merged[count]:
+                for key, size in keys.items():
+                    tail.keys[key] = size
+                    self.entries[key][0] = tail
+
+    # Resident keys from least to most valuable
+    def ordered_keys(self):
+        node = self.head.next
+        while node is not self.head:
+            yield from node.keys
+            node = node.next
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# Precomputed selection (Greedy Knapsack, SGD-Based): only selected keys are
+# admitted and nothing is evicted, since the selection already fits the budget
+class StaticPolicy(CachePolicy):
+    vectorized = True
+
+    def __init__(self, capacity, selection, name="Static"):
+        super().__init__(capacity)
+        self.name = name
+        self.selection = set(selection)
+        self.entries = {}
+        self._resident = None
+        self._selected = None
+
+    def lookup(self, key):
+        return key in self.entries
+
+    def admit(self, key, size):
+        if key not in self.selection or key in self.entries or self.used + size > self.capacity:
+            return None
+        self.entries[key] = size
+        self.used += size
+        if self._resident is not None and isinstance(key, int) and 0 <= key < len(self._resident):
+            self._resident[key] = True
+        return []
+
+    # Resident / selected flags by integer key, grown to cover `universe` keys
+    def _masks(self, universe):
+        if self._resident is None or len(self._resident) < universe:
+            self._resident = np.zeros(universe, dtype=np.bool_)
+            self._selected = np.zeros(universe, dtype=np.bool_)
+            self._resident[[key for key in self.entries if 0 <= key < universe]] = True
+            self._selected[[key for key in self.selection if 0 <= key < universe]] = True
+        return self._resident, self._selected
+
+    # Vectorized replay for integer keys: a request hits if its key is resident;
+    # only the first request of each selected, non-resident key goes through admit()
+    def replay_hits(self, trace, sizes):
+        keys = np.asarray(trace, dtype=np.int64)
+        if not keys.size:
+            return np.zeros(0, dtype=np.bool_)
+        resident, selected = self._masks(int(keys.max()) + 1)
+
+        hits = resident[keys]
+        candidates = np.flatnonzero(~hits & selected[keys])
+        if candidates.size:
+            _, first = np.unique(keys[candidates], return_index=True)
+            admitted = [position for position in np.sort(candidates[first]).tolist()
+                        if self.admit(int(keys[position]), sizes[keys[position]]) is not None]
+            if admitted:
+                resident[keys[admitted]] = True
+                hits = resident[keys]
+                hits[admitted] = False  # the admitting request itself was a miss
+        return hits
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# Online SGD: every request feeds the streaming optimizer (src/models/online_sgd.py)
+# and only resources in its current selection are admitted. Space is made by
+# evicting residents in ascending theta order (a snapshot taken whenever the
+# selection is recomputed), never one that scores above the newcomer.
+class OnlineSGDPolicy(CachePolicy):
+    name = "Online SGD"
+
+    def __init__(self, capacity, optimizer=None):
+        super().__init__(capacity)
+        self.optimizer = OnlineSGDOptimizer(capacity) if optimizer is None else optimizer
+        self.entries = {}
+        self._victims = []
+        self._victims_version = -1
+
+    def lookup(self, key):
+        index = self.optimizer.index.get(key)
+        if index is not None:
+            self.optimizer.observe_one(index)
+        return key in self.entries
+
+    def admit(self, key, size):
+        if key in self.entries:
+            return None
+        optimizer = self.optimizer
+        index = optimizer.index.get(key)
+        if index is None:
+            index = optimizer.add_resource(key, size)
+            optimizer.observe_one(index)
+        if size > self.capacity or not optimizer.selected(index):
+            return None
+
+        evicted = []
+        if self.used + size > self.capacity:
+            if self._victims_version != optimizer.version:
+                residents = list(self.entries)
+                index_of = optimizer.index
+                ids = np.fromiter((index_of[resident] for resident in residents), dtype=np.int64,
+                                  count=len(residents))
+                order = np.argsort(-optimizer.theta[ids], kind="stable")
+                self._victims = [residents[position] for position in order.tolist()]
+                self._victims_version = optimizer.version
+            # Victims from the low end of the snapshot, checked before anything is evicted
+            theta = optimizer.theta
+            victims = self._victims
+            needed = self.used + size - self.capacity
+            count = 0
+            position = len(victims) - 1
+            while needed > 0 and position >= 0:
+                victim = victims[position]
+                position -= 1
+                if victim not in self.entries:
+                    continue
+                if theta[optimizer.index[victim]] > theta[index]:
+                    return None
+                needed -= self.entries[victim]
+                count = len(victims) - 1 - position
+            if needed > 0:
+                return None
+            for victim in victims[len(victims) - count:]:
+                if victim in self.entries:
+                    self.used -= self.entries.pop(victim)
+                    evicted.append(victim)
+            del victims[len(victims) - count:]
+        self.entries[key] = size
+        self.used += size
+        return evicted
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+
+DYNAMIC_POLICIES = {
+    "LRU": LRUPolicy,
+    "LFU": LFUPolicy,
+    "TinyLFU": functools.partial(LFUPolicy, admission="tinylfu"),
+    "Online SGD": OnlineSGDPolicy,
+}
+
+
+# Build a policy by method name. Methods that are not online policies (Greedy
+# Knapsack, SGD-Based) replay their selection from cache_results.json.
+def build_policy(method, capacity, selection=None):
+    if method in DYNAMIC_POLICIES:
+        return DYNAMIC_POLICIES[method](capacity)
+    if selection is None:
+        raise ValueError(f"Policy {method!r} needs a precomputed selection")
+    return StaticPolicy(capacity, selection, name=method)
@@ -0,0 +1,237 @@
+import bisect
+import math
+from collections import namedtuple
+from functools import reduce
+
+import numpy as np
+
+# 0/1 knapsack solvers used as an optimality reference for the caching methods:
+# maximize sum(values[selected]) subject to sum(sizes[selected]) <= capacity.
+#
+#   solve_dp               exact DP over integer sizes (divided by their gcd), one
+#                          rolling value row plus one packed bit row per item
+#   solve_fptas            (1 - eps)-approximation by DP over scaled values
+#   solve_branch_and_bound depth-first B&B seeded with the greedy solution and
+#                          pruned with the fractional (LP) bound
+#
+# All take NumPy arrays and return a KnapsackSolution; `exact` says whether the
+# value is proven optimal, `upper_bound` is a valid bound on the optimum either way.
+
+KnapsackSolution = namedtuple("KnapsackSolution", ["selected", "value", "size", "exact", "upper_bound"])
+
+DEFAULT_MAX_CELLS = 50_000_000
+
+
+def _prepare(values, sizes):
+    return np.asarray(values, dtype=np.float64), np.asarray(sizes, dtype=np.float64)
+
+
+def _solution(selected, values, sizes, exact, upper_bound):
+    value = float(values[selected].sum())
+    return KnapsackSolution(selected, value, float(sizes[selected].sum()), exact,
+                            value if exact else max(upper_bound, value))
+
+
+# Resources by value density, densest first (ties by index)
+def _density_order(values, sizes):
+    density = np.where(sizes > 0, values / np.maximum(sizes, 1e-300), np.inf)
+    return np.argsort(-density, kind="stable")
+
+
+# Greedy by value density with skipping (the Greedy Knapsack baseline's strategy)
+def greedy(values, sizes, capacity):
+    values, sizes = _prepare(values, sizes)
+    selected = np.zeros(len(values), dtype=bool)
+    remaining = float(capacity)
+    for index in _density_order(values, sizes):
+        if values[index] > 0 and sizes[index] <= remaining:
+            selected[index] = True
+            remaining -= sizes[index]
+    return selected
+
+
+# Dantzig bound: fill by density and take a fraction of the first item that does not fit
+def fractional_bound(values, sizes, capacity):
+    values, sizes = _prepare(values, sizes)
+    order = _density_order(values, sizes)
+    order = order[values[order] > 0]
+    cumulative = np.cumsum(sizes[order])
+    fit = int(np.searchsorted(cumulative, capacity, side="right"))
+    bound = float(values[order[:fit]].sum())
+    if fit < len(order):
+        room = capacity - (cumulative[fit - 1] if fit else 0.0)
+        bound += values[order[fit]] * room / sizes[order[fit]]
+    return bound
+
+
+# Exact DP over capacity. Sizes and capacity are divided by the gcd of the integer
+# sizes; if the table would still exceed max_cells, sizes are rounded up onto a
+# coarser grid, which keeps the answer feasible but no longer provably optimal.
+def solve_dp(values, sizes, capacity, max_cells=DEFAULT_MAX_CELLS):
+    values, sizes = _prepare(values, sizes)
+    capacity = int(math.floor(capacity))
+    usable = (sizes <= capacity) & (values > 0)
+    index = np.flatnonzero(usable)
+    selected = np.zeros(len(values), dtype=bool)
+    if not len(index) or capacity <= 0:
+        return _solution(selected, values, sizes, True, 0.0)
+
+    weights = np.ceil(sizes[index]).astype(np.int64)
+    exact = bool(np.all(weights == sizes[index]))
+    step = reduce(math.gcd, weights.tolist(), capacity) or 1
+    cells = capacity // step + 1
+    if cells * len(index) > max_cells:
+        step = max(step, -(-capacity * len(index) // max_cells))
+        exact = False
+    scaled = -(-weights // step)  # ceil division keeps every selection feasible
+    cells = capacity // step + 1
+
+    best = np.zeros(cells)
+    keep = []  # per item: (weight, packed bits of "take" for capacities >= weight)
+    for weight, value in zip(scaled.tolist(), values[index].tolist()):
+        if weight >= cells:
+            keep.append((weight, None))
+            continue
+        candidate = best[:cells - weight] + value
+        take = candidate > best[weight:]
+        np.maximum(best[weight:], candidate, out=best[weight:])
+        keep.append((weight, np.packbits(take)))
+
+    # Walk the items backwards from full capacity
+    remaining = cells - 1
+    for position in range(len(index) - 1, -1, -1):
+        weight, bits = keep[position]
+        if bits is None or remaining < weight:
+            continue
+        offset = remaining - weight
+        if bits[offset >> 3] & (0x80 >> (offset & 7)):
+            selected[index[position]] = True
+            remaining -= weight
+
+    bound = fractional_bound(values, sizes, capacity) if not exact else 0.0
+    return _solution(selected, values, sizes, exact, bound)
+
+
+# FPTAS: round values down to multiples of K = eps * max_value / n and run a
+# min-size DP over scaled value totals; the result is within (1 - eps) of optimal.
+# If that table would exceed max_cells, K is raised until it fits (a looser
+# guarantee; `upper_bound` still brackets the optimum).
+def solve_fptas(values, sizes, capacity, eps=0.1, max_cells=DEFAULT_MAX_CELLS):
+    values, sizes = _prepare(values, sizes)
+    usable = (sizes <= capacity) & (values > 0)
+    index = np.flatnonzero(usable)
+    selected = np.zeros(len(values), dtype=bool)
+    if not len(index):
+        return _solution(selected, values, sizes, True, 0.0)
+
+    scale = eps * values[index].max() / len(index)
+    scale = max(scale, values[index].sum() / max(max_cells // len(index) - 1, 1))
+    scaled = np.floor(values[index] / scale).astype(np.int64)
+    total = int(scaled.sum())
+
+    lightest = np.full(total + 1, np.inf)  # lightest[v]: min size reaching scaled value v
+    lightest[0] = 0.0
+    keep = []
+    for value, size in zip(scaled.tolist(), sizes[index].tolist()):
+        if value == 0:
+            keep.append((0, None))
+            continue
+        candidate = lightest[:total + 1 - value] + size
+        take = candidate < lightest[value:]
+        np.minimum(lightest[value:], candidate, out=lightest[value:])
+        keep.append((value, np.packbits(take)))
+
+    reachable = np.flatnonzero(lightest <= capacity)
+    remaining = int(reachable[-1])
+    for position in range(len(index) - 1, -1, -1):
+        value, bits = keep[position]
+        if bits is None or remaining < value:
+            continue
+        offset = remaining - value
+        if bits[offset >> 3] & (0x80 >> (offset & 7)):
+            selected[index[position]] = True
+            remaining -= value
+
+    return _solution(selected, values, sizes, False, fractional_bound(values, sizes, capacity))
+
+
+# Depth-first branch and bound over items in density order. The greedy solution is
+# the starting incumbent, and a branch is pruned when its fractional bound cannot
+# beat the incumbent (rounded down when all values are integers). Stops after
+# node_limit nodes with the best selection so far.
+def solve_branch_and_bound(values, sizes, capacity, node_limit=2_000_000):
+    values, sizes = _prepare(values, sizes)
+    order = _density_order(values, sizes)
+    order = order[(values[order] > 0) & (sizes[order] <= capacity)]
+    item_values = values[order].tolist()
+    item_sizes = sizes[order].tolist()
+    count = len(order)
+    integral = bool(np.all(values == np.floor(values)))
+
+    # Prefix sums in density order make each fractional bound a binary search
+    size_prefix = [0.0] + np.cumsum(sizes[order]).tolist()
+    value_prefix = [0.0] + np.cumsum(values[order]).tolist()
+
+    incumbent = greedy(values, sizes, capacity)
+    best_value = float(values[incumbent].sum())
+    best_taken = None
+    root_bound = fractional_bound(values, sizes, capacity)
+
+    # Dantzig bound from item `start` on with `room` left
+    def bound(start, room, value):
+        stop = bisect.bisect_right(size_prefix, size_prefix[start] + room, start) - 1
+        value += value_prefix[stop] - value_prefix[start]
+        if stop < count:
+            value += item_values[stop] * (room - (size_prefix[stop] - size_prefix[start])) / item_sizes[stop]
+        return math.floor(value + 1e-9) if integral else value
+
+    nodes = 0
+    taken = []
+    # Stack entries: (position, room, value, taken-length)
+    stack = [(0, float(capacity), 0.0, 0)]
+    while stack and nodes < node_limit:
+        position, room, value, depth = stack.pop()
+        nodes += 1
+        del taken[depth:]
+        if value > best_value:
+            best_value = value
+            best_taken = list(taken)
+        if position >= count or bound(position, room, value) <= best_value + 1e-9:
+            continue
+        # Skip branch first on the stack so the take branch is explored first
+        stack.append((position + 1, room, value, depth))
+        if item_sizes[position] <= room:
+            taken.append(position)
+            stack.append((position + 1, room - item_sizes[position],
+                          value + item_values[position], depth + 1))
+
+    exact = not stack
+    if best_taken is not None:
+        incumbent = np.zeros(len(values), dtype=bool)
+        incumbent[order[best_taken]] = True
+    return _solution(incumbent, values, sizes, exact, root_bound)
+
+
+# Best available reference: exact DP when the table fits, otherwise branch and bound
+def solve(values, sizes, capacity, method="auto", eps=0.1, max_cells=DEFAULT_MAX_CELLS):
+    if method == "dp":
+        return solve_dp(values, sizes, capacity, max_cells)
+    if method == "fptas":
+        return solve_fptas(values, sizes, capacity, eps, max_cells)
+    if method == "bnb":
+        return solve_branch_and_bound(values, sizes, capacity)
+    if method != "auto":
+        raise ValueError(f"Unknown knapsack method {method!r}")
+
+    solution = solve_dp(values, sizes, capacity, max_cells)
+    if solution.exact:
+        return solution
+    refined = solve_branch_and_bound(values, sizes, capacity)
+    return refined if refined.value >= solution.value else solution
+
+
+# Relative distance (%) of a selection's value from the optimum
+def optimality_gap(value, optimum):
+    if optimum <= 0:
+        return 0.0
+    return (optimum - value) / optimum * 100
@@ -0,0 +1,202 @@
+import numpy as np
+
+from src.models.checkpoint import read_checkpoint, write_checkpoint
+from src.models.sgd_core import THETA_CLIP, cleanup_selection, enforce_capacity, sigmoid_
+
+# Online variant of the knapsack SGD optimizer.
+#
+# The batch optimizer (sgd_core) retrains theta from random starts on the final
+# request counts of an iteration. This one keeps theta (one logit per resource)
+# for as long as it lives and updates it from mini-batches of streaming requests:
+#
+#   freq     <- decay * freq + counts(batch)         decayed request counts
+#   density   = freq / sum(freq) / size              request share per KB
+#   theta    <- clip(theta + lr * (density - price) / (density + price))
+#   price    <- price * exp(price_rate * (size @ p - capacity) / capacity)
+#
+# with p = sigmoid(theta). The step is the knapsack gradient (value minus
+# priced size) scaled per resource to (-1, 1), so resources far from the price
+# saturate and the ones near it keep moving. The price is the capacity constraint's multiplier:
+# it rises while the soft selection overflows the cache and falls while it
+# underfills, which projects theta onto the capacity budget incrementally
+# instead of rescaling from scratch. The hard selection is the same
+# enforce_capacity + cleanup_selection pass as the batch optimizer, refreshed
+# every `refresh_batches` updates. Each update costs O(resources) NumPy work,
+# shared by the batch_size requests it covers.
+#
+# Resources are keyed by name (or any hashable key), so a saved state (a
+# checkpoint file, see checkpoint.py) warm-starts the next pipeline iteration
+# even though its trace ids differ.
+
+BATCH_SIZE = 256
+LEARNING_RATE = 0.05
+HALF_LIFE = 20_000  # requests after which an old request counts half
+PRICE_RATE = 0.5
+MAX_PRICE_STEP = 0.05  # largest relative price change per update
+REFRESH_BATCHES = 4
+STATE_FILE = "interim_data/online_sgd_state.npz"
+
+
+class OnlineSGDOptimizer:
+    def __init__(self, capacity, batch_size=BATCH_SIZE, learning_rate=LEARNING_RATE,
+                 half_life=HALF_LIFE, price_rate=PRICE_RATE, refresh_batches=REFRESH_BATCHES):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.learning_rate = learning_rate
+        self.half_life = half_life
+        self.price_rate = price_rate
+        self.refresh_batches = refresh_batches
+        self.keys = []
+        self.index = {}
+        self._theta = np.zeros(0)
+        self._freq = np.zeros(0)
+        self._size = np.zeros(0)
+        self.cached = np.zeros(0, dtype=np.int8)
+        self.price = None
+        self.updates = 0
+        self.requests = 0
+        self.version = 0  # bumped whenever the hard selection is recomputed
+        self._pending = []
+        self._stale = True
+
+    def __len__(self):
+        return len(self.keys)
+
+    # Per-resource arrays: views over buffers that grow by doubling
+    @property
+    def theta(self):
+        return self._theta[:len(self.keys)]
+
+    @property
+    def freq(self):
+        return self._freq[:len(self.keys)]
+
+    @property
+    def size(self):
+        return self._size[:len(self.keys)]
+
+    def _grow(self, count):
+        if count > len(self._theta):
+            allocated = max(count, 2 * len(self._theta), 1024)
+            for name in ("_theta", "_freq", "_size"):
+                buffer = np.zeros(allocated)
+                buffer[:len(self.keys)] = getattr(self, name)[:len(self.keys)]
+                setattr(self, name, buffer)
+
+    # Register resources (or update their sizes); returns their internal ids
+    def add_resources(self, keys, sizes):
+        ids = np.empty(len(keys), dtype=np.int64)
+        index_of = self.index
+        for position, key in enumerate(keys):
+            index = index_of.get(key)
+            if index is None:
+                index = index_of[key] = len(index_of)
+            ids[position] = index
+        if len(index_of) > len(self.keys):
+            self._grow(len(index_of))
+            self.keys.extend(list(index_of)[len(self.keys):])
+        self.size[ids] = np.asarray(sizes, dtype=np.float64)
+        self._stale = True
+        return ids
+
+    # Register one resource; returns its internal id. It joins the hard selection
+    # at the next scheduled refresh
+    def add_resource(self, key, size):
+        index = self.index.get(key)
+        if index is None:
+            index = self.index[key] = len(self.keys)
+            self._grow(index + 1)
+            self.keys.append(key)
+        self._size[index] = size
+        return index
+
+    # Stream a chunk of requests (internal ids); updates once per full mini-batch
+    def observe(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        if self._pending:
+            ids = np.concatenate([np.asarray(self._pending, dtype=np.int64), ids])
+            self._pending = []
+        full = len(ids) - len(ids) % self.batch_size
+        for start in range(0, full, self.batch_size):
+            self.update(ids[start:start + self.batch_size])
+        self._pending = ids[full:].tolist()
+
+    # Stream one request; the per-request path of observe()
+    def observe_one(self, index):
+        self._pending.append(index)
+        if len(self._pending) >= self.batch_size:
+            batch = np.asarray(self._pending, dtype=np.int64)
+            self._pending = []
+            self.update(batch)
+
+    # Apply the partial mini-batch (end of a stream)
+    def flush(self):
+        if self._pending:
+            batch = np.asarray(self._pending, dtype=np.int64)
+            self._pending = []
+            self.update(batch)
+
+    # One mini-batch gradient step
+    def update(self, batch):
+        freq = self.freq
+        freq *= 0.5 ** (len(batch) / self.half_life)
+        freq += np.bincount(batch, minlength=len(freq))
+        self.requests += len(batch)
+
+        size = self.size
+        theta = self.theta
+        density = freq / (freq.sum() * np.maximum(size, 1e-12))
+        if self.price is None:
+            # Start from the price at which the whole request mass would just fit
+            self.price = 1.0 / max(self.capacity, 1e-12)
+        grad = density - self.price
+        grad /= density + self.price
+        grad *= self.learning_rate
+        theta += grad
+        np.clip(theta, -THETA_CLIP, THETA_CLIP, out=theta)
+
+        usage = float(size @ sigmoid_(theta, out=grad))
+        error = (usage - self.capacity) / max(self.capacity, 1e-12)
+        self.price *= float(np.exp(np.clip(self.price_rate * error, -MAX_PRICE_STEP, MAX_PRICE_STEP)))
+        self.updates += 1
+        self._stale = self._stale or self.updates % self.refresh_batches == 0
+
+    # Cache probabilities of every registered resource
+    def probabilities(self):
+        return sigmoid_(self.theta, out=np.empty_like(self.theta))
+
+    # Hard selection (int8 per internal id) under the capacity budget; with `ids`,
+    # the selection among those resources only (e.g. the ones of this iteration)
+    def selection(self, ids=None):
+        if ids is not None:
+            cache_prob = enforce_capacity(self.probabilities()[ids], self.size[ids], self.capacity)
+            return cleanup_selection(cache_prob, self.size[ids], self.capacity)
+        if self._stale:
+            cache_prob = enforce_capacity(self.probabilities(), self.size, self.capacity)
+            self.cached = cleanup_selection(cache_prob, self.size, self.capacity)
+            self.version += 1
+            self._stale = False
+        return self.cached
+
+    # A resource registered since the last refresh is not selected until the next one
+    def selected(self, index):
+        cached = self.selection()
+        return index < len(cached) and bool(cached[index])
+
+    # Warm start: persist theta, frequencies and the price under their keys
+    def save(self, path):
+        return write_checkpoint(path, {"resource": np.array(self.keys, dtype=str), "theta": self.theta,
+                                       "freq": self.freq, "size": self.size},
+                                price=self.price, updates=self.updates, requests=self.requests)
+
+    # Restore a saved state (resources unknown to this optimizer are added)
+    def load(self, path):
+        arrays, metadata = read_checkpoint(path)
+        ids = self.add_resources(arrays["resource"].tolist(), arrays["size"])
+        self.theta[ids] = arrays["theta"]
+        self.freq[ids] = arrays["freq"]
+        self.price = metadata["price"]
+        self.updates = metadata["updates"]
+        self.requests = metadata["requests"]
+        self._stale = True
+        return self
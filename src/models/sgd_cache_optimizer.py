@@ -1,135 +1,134 @@
-import pandas as pd
 import numpy as np
-from tqdm import tqdm
+import argparse
 import os
 
-# Create necessary folders
-os.makedirs("result_data", exist_ok=True)
-os.makedirs("result_visuals", exist_ok=True)
-os.makedirs("logs", exist_ok=True)
-os.makedirs("interim_data", exist_ok=True)
-
-# Load dataset
-df = pd.read_csv("interim_data/processed_request_data.csv")
-
-TOTAL_DATASET_SIZE = df["size"].sum()  # Sum of all file sizes
-CACHE_CAPACITY = int(TOTAL_DATASET_SIZE * 0.1)  # Set cache to 10% of total size
-
-print(f"Total dataset size: {TOTAL_DATASET_SIZE} KB")
-print(f"New cache capacity: {CACHE_CAPACITY} KB")
-
-# Hyperparameters
-ETA_INITIAL = 0.0005
-ADJUSTMENT_FACTOR = 0.01
-LAMBDA = 10
-MU = 0.01  # Capacity violation penalty
-MIN_LR = 1e-5
-MAX_LR = 0.02
-MARGIN = 0.10
-MAX_RETRIES = 75
-SGD_ITERATIONS = 500
-THRESHOLD = 0.3
-THETA_CLIP = 10  # Lowered clipping for smoother behavior
-
-# Margin boundaries
-lower_bound = CACHE_CAPACITY * (1 - MARGIN)
-upper_bound = CACHE_CAPACITY
-
-# Initialize cache selection probabilities
-df["cache_prob"] = np.random.uniform(0.6, 0.9, len(df))
-
-# Sigmoid function
-def sigmoid(x):
-    return 1 / (1 + np.exp(-x))
-
-# Loss function with capacity penalty
-def compute_loss(df):
-    capacity_violation = max(0, df["size"].dot(df["cache_prob"]) - CACHE_CAPACITY)
-    return - (df["frequency"] * df["cache_prob"]).sum() + LAMBDA * capacity_violation + MU * capacity_violation
-
-# SGD update step
-def update_cache_probabilities(df, learning_rate, iterations=SGD_ITERATIONS):
-    df["theta"] = np.random.uniform(-0.1, 0.1, len(df))
-
-    for _ in range(iterations):
-        df["gradient"] = df["frequency"] - LAMBDA * df["size"]
-        df["theta"] += learning_rate * df["gradient"]
-        df["theta"] = np.clip(df["theta"], -THETA_CLIP, THETA_CLIP)
-        df["cache_prob"] = sigmoid(df["theta"])
-
-    return df
-
-# Projection step to enforce cache capacity
-def enforce_capacity(df):
-    total_usage = df["size"].dot(df["cache_prob"])
-    if total_usage > CACHE_CAPACITY:
-        scaling_factor = CACHE_CAPACITY / total_usage
-        df["cache_prob"] *= scaling_factor
-    return df
-
-# Post-optimization cleanup step
-def cleanup_cache(df):
-    df = df.copy()
-    df.sort_values("cache_prob", ascending=False, inplace=True)
-    cumulative_size = 0
-    selected = []
-
-    for index, row in df.iterrows():
-        if cumulative_size + row["size"] <= CACHE_CAPACITY:
-            selected.append(1)
-            cumulative_size += row["size"]
+from src.data.resource_table import load_table
+from src.data.trace_format import TraceReader, iter_resource_positions, trace_exists
+from src.models.cache_baselines import request_sequence
+from src.models.cache_config import cache_capacity
+from src.models.checkpoint import CheckpointStore, align
+from src.models.online_sgd import STATE_FILE, OnlineSGDOptimizer
+from src.models.sgd_core import (
+    ETA_INITIAL,
+    THETA_CLIP,
+    adaptive_retry_optimizer,
+    batched_retry_optimizer,
+    cleanup_selection,
+    compute_loss,
+)
+
+# Online search: warm-start the streaming optimizer from state_file (when it
+# exists), feed it this run's requests in order (the recorded trace, or a
+# shuffled sequence with the processed frequencies) and save it back.
+# Returns (cache_prob, cached) for the rows of df.
+def online_optimizer(df, capacity, interim_dir, state_file, seed=None):
+    optimizer = OnlineSGDOptimizer(capacity)
+    if os.path.exists(state_file):
+        optimizer.load(state_file)
+        print(f"Warm start from {state_file} ({len(optimizer)} resources, {optimizer.requests} requests seen)")
+    ids = optimizer.add_resources(df["resource"].tolist(), df["size"].to_numpy(dtype=np.float64))
+
+    trace_path = os.path.join(interim_dir, "request_trace")
+    if trace_exists(trace_path):
+        chunks = iter_resource_positions(TraceReader(trace_path), df["resource"].tolist())
+    else:
+        chunks = [request_sequence(df, seed)]
+    for positions in chunks:
+        optimizer.observe(ids[positions])
+    optimizer.flush()
+
+    optimizer.save(state_file)
+    return optimizer.probabilities()[ids], optimizer.selection(ids)
+
+# Optimize the cache selection for root/interim_data/processed_request_data.csv.
+# "adaptive": sequential learning-rate retries; "batched": evaluate a whole
+# learning-rate grid at once (deterministic for a given seed); "online": the
+# persistent streaming optimizer (see online_sgd.py), state kept in state_file.
+# With checkpoint_dir, the adaptive search starts with an update from the last
+# saved theta and learning rate, and every search saves its result as the next
+# "sgd" step.
+def run(root=".", search="adaptive", seed=None, state_file=None, checkpoint_dir=None):
+    interim_dir = os.path.join(root, "interim_data")
+    os.makedirs(interim_dir, exist_ok=True)
+
+    # Load dataset (the resource table preprocessing published, as a DataFrame)
+    with load_table(interim_dir) as table:
+        df = table.frame()
+
+    TOTAL_DATASET_SIZE = df["size"].sum()  # Sum of all file sizes
+    CACHE_CAPACITY = cache_capacity(TOTAL_DATASET_SIZE)  # CACHE_FRACTION (10%) of total size
+
+    print(f"Total dataset size: {TOTAL_DATASET_SIZE} KB")
+    print(f"New cache capacity: {CACHE_CAPACITY} KB")
+
+    # Contiguous arrays for the optimizer core (see sgd_core.py for hyperparameters)
+    frequency = df["frequency"].to_numpy(dtype=np.float64)
+    size = df["size"].to_numpy(dtype=np.float64)
+
+    store = CheckpointStore(checkpoint_dir) if checkpoint_dir else None
+    checkpoint = store.load("sgd") if store else None
+    warm_theta, learning_rate = None, ETA_INITIAL
+    if checkpoint is not None:
+        arrays, metadata = checkpoint
+        warm_theta, found = align(arrays, df["resource"], "theta", fill=0.0)
+        learning_rate = metadata["learning_rate"]
+        print(f"Warm start from sgd checkpoint step {metadata['step']} "
+              f"({int(found.sum())}/{len(df)} resources, learning rate {learning_rate:.6f})")
+
+    if search == "online":
+        # Warm start, stream this run's requests, no retries
+        state_file = os.path.join(root, STATE_FILE) if state_file is None else state_file
+        cache_prob, cached = online_optimizer(df, CACHE_CAPACITY, interim_dir, state_file, seed)
+        best_usage, retries = float(size @ cached), 0
+        print(f"Online optimization: usage {best_usage:.0f} KB, "
+              f"loss {compute_loss(frequency, size, cache_prob, CACHE_CAPACITY):.2f}, state saved to {state_file}")
+    else:
+        # Run the learning-rate search
+        if search == "batched":
+            cache_prob, best_usage, retries, learning_rate = batched_retry_optimizer(
+                frequency, size, CACHE_CAPACITY, seed=seed)
         else:
-            selected.append(0)
-
-    df["cached"] = selected
-    df.sort_index(inplace=True)
+            cache_prob, best_usage, retries, learning_rate = adaptive_retry_optimizer(
+                frequency, size, CACHE_CAPACITY, learning_rate, rng=np.random.default_rng(seed),
+                warm_theta=warm_theta)
+        print(f"{search.capitalize()} retry optimization: {retries} candidates, best usage {best_usage:.0f} KB, "
+              f"final learning rate {learning_rate:.6f}, loss {compute_loss(frequency, size, cache_prob, CACHE_CAPACITY):.2f}")
+
+        # Enforce capacity one last time (cleanup)
+        cached = cleanup_selection(cache_prob, size, CACHE_CAPACITY)
+
+    df["cache_prob"] = cache_prob
+    df["cached"] = cached
+
+    if store is not None:
+        # Logits of the final probabilities: the next warm start reproduces this ranking
+        clipped = np.clip(cache_prob, 1e-12, 1 - 1e-12)
+        theta = np.log(clipped) - np.log1p(-clipped)
+        path = store.save("sgd", {"resource": df["resource"].to_numpy(dtype=str),
+                                  "theta": np.clip(theta, -THETA_CLIP, THETA_CLIP),
+                                  "cached": df["cached"].to_numpy(dtype=np.int8)},
+                          search=search, learning_rate=float(learning_rate),
+                          best_usage=float(best_usage), retries=int(retries))
+        print(f"Checkpoint saved to {path}")
+
+    # Save optimized caching strategy
+    selection_file = os.path.join(interim_dir, "optimized_cache_selection.csv")
+    df.to_csv(selection_file, index=False)
+    print(f"Optimized cache selection saved to {selection_file}")
     return df
 
-# Adaptive retry loop
-def adaptive_retry_optimizer(df):
-    learning_rate = ETA_INITIAL
-    best_cache_prob = None
-    best_usage = 0
-
-    for retry in tqdm(range(1, MAX_RETRIES + 1), desc="Adaptive Retry Optimization"):
-        df_copy = df.copy()
-        df_copy = update_cache_probabilities(df_copy, learning_rate)
-
-        # Enforce capacity constraint strictly
-        df_copy = enforce_capacity(df_copy)
-
-        # Cleanup and measure usage
-        df_copy = cleanup_cache(df_copy)
-        cache_usage = df_copy.loc[df_copy["cached"] == 1, "size"].sum()
-
-        # Learning rate adjustment
-        if cache_usage < lower_bound:
-            learning_rate *= (1 + ADJUSTMENT_FACTOR)
-        elif cache_usage > upper_bound:
-            learning_rate *= (1 - ADJUSTMENT_FACTOR)
-
-        learning_rate = np.clip(learning_rate, MIN_LR, MAX_LR)
-
-        if best_usage < cache_usage <= CACHE_CAPACITY:
-            best_cache_prob = df_copy["cache_prob"].copy()
-            best_usage = cache_usage
-
-        if lower_bound <= cache_usage <= upper_bound:
-            break
-
-    if best_cache_prob is not None:
-        df["cache_prob"] = best_cache_prob
-    else:
-        df["cache_prob"] = sigmoid(df["cache_prob"])
-
-    return df
 
-# Run adaptive retry optimization
-df = adaptive_retry_optimizer(df)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SGD cache optimizer")
+    parser.add_argument("--search", choices=["adaptive", "batched", "online"], default="adaptive")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--state-file", default=None, help=f"online optimizer state (default: {STATE_FILE})")
+    parser.add_argument("--checkpoint-dir", default=None, help="warm-start from / save checkpoints here")
+    parser.add_argument("--root", default=".", help="run directory (holds interim_data/)")
+    args = parser.parse_args(argv)
+    run(args.root, search=args.search, seed=args.seed, state_file=args.state_file,
+        checkpoint_dir=args.checkpoint_dir)
 
-# Enforce capacity one last time (cleanup)
-df = cleanup_cache(df)
 
-# Save optimized caching strategy
-df.to_csv("interim_data/optimized_cache_selection.csv", index=False)
-print("Optimized cache selection saved to interim_data/optimized_cache_selection.csv")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
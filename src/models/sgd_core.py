@@ -0,0 +1,283 @@
+import numpy as np
+
+from src.analysis import instrumentation
+
+# Array-based core of the knapsack SGD cache optimizer.
+#
+# Works on contiguous float64 arrays (frequency, size) instead of DataFrame
+# columns and reuses the same work buffers across retries, so no per-iteration
+# column writes or per-retry DataFrame copies are made.
+
+# Hyperparameters
+ETA_INITIAL = 0.0005
+ADJUSTMENT_FACTOR = 0.01
+LAMBDA = 10
+MU = 0.01  # Capacity violation penalty
+MIN_LR = 1e-5
+MAX_LR = 0.02
+MARGIN = 0.10
+MAX_RETRIES = 75
+SGD_ITERATIONS = 500
+THRESHOLD = 0.3
+THETA_CLIP = 10  # Lowered clipping for smoother behavior
+WARM_STEP = 1.0  # Largest theta change of the warm-start step
+
+
+def as_array(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+# Sigmoid computed in place: out = 1 / (1 + exp(-x))
+def sigmoid_(x, out=None):
+    out = x if out is None else out
+    np.negative(x, out=out)
+    np.exp(out, out=out)
+    out += 1.0
+    np.reciprocal(out, out=out)
+    return out
+
+
+# Loss function with capacity penalty
+def compute_loss(frequency, size, cache_prob, capacity):
+    capacity_violation = max(0.0, float(size @ cache_prob) - capacity)
+    return -float(frequency @ cache_prob) + LAMBDA * capacity_violation + MU * capacity_violation
+
+
+# Loop-invariant gradient of the SGD update
+def gradient(frequency, size):
+    return frequency - LAMBDA * size
+
+
+# SGD update: `iterations` steps of theta += lr * grad with clipping, then sigmoid.
+#
+# The gradient does not depend on theta, so every step moves theta by the same
+# amount in the same direction and the per-step clip can only bind once; the
+# result equals a single clipped step of iterations * lr * grad, fused here with
+# the sigmoid into one pass over the buffers.
+def update_cache_probabilities(grad, theta0, learning_rate, iterations=SGD_ITERATIONS,
+                               out=None):
+    out = np.empty_like(theta0) if out is None else out
+    np.multiply(grad, learning_rate * iterations, out=out)
+    out += theta0
+    np.clip(out, -THETA_CLIP, THETA_CLIP, out=out)
+    return sigmoid_(out)
+
+
+# Projection step to enforce cache capacity (in place)
+def enforce_capacity(cache_prob, size, capacity):
+    total_usage = float(size @ cache_prob)
+    if total_usage > capacity:
+        cache_prob *= capacity / total_usage
+    return cache_prob
+
+
+# First-fit over resources already sorted by descending probability, starting from
+# `candidates` (positions into sorted_size). Every round accepts the longest prefix
+# that fits, skips the first resource that does not, and drops candidates larger
+# than the remaining space (they could never fit later either). Marks accepted
+# positions in `selected` and returns the space left.
+def _first_fit_sorted(sorted_size, remaining, candidates, selected):
+    while candidates.size:
+        candidates = candidates[sorted_size[candidates] <= remaining]
+        if not candidates.size:
+            break
+        cumulative = np.cumsum(sorted_size[candidates])
+        fit = int(np.searchsorted(cumulative, remaining, side="right"))
+        selected[candidates[:fit]] = True
+        if fit:
+            remaining -= cumulative[fit - 1]
+        candidates = candidates[fit + 1:]
+    return remaining
+
+
+# Post-optimization cleanup: walk resources by descending probability and keep each
+# one that still fits, done with argsort + cumsum rounds instead of iterrows
+def cleanup_selection(cache_prob, size, capacity):
+    order = np.argsort(-cache_prob, kind="stable")
+    selected = np.zeros(len(size), dtype=bool)
+    _first_fit_sorted(size[order], float(capacity), np.arange(len(size)), selected)
+
+    cached = np.zeros(len(size), dtype=np.int8)
+    cached[order[selected]] = 1
+    return cached
+
+
+# Search outcome for the instrumentation report (no-op unless it is enabled)
+def _record_search(retries, usage, capacity, learning_rate, warm_start=False, warm_updates=0):
+    instrumentation.count("sgd.searches")
+    instrumentation.count("sgd.retries", retries)
+    instrumentation.count("sgd.iterations", retries * SGD_ITERATIONS + warm_updates)
+    instrumentation.count("sgd.warm_starts_accepted", int(warm_start))
+    instrumentation.gauge("sgd.converged", bool(capacity * (1 - MARGIN) <= usage <= capacity))
+    instrumentation.gauge("sgd.usage_fraction", usage / capacity if capacity else 0.0)
+    instrumentation.gauge("sgd.learning_rate", learning_rate)
+
+
+# Adaptive retry loop over learning rates.
+# warm_theta (e.g. from a checkpoint) is tried first: a single SGD step from it
+# against the current frequencies, scaled down so no theta moves by more than
+# WARM_STEP. An unscaled step (lr * grad, with grad = frequency - LAMBDA * size
+# in the thousands) would push most thetas to +-THETA_CLIP and erase the saved
+# ranking; this one only reorders resources whose thetas were close. If that
+# selection lands within the margin no retry runs (retries = 0); otherwise it is
+# kept as the best candidate so far and the random retries continue from
+# learning_rate.
+# Returns (cache_prob, best_usage, retries, learning_rate).
+@instrumentation.timed("sgd.adaptive_retry_optimizer")
+def adaptive_retry_optimizer(frequency, size, capacity, learning_rate=ETA_INITIAL,
+                             max_retries=MAX_RETRIES, rng=None, warm_theta=None):
+    rng = np.random.default_rng() if rng is None else rng
+    frequency = as_array(frequency)
+    size = as_array(size)
+    lower_bound = capacity * (1 - MARGIN)
+    upper_bound = capacity
+
+    grad = gradient(frequency, size)
+    theta0 = np.empty_like(size)
+    cache_prob = np.empty_like(size)
+    best_cache_prob = None
+    best_usage = 0
+    retries = 0
+
+    warm_updates = 0
+    if warm_theta is not None:
+        warm_updates = 1
+        np.clip(as_array(warm_theta), -THETA_CLIP, THETA_CLIP, out=theta0)
+        largest = learning_rate * float(np.abs(grad).max(initial=0.0))
+        step = learning_rate * min(1.0, WARM_STEP / largest) if largest else learning_rate
+        update_cache_probabilities(grad, theta0, step, iterations=1, out=cache_prob)
+        enforce_capacity(cache_prob, size, capacity)
+        cache_usage = float(size @ cleanup_selection(cache_prob, size, capacity))
+        if 0 < cache_usage <= capacity:
+            best_cache_prob = cache_prob.copy()
+            best_usage = cache_usage
+            if cache_usage >= lower_bound:
+                _record_search(retries, best_usage, capacity, learning_rate, warm_start=True,
+                               warm_updates=warm_updates)
+                return best_cache_prob, best_usage, retries, learning_rate
+
+    for retries in range(1, max_retries + 1):
+        # theta0 ~ U(-0.1, 0.1), drawn straight into the reused buffer
+        rng.random(out=theta0)
+        theta0 *= 0.2
+        theta0 -= 0.1
+        update_cache_probabilities(grad, theta0, learning_rate, out=cache_prob)
+
+        # Enforce capacity constraint strictly
+        enforce_capacity(cache_prob, size, capacity)
+
+        # Cleanup and measure usage
+        cached = cleanup_selection(cache_prob, size, capacity)
+        cache_usage = float(size @ cached)
+
+        # Learning rate adjustment
+        if cache_usage < lower_bound:
+            learning_rate *= (1 + ADJUSTMENT_FACTOR)
+        elif cache_usage > upper_bound:
+            learning_rate *= (1 - ADJUSTMENT_FACTOR)
+
+        learning_rate = float(np.clip(learning_rate, MIN_LR, MAX_LR))
+
+        if best_usage < cache_usage <= capacity:
+            best_cache_prob = cache_prob.copy()
+            best_usage = cache_usage
+
+        if lower_bound <= cache_usage <= upper_bound:
+            break
+
+    if best_cache_prob is None:
+        # No feasible retry: fall back to the squashed initial probabilities
+        best_cache_prob = sigmoid_(rng.uniform(0.6, 0.9, len(size)))
+
+    _record_search(retries, best_usage, capacity, learning_rate, warm_updates=warm_updates)
+    return best_cache_prob, best_usage, retries, learning_rate
+
+
+# Batched cleanup: the same first-fit pass as cleanup_selection for every row of a
+# (candidates x resources) probability matrix. The first round (the prefix that
+# fits, usually most of the selection) runs on the whole matrix at once; the
+# short, already-filtered tail of each row finishes with the 1-D rounds.
+def cleanup_selection_batch(cache_prob, size, capacity):
+    order = np.argsort(-cache_prob, axis=1, kind="stable")
+    sorted_size = size[order]
+    cumulative = np.cumsum(sorted_size, axis=1)
+    selected = cumulative <= capacity
+    prefix = selected.sum(axis=1)
+
+    for row in range(len(cache_prob)):
+        fit = prefix[row]
+        if fit >= len(size) - 1:
+            continue
+        remaining = capacity - (cumulative[row, fit - 1] if fit else 0.0)
+        _first_fit_sorted(sorted_size[row], remaining, np.arange(fit + 1, len(size)), selected[row])
+
+    cached = np.zeros(cache_prob.shape, dtype=np.int8)
+    np.put_along_axis(cached, order, selected.astype(np.int8), axis=1)
+    return cached
+
+
+# Learning-rate candidates for the batched search: a geometric grid over the allowed range
+def learning_rate_grid(num_candidates=MAX_RETRIES):
+    return np.geomspace(MIN_LR, MAX_LR, num_candidates)
+
+
+# Batched retry search: evaluate every learning rate (each with its own random
+# theta init) as one (candidates x resources) matrix, compute all capacity usages
+# together and pick the best in-margin candidate in a single pass.
+#
+# "Best" is the candidate with the highest cached request frequency among those
+# within [capacity * (1 - MARGIN), capacity]; if none lands in the margin, the
+# fullest feasible candidate wins, as in the sequential loop. Deterministic for a
+# given seed. Candidates are processed in row chunks of about `max_cells` values.
+# It is not faster than adaptive_retry_optimizer: per candidate the work is the
+# same argsort and cumsum (bench_sgd shows the two about even over a full grid),
+# and it always evaluates the whole grid where the adaptive loop usually stops
+# after a retry or two. Use it for a reproducible grid search, not for speed.
+# Returns (cache_prob, best_usage, candidates, learning_rate).
+@instrumentation.timed("sgd.batched_retry_optimizer")
+def batched_retry_optimizer(frequency, size, capacity, learning_rates=None, seed=None,
+                            max_cells=1_000_000):
+    rng = np.random.default_rng(seed)
+    frequency = as_array(frequency)
+    size = as_array(size)
+    learning_rates = learning_rate_grid() if learning_rates is None else as_array(learning_rates)
+    lower_bound = capacity * (1 - MARGIN)
+    grad = gradient(frequency, size)
+
+    best = None  # (in_margin, value, usage, learning_rate, cache_prob)
+    chunk = max(1, max_cells // max(len(size), 1))
+    for start in range(0, len(learning_rates), chunk):
+        rates = learning_rates[start:start + chunk]
+
+        # theta0 ~ U(-0.1, 0.1) per candidate, then the fused clipped step + sigmoid
+        cache_prob = rng.random((len(rates), len(size)))
+        cache_prob *= 0.2
+        cache_prob -= 0.1
+        cache_prob += (rates * SGD_ITERATIONS)[:, None] * grad[None, :]
+        np.clip(cache_prob, -THETA_CLIP, THETA_CLIP, out=cache_prob)
+        sigmoid_(cache_prob)
+
+        # Enforce capacity on every row at once
+        total_usage = cache_prob @ size
+        scale = np.where(total_usage > capacity, capacity / np.maximum(total_usage, 1e-300), 1.0)
+        cache_prob *= scale[:, None]
+
+        cached = cleanup_selection_batch(cache_prob, size, capacity)
+        usage = cached @ size
+        value = cached @ frequency
+
+        for row in range(len(rates)):
+            if usage[row] > capacity or usage[row] <= 0:
+                continue
+            key = (usage[row] >= lower_bound, value[row] if usage[row] >= lower_bound else usage[row])
+            if best is None or key > best[0]:
+                best = (key, float(usage[row]), float(rates[row]), cache_prob[row].copy())
+
+    if best is None:
+        # No feasible candidate: fall back to the squashed initial probabilities
+        _record_search(len(learning_rates), 0, capacity, float(learning_rates[0]))
+        return sigmoid_(rng.uniform(0.6, 0.9, len(size))), 0, len(learning_rates), float(learning_rates[0])
+
+    _, best_usage, learning_rate, cache_prob = best
+    _record_search(len(learning_rates), best_usage, capacity, learning_rate)
+    return cache_prob, best_usage, len(learning_rates), learning_rate
@@ -0,0 +1,273 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter, deque
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from src.analysis.instrumentation import HISTOGRAM_EDGES, LatencyHistogram
+
+# Asyncio HTTP load generator for the origin server or the caching proxy.
+#
+# Virtual clients share a bounded pool of keep-alive connections, so 10k+ clients
+# run in one process without one socket (or thread) each. Two client models:
+#
+#   closed  `clients` virtual clients each send a request, wait for the answer,
+#           think, and send the next one (offered load follows the server);
+#           latency includes any wait for a free pooled connection
+#   open    requests arrive as a Poisson process at `rate` per second no matter
+#           how fast the server answers; latency is measured from the scheduled
+#           arrival, so queueing delay is not hidden (no coordinated omission)
+#
+#   python -m src.pipeline.load_generator --mode closed --clients 10000 --requests-per-client 5
+#   python -m src.pipeline.load_generator --mode open --rate 2000 --requests 20000
+
+DEFAULT_CONNECTIONS = 512
+DEFAULT_TIMEOUT = 30.0
+ZIPF_EXPONENT = 1.5
+
+# Outcome counters and latency histogram of one load run
+# (and, with a TraceWriter, the per-request trace)
+class LoadReport:
+    def __init__(self, trace_writer=None):
+        self.trace_writer = trace_writer
+        self.latency = LatencyHistogram()
+        self.statuses = Counter()
+        self.resource_counts = Counter()  # successful (200) fetches per resource
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def record(self, resource, status, latency, client=0):
+        if status:
+            self.latency.record(latency)
+            self.statuses[status] += 1
+            if status == 200:
+                self.resource_counts[resource] += 1
+        else:
+            self.errors += 1
+        if self.trace_writer is not None:
+            self.trace_writer.record(time.time() - latency, client, resource, status, latency)
+
+    def summary(self):
+        requests = sum(self.statuses.values()) + self.errors
+        return {
+            "requests": requests,
+            "ok": self.statuses[200],
+            "errors": self.errors,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "seconds": self.elapsed,
+            "throughput (req/s)": requests / self.elapsed if self.elapsed else 0.0,
+            "mean (s)": self.latency.mean(),
+            "p50 (s)": self.latency.percentile(50),
+            "p95 (s)": self.latency.percentile(95),
+            "p99 (s)": self.latency.percentile(99),
+            "max (s)": self.latency.max,
+            "histogram": {
+                "edges (s)": HISTOGRAM_EDGES,
+                "counts": self.latency.bucket_counts().tolist(),
+            },
+        }
+
+
+class LoadError(Exception):
+    pass
+
+
+# Bounded pool of HTTP/1.1 keep-alive connections shared by every virtual client.
+# At most max_connections requests are on the wire; the rest wait for a slot.
+class ConnectionPool:
+    def __init__(self, base_url, max_connections=DEFAULT_CONNECTIONS, timeout=DEFAULT_TIMEOUT):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.opened = 0
+        self._idle = deque()
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def _connect(self):
+        self.opened += 1
+        return await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+
+    # GET a path and return its status code; the body is read and discarded
+    async def get(self, path, headers=None):
+        lines = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+        async with self._slots:
+            # An idle connection may have been closed by the server; retry once on a fresh one
+            for attempt in range(2):
+                reused = attempt == 0 and bool(self._idle)
+                writer = None
+                try:
+                    reader, writer = self._idle.pop() if reused else await self._connect()
+                    writer.write(request)
+                    status, close = await asyncio.wait_for(self._read_response(reader), self.timeout)
+                    break
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as e:
+                    if writer is not None:
+                        writer.close()
+                    if not reused:
+                        raise LoadError(str(e) or type(e).__name__) from e
+            if close:
+                writer.close()
+            else:
+                self._idle.append((reader, writer))
+            return status
+
+    @staticmethod
+    async def _read_response(reader):
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.split(b"\r\n")
+        status = int(lines[0].split(b" ", 2)[1])
+        length = 0
+        close = False
+        for line in lines[1:]:
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"connection":
+                close = value.strip().lower() == b"close"
+        if length:
+            await reader.readexactly(length)
+        return status, close
+
+    def close(self):
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
+# Resource paths drawn from the same clipped Zipf distribution as simulate_requests.py
+def zipf_paths(resource_list, count, rng, exponent=ZIPF_EXPONENT):
+    ranks = np.clip(rng.zipf(exponent, count), 1, len(resource_list))
+    return np.asarray(resource_list, dtype=object)[ranks - 1]
+
+
+async def _fetch(pool, report, client_id, path, started):
+    try:
+        status = await pool.get(path, {"X-Client-ID": str(client_id)})
+    except LoadError:
+        status = 0
+    report.record(path, status, time.perf_counter() - started, client_id)
+
+
+# Closed loop: each client sends its next request only after the previous answer
+# (plus a think time drawn from think_time=(low, high) seconds)
+async def run_closed_loop(pool, report, resource_list, clients, requests_per_client, rng,
+                          think_time=(0.0, 0.0)):
+    paths = zipf_paths(resource_list, clients * requests_per_client, rng).reshape(clients, requests_per_client)
+    thinks = rng.uniform(think_time[0], think_time[1], paths.shape) if think_time[1] > 0 else None
+
+    async def client(index):
+        client_id = index + 1
+        for step, path in enumerate(paths[index]):
+            await _fetch(pool, report, client_id, path, time.perf_counter())
+            if thinks is not None:
+                await asyncio.sleep(thinks[index, step])
+
+    await asyncio.gather(*(client(index) for index in range(clients)))
+
+
+# Open loop: Poisson arrivals at `rate` requests/s, each one measured from its
+# scheduled arrival time; `clients` only labels the requests round-robin
+async def run_open_loop(pool, report, resource_list, rate, total_requests, rng, clients=1):
+    paths = zipf_paths(resource_list, total_requests, rng)
+    arrivals = np.cumsum(rng.exponential(1.0 / rate, total_requests))
+    start = time.perf_counter()
+    in_flight = set()
+    for index, (path, offset) in enumerate(zip(paths, arrivals)):
+        scheduled = start + offset
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(_fetch(pool, report, index % clients + 1, path, scheduled))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    await asyncio.gather(*in_flight)
+
+
+# Run one load test against base_url and return its LoadReport.
+# mode="closed" uses clients x requests_per_client requests; mode="open" sends
+# total_requests (default clients x requests_per_client) at `rate` per second.
+def generate_load(base_url, resource_list, mode="closed", clients=100, requests_per_client=25,
+                  rate=None, total_requests=None, think_time=(0.0, 0.0),
+                  connections=DEFAULT_CONNECTIONS, timeout=DEFAULT_TIMEOUT, seed=None, trace_writer=None):
+    if mode == "open" and not rate:
+        raise ValueError("Open-loop load needs an arrival rate")
+    if mode not in ("closed", "open"):
+        raise ValueError(f"Unknown load mode {mode!r}")
+    rng = np.random.default_rng(seed)
+    report = LoadReport(trace_writer)
+
+    async def main():
+        pool = ConnectionPool(base_url, connections, timeout)
+        start = time.perf_counter()
+        try:
+            if mode == "closed":
+                await run_closed_loop(pool, report, resource_list, clients, requests_per_client, rng, think_time)
+            else:
+                await run_open_loop(pool, report, resource_list, rate,
+                                    total_requests or clients * requests_per_client, rng, clients)
+        finally:
+            report.elapsed = time.perf_counter() - start
+            pool.close()
+
+    asyncio.run(main())
+    return report
+
+
+# Human-readable report: totals, percentiles and a bar per histogram bucket
+def format_report(summary):
+    lines = [
+        f"Requests: {summary['requests']}  ok: {summary['ok']}  errors: {summary['errors']}  "
+        f"statuses: {summary['statuses']}",
+        f"Elapsed: {summary['seconds']:.2f}s  throughput: {summary['throughput (req/s)']:.0f} req/s",
+        f"Latency mean {summary['mean (s)'] * 1000:.1f} ms  p50 {summary['p50 (s)'] * 1000:.1f} ms  "
+        f"p95 {summary['p95 (s)'] * 1000:.1f} ms  p99 {summary['p99 (s)'] * 1000:.1f} ms  "
+        f"max {summary['max (s)'] * 1000:.1f} ms",
+    ]
+    edges = summary["histogram"]["edges (s)"]
+    counts = summary["histogram"]["counts"]
+    widest = max(max(counts), 1)
+    for index, count in enumerate(counts):
+        label = f"<= {edges[index] * 1000:g} ms" if index < len(edges) else f"> {edges[-1] * 1000:g} ms"
+        lines.append(f"  {label:>12} {count:>9} {'#' * round(40 * count / widest)}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Asyncio HTTP load generator")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--resource-file", default="interim_data/web_resources.json")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--requests-per-client", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=None, help="open loop: arrivals per second")
+    parser.add_argument("--requests", type=int, default=None, help="open loop: total requests")
+    parser.add_argument("--think-time", type=float, nargs=2, default=[0.0, 0.0], metavar=("LOW", "HIGH"))
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--report", default=None, help="also write the summary as JSON here")
+    args = parser.parse_args(argv)
+
+    with open(args.resource_file, "r") as f:
+        resource_list = list(json.load(f))
+
+    report = generate_load(args.base_url, resource_list, args.mode, args.clients, args.requests_per_client,
+                           args.rate, args.requests, tuple(args.think_time), args.connections,
+                           args.timeout, args.seed)
+    summary = report.summary()
+    print(format_report(summary))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
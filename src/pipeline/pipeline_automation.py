@@ -1,76 +1,228 @@
-import subprocess
-import time
-import pandas as pd
-from tqdm import tqdm
-import signal
+import argparse
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+
+from tqdm import tqdm
+
+from src.analysis import analyze_results, instrumentation
+from src.analysis.metric_summary_analysis import write_tables
+from src.analysis.metrics_store import MetricsStore
+from src.data import data_preprocessing
+from src.models import cache_baselines, sgd_cache_optimizer
+from src.pipeline import simulate_requests
+from src.server.async_server import AsyncOriginServer, BackgroundLoop
+from src.server.cache_proxy import CachingProxy, save_summary
+from src.server.catalog import ResourceCatalog
+
+# Runs the whole pipeline NUM_ITERATIONS times. Every stage is called in-process,
+# and iterations are spread over a pool of worker processes. Each iteration works
+# in its own directory (RUN_DIR/iteration_NNN) with its own origin server on an
+# ephemeral port and its own seed. The only files iterations share are the
+# warm-start checkpoints (--checkpoint-dir) and the online optimizer's state
+# (--search online); those are read and rewritten by every iteration, so with
+# either the iterations run one at a time, in order.
+# Each iteration records its metrics directly in the top-level metrics store
+# (METRICS_DB); the cumulative and average CSVs are exported from it at the end,
+# and the text tables are merged into logs/ in iteration order.
+#
+#   python -m src.pipeline.pipeline_automation --workers 4 --seed 0
 
 # Number of iterations
 NUM_ITERATIONS = 50
 
-# Directories
-os.makedirs("result_data", exist_ok=True)
-os.makedirs("result_visuals", exist_ok=True)
-os.makedirs("logs", exist_ok=True)
-os.makedirs("interim_data", exist_ok=True)
-
 # File paths
-METRICS_FILE = "result_data/cumulative_performance_metrics.csv"
-AVERAGE_FILE = "result_data/average_performance_metrics.csv"
+METRICS_DB = "result_data/metrics.sqlite"
 COMPREHENSIVE_FILE = "logs/comprehensive_metrics.txt"
-LOG_FILE = "logs/flask_server.log"
+RUN_DIR = "interim_data/runs"
+
+# Serve real payload bytes instead of JSON descriptions
+SERVE_PAYLOADS = False
+
+# Route simulated traffic through a caching proxy with this policy (None = direct to origin)
+PROXY_POLICY = None
+
+# SGD learning-rate search: "adaptive" or "online" (the streaming optimizer,
+# warm-started from ONLINE_STATE_FILE in the run directory; iterations then run
+# one at a time so each continues from the previous one's state)
+SGD_SEARCH = "adaptive"
+ONLINE_STATE_FILE = "online_sgd_state.npz"
+
+# Where preprocessing gets sizes and latencies: "random" (drawn per category) or
+# "catalog" (the origin's web_resources.json, i.e. what the server really serves)
+SIZE_SOURCE = "random"
+
+# Checkpoint directory for warm starts (None = every iteration starts cold). Unlike
+# the online state it survives between pipeline runs, so a restarted run resumes.
+CHECKPOINT_DIR = None
+
+# Client simulation: "threads" (original), or "closed" / "open" through the asyncio load generator
+SIMULATE_MODE = "threads"
+
+# Open-loop arrival rate (requests per second); required with SIMULATE_MODE = "open"
+SIMULATE_RATE = None
+
+# Seed of one iteration: distinct per iteration, reproducible for a given base seed
+def iteration_seed(base_seed, iteration):
+    return None if base_seed is None else base_seed + iteration
+
+# Run every stage of one iteration inside its own directory. Stage output goes to
+# the iteration's logs/pipeline.log; with WEBCACHE_PROFILE set, the stage timings,
+# counters and latency histograms go to its logs/profile.json. Returns
+# (iteration, performance metrics).
+def run_iteration(iteration, run_dir=RUN_DIR, seed=None, search=SGD_SEARCH,
+                  proxy_policy=PROXY_POLICY, serve_payloads=SERVE_PAYLOADS, simulate_mode=SIMULATE_MODE,
+                  checkpoint_dir=CHECKPOINT_DIR, size_source=SIZE_SOURCE, metrics_db=METRICS_DB,
+                  rate=SIMULATE_RATE):
+    root = os.path.join(run_dir, f"iteration_{iteration:03d}")
+    os.makedirs(os.path.join(root, "logs"), exist_ok=True)
+    os.makedirs(os.path.join(root, "result_data"), exist_ok=True)
 
-# Function to run a Python script
-def run_script(script_name):
-    result = subprocess.run(["python", script_name])
-    if result.returncode != 0:
-        print(f"Error running {script_name}")
+    instrumentation.reset()
+    catalog = ResourceCatalog(os.path.join(root, "interim_data", "web_resources.json"))
+    background = BackgroundLoop()
+    proxy = None
+    try:
+        origin = background.start(AsyncOriginServer(catalog, port=0, serve_payloads=serve_payloads))
+        base_url = f"http://127.0.0.1:{origin.port}"
+        if proxy_policy is not None:
+            log_name = proxy_policy.lower().replace(" ", "_").replace("-", "_")
+            proxy = background.start(CachingProxy(
+                catalog, proxy_policy, base_url,
+                results_file=os.path.join(root, "interim_data", "cache_results.json"), port=0,
+                log_path=os.path.join(root, "logs", f"cache_proxy_{log_name}.csv")))
+            base_url = f"http://127.0.0.1:{proxy.port}"
+
+        with open(os.path.join(root, "logs", "pipeline.log"), "w") as log_file, redirect_stdout(log_file):
+            with instrumentation.stage("simulate"):
+                simulate_requests.run(root, base_url, seed=seed, progress=False, mode=simulate_mode,
+                                      rate=rate)
+            with instrumentation.stage("preprocessing"):
+                data_preprocessing.run(root, seed=seed, checkpoint_dir=checkpoint_dir, source=size_source)
+            with instrumentation.stage("sgd"):
+                sgd_cache_optimizer.run(root, search=search, seed=seed,
+                                        state_file=os.path.join(run_dir, ONLINE_STATE_FILE),
+                                        checkpoint_dir=checkpoint_dir)
+            with instrumentation.stage("baselines"):
+                cache_baselines.run(root, seed=seed)
+            with instrumentation.stage("analysis"):
+                metrics_df = analyze_results.run(root, iteration, metrics_db)
+    finally:
+        background.stop()
+        if proxy is not None:
+            proxy.stats.close()
+            if proxy.policy is not None:
+                save_summary(proxy.stats.summary(proxy.policy),
+                             os.path.join(root, "result_data", "proxy_metrics.csv"))
+        instrumentation.write_report(os.path.join(root, instrumentation.PROFILE_FILE),
+                                     iteration=iteration, seed=seed, search=search)
+
+    return iteration, metrics_df
+
+# Function to append an iteration's table to the text log
+def append_metrics(iteration, metrics_df):
+    with open(COMPREHENSIVE_FILE, "a") as f:
+        analyze_results.write_comprehensive(f, metrics_df)
+
+# Cumulative and average CSVs from the metrics store
+def calculate_average(metrics_db=METRICS_DB):
+    with MetricsStore(metrics_db) as store:
+        write_tables(store)
+
+# Fan the iterations out over `workers` processes (one when they share checkpoints
+# or online state) and merge their metrics in iteration order as they complete.
+# Returns the numbers of the iterations that failed
+def run_pipeline(num_iterations=NUM_ITERATIONS, workers=None, seed=None, search=SGD_SEARCH,
+                 proxy_policy=PROXY_POLICY, serve_payloads=SERVE_PAYLOADS, run_dir=RUN_DIR,
+                 simulate_mode=SIMULATE_MODE, checkpoint_dir=CHECKPOINT_DIR, size_source=SIZE_SOURCE,
+                 rate=SIMULATE_RATE):
+    os.makedirs("result_data", exist_ok=True)
+    os.makedirs("result_visuals", exist_ok=True)
+    os.makedirs("logs", exist_ok=True)
+    os.makedirs(run_dir, exist_ok=True)
+
+    # ---- Clear this run's merged outputs ----
+    with open(COMPREHENSIVE_FILE, "w") as f:
+        f.write("")
+    metrics_db = os.path.abspath(METRICS_DB)
+    with MetricsStore(metrics_db) as store:
+        store.clear()
+    # The online optimizer carries its state across this run's iterations only
+    state_file = os.path.join(run_dir, ONLINE_STATE_FILE)
+    if os.path.exists(state_file):
+        os.remove(state_file)
+
+    workers = workers or os.cpu_count()
+    if (checkpoint_dir or search == "online") and workers > 1:
+        # Each iteration warm-starts from, and adds to, the previous one's saved state
+        shared = f"checkpoints in {checkpoint_dir}" if checkpoint_dir else f"online state in {state_file}"
+        print(f"Shared {shared}: running iterations one at a time instead of {workers} workers")
+        workers = 1
+
+    finished = {}
+    failed = []
+    next_iteration = 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(run_iteration, i, run_dir, iteration_seed(seed, i), search,
+                        proxy_policy, serve_payloads, simulate_mode, checkpoint_dir, size_source,
+                        metrics_db, rate): i
+            for i in range(1, num_iterations + 1)
+        }
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Pipeline Execution"):
+            iteration = futures[future]
+            try:
+                finished[iteration] = future.result()[1]
+            except Exception as e:
+                print(f"Iteration {iteration} failed: {e}")
+                finished[iteration] = None
+                failed.append(iteration)
+            while next_iteration in finished:
+                metrics_df = finished.pop(next_iteration)
+                if metrics_df is not None:
+                    append_metrics(next_iteration, metrics_df)
+                next_iteration += 1
+
+    failed.sort()
+    if len(failed) < num_iterations:
+        calculate_average(metrics_db)
+    if failed:
+        print(f"{len(failed)} of {num_iterations} iterations failed: {failed}")
     else:
-        print(f"Finished {script_name}")
-
-# Function to append metrics
-def append_metrics(iteration):
-    metrics_df = pd.read_csv("result_data/performance_metrics.csv")
-    metrics_df.insert(0, "Iteration", iteration)
-    with open(METRICS_FILE, "a") as f:
-        metrics_df.to_csv(f, header=f.tell() == 0, index=False)
-
-# Function to calculate averages
-def calculate_average():
-    df = pd.read_csv(METRICS_FILE)
-    avg_df = df.groupby("Method").mean().reset_index()
-    avg_df.to_csv(AVERAGE_FILE, index=False)
-
-# ---- Clear comprehensive_metrics.txt ----
-with open(COMPREHENSIVE_FILE, "w") as f:
-    f.write("")
-
-# Start Flask server in background and redirect output to log file
-with open(LOG_FILE, "w") as log_file:
-    server_process = subprocess.Popen(
-        ["python", "src/server/server.py"],
-        stdout=log_file,
-        stderr=log_file
-    )
-
-# Give server time to start
-time.sleep(2)
-
-try:
-    for i in tqdm(range(1, NUM_ITERATIONS + 1), desc="Pipeline Execution"):
-        run_script("src/pipeline/simulate_requests.py")
-        run_script("src/data/data_preprocessing.py")
-        run_script("src/models/sgd_cache_optimizer.py")
-        run_script("src/models/cache_baselines.py")
-        run_script("src/analysis/analyze_results.py")
-        append_metrics(i)
-
-    calculate_average()
-    print("All iterations completed. Average metrics saved.")
-
-except Exception as e:
-    print(f"Pipeline failed: {e}")
-
-finally:
-    server_process.send_signal(signal.SIGTERM)
-    print("Flask server stopped.")
\ No newline at end of file
+        print("All iterations completed. Average metrics saved.")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the caching pipeline over many iterations")
+    parser.add_argument("--iterations", type=int, default=NUM_ITERATIONS)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: CPU count; 1 when iterations share state)")
+    parser.add_argument("--seed", type=int, default=None, help="base seed; iteration i uses seed + i")
+    parser.add_argument("--search", choices=["adaptive", "online"], default=SGD_SEARCH)
+    parser.add_argument("--proxy-policy", default=PROXY_POLICY,
+                        help="route traffic through the caching proxy with this policy")
+    parser.add_argument("--payload", action="store_true", default=SERVE_PAYLOADS,
+                        help="serve real payloads of the catalogued size instead of JSON")
+    parser.add_argument("--simulate-mode", choices=["threads", "closed", "open"], default=SIMULATE_MODE)
+    parser.add_argument("--rate", type=float, default=SIMULATE_RATE,
+                        help="open loop: arrivals per second (required with --simulate-mode open)")
+    parser.add_argument("--run-dir", default=RUN_DIR, help="parent of the per-iteration directories")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR,
+                        help="warm-start every iteration from the checkpoints saved here")
+    parser.add_argument("--size-source", choices=["random", "catalog"], default=SIZE_SOURCE,
+                        help="preprocessing sizes: drawn per category, or the origin's catalog")
+    args = parser.parse_args(argv)
+    if args.simulate_mode == "open" and not args.rate:
+        parser.error("--simulate-mode open needs --rate")
+
+    failed = run_pipeline(args.iterations, args.workers, args.seed, args.search,
+                          args.proxy_policy, args.payload, args.run_dir, args.simulate_mode,
+                          args.checkpoint_dir, args.size_source, args.rate)
+    if failed:
+        sys.exit(f"{len(failed)} of {args.iterations} iterations failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import threading
+import time
+from queue import Empty, Full, Queue
+
+# Request counting and log writing for the threaded client simulation.
+#
+#   ShardedCounter    one count list per client thread, so increments never
+#                     touch shared state; the shards are summed once at the end
+#   BatchedLogWriter  bounded queue drained by a background thread that writes
+#                     lines in batches and flushes continuously, so memory stays
+#                     flat however long the simulation runs
+
+_CLOSE = object()
+
+
+class ShardedCounter:
+    def __init__(self, size, shards):
+        self.size = size
+        self.shards = [[0] * size for _ in range(shards)]
+
+    # The count list owned by one worker; only that worker may write to it
+    def shard(self, index):
+        return self.shards[index]
+
+    def totals(self):
+        return [sum(column) for column in zip(*self.shards)] if self.shards else [0] * self.size
+
+
+class BatchedLogWriter:
+    def __init__(self, path, max_pending=10000, batch_size=1000, flush_interval=0.5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.blocked = 0  # writes that waited because the queue was full
+        self._file = open(path, "w")
+        self._queue = Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    # Queue one line; blocks (back-pressure on the caller) while max_pending lines wait
+    def write(self, line):
+        try:
+            self._queue.put_nowait(line)
+        except Full:
+            self.blocked += 1
+            self._queue.put(line)
+
+    def _drain(self):
+        queue = self._queue
+        next_flush = time.monotonic() + self.flush_interval
+        closing = False
+        while not closing:
+            try:
+                item = queue.get(timeout=self.flush_interval)
+            except Empty:
+                item = None
+            batch = []
+            while item is not None:
+                if item is _CLOSE:
+                    closing = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = queue.get_nowait()
+                except Empty:
+                    item = None
+            if batch:
+                self._file.writelines(batch)
+                self.written += len(batch)
+            if closing or time.monotonic() >= next_flush:
+                self._file.flush()
+                next_flush = time.monotonic() + self.flush_interval
+
+    # Write everything still queued and close the file
+    def close(self):
+        if self._file.closed:
+            return
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
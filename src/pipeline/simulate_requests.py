@@ -1,20 +1,21 @@
+import argparse
+import json
 import requests
 import random
 import time
-import pandas as pd
 import numpy as np
-import json
 from tqdm import tqdm
 import os
 import threading
-from queue import Queue
 
-# Create required folders
-os.makedirs("interim_data", exist_ok=True)
-os.makedirs("logs", exist_ok=True)
+from src.analysis import instrumentation
+from src.data.trace_format import TraceWriter
+from src.pipeline.load_generator import DEFAULT_CONNECTIONS, format_report, generate_load
+from src.pipeline.request_accounting import BatchedLogWriter, ShardedCounter
+from src.server.catalog import write_catalog
 
-# Base URL of the Flask web server
-BASE_URL = "http://127.0.0.1:5000"
+# Base URL of the Flask web server (or of the caching proxy in front of it)
+BASE_URL = os.environ.get("SIMULATE_BASE_URL", "http://127.0.0.1:5000")
 
 # Generate a larger set of web resources with varied sizes
 categories = {
@@ -25,77 +26,163 @@ categories = {
     "css": {"count": 20, "size_range": (5, 30)},  # KB
 }
 
-web_resources = {}  # Initialize global dictionary
-
-# Generate resource names and sizes
-resource_index = 1
-for category, properties in categories.items():
-    for _ in range(properties["count"]):
-        size = random.randint(*properties["size_range"])  # Assign a random size
-        latency = random.uniform(0.05, 1.5)  # Assign a random latency between 50ms-1.5s
-        resource_name = f"{category}_{resource_index}.dat"  # Unique filename
-        web_resources[f"/{resource_name}"] = {"size": size, "latency": latency}
-        resource_index += 1
-
-# Save dynamically generated resources so the Flask server can load them
-with open("interim_data/web_resources.json", "w") as f:
-    json.dump(web_resources, f, indent=4)
-
-print("Web resources saved to interim_data/web_resources.json")
-
 # Simulating request frequencies using a Zipfian (long-tail) distribution
 num_requests_per_client = 25
 num_clients = 10
-resource_list = list(web_resources.keys())
-total_requests = num_requests_per_client * num_clients
-
-zipf_distributions = [
-    np.clip(np.random.zipf(1.5, num_requests_per_client), 1, len(resource_list))
-    for _ in range(num_clients)
-]
-
-# Initialize request log and log file
-request_log = {resource: 0 for resource in resource_list}
-log_file = open("logs/simulate_requests_log.txt", "w")
-progress_bar = tqdm(total=total_requests, desc="Simulating Client Requests")
-
-# Thread-safe queue for logging
-log_queue = Queue()
-
-# Define thread function
-def client_thread(client_id, zipf_distribution):
-    for index in zipf_distribution:
-        resource = resource_list[index - 1]
-        try:
-            response = requests.get(BASE_URL + resource, headers={"X-Client-ID": str(client_id)})
-            if response.status_code == 200:
-                request_log[resource] += 1
-            log_queue.put(f"Client {client_id} Request: {resource}, Status: {response.status_code}\n")
-        except requests.exceptions.RequestException as e:
-            log_queue.put(f"Client {client_id} Error fetching {resource}: {e}\n")
-
-        progress_bar.update(1)
-        time.sleep(random.uniform(0.05, 0.2))
-
-# Launch threads
-threads = []
-for client_id, zipf_distribution in enumerate(zipf_distributions, start=1):
-    t = threading.Thread(target=client_thread, args=(client_id, zipf_distribution))
-    t.start()
-    threads.append(t)
-
-# Wait for all threads to finish
-for t in threads:
-    t.join()
-
-# Flush remaining logs
-while not log_queue.empty():
-    log_file.write(log_queue.get())
-
-log_file.close()
-progress_bar.close()
-
-# Save request log to CSV
-request_df = pd.DataFrame(list(request_log.items()), columns=["resource", "frequency"])
-request_df.to_csv("interim_data/request_data.csv", index=False)
-print("Request data saved to interim_data/request_data.csv")
\ No newline at end of file
+
+# Think time between a client's requests (seconds)
+THINK_TIME = (0.05, 0.2)
+
+# Zipf ranks a client draws at a time
+ZIPF_CHUNK = 1024
+
+# Generate resource names and sizes
+def generate_resources(rng=random):
+    web_resources = {}
+    resource_index = 1
+    for category, properties in categories.items():
+        for _ in range(properties["count"]):
+            size = rng.randint(*properties["size_range"])  # Assign a random size
+            latency = rng.uniform(0.05, 1.5)  # Assign a random latency between 50ms-1.5s
+            resource_name = f"{category}_{resource_index}.dat"  # Unique filename
+            web_resources[f"/{resource_name}"] = {"size": size, "latency": latency}
+            resource_index += 1
+    return web_resources
+
+# Run the simulation with every file under `root`. With a seed the catalog, the
+# request sequences and the client think times are reproducible.
+#
+# mode="threads" is the original simulation: one thread and one plain
+# requests.get per request. mode="closed" / "open" drive the same Zipf workload
+# through the asyncio load generator (pooled keep-alive connections, 10k+
+# virtual clients, open-loop Poisson arrivals at `rate` req/s) and also save
+# throughput and latency percentiles to logs/load_report.json.
+def run(root=".", base_url=BASE_URL, seed=None, progress=True, mode="threads",
+        clients=None, requests_per_client=None, rate=None, think_time=THINK_TIME,
+        connections=DEFAULT_CONNECTIONS):
+    clients = clients or num_clients
+    requests_per_client = requests_per_client or num_requests_per_client
+    interim_dir = os.path.join(root, "interim_data")
+    logs_dir = os.path.join(root, "logs")
+    os.makedirs(interim_dir, exist_ok=True)
+    os.makedirs(logs_dir, exist_ok=True)
+
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    web_resources = generate_resources(rng)
+
+    # Save dynamically generated resources so the Flask server can load them
+    # (written atomically so the server never reads a half-written file)
+    resource_file = os.path.join(interim_dir, "web_resources.json")
+    write_catalog(resource_file, web_resources)
+    print(f"Web resources saved to {resource_file}")
+
+    resource_list = list(web_resources.keys())
+
+    # Every request also goes to the per-request trace (see src/data/trace_format.py)
+    trace_writer = TraceWriter(os.path.join(interim_dir, "request_trace"), resource_list)
+    with trace_writer:
+        if mode == "threads":
+            request_log = simulate_threads(root, base_url, resource_list, clients, requests_per_client,
+                                           rng, np_rng, think_time, progress, trace_writer)
+        else:
+            report = generate_load(base_url, resource_list, mode, clients, requests_per_client, rate=rate,
+                                   think_time=think_time, connections=connections, seed=seed,
+                                   trace_writer=trace_writer)
+    print(f"Request trace of {trace_writer.count} requests saved to {trace_writer.data_path}")
+    instrumentation.count("simulate.requests", trace_writer.count)
+
+    if mode != "threads":
+        instrumentation.merge("simulate.request", report.latency)
+        request_log = {resource: report.resource_counts[resource] for resource in resource_list}
+        summary = report.summary()
+        with open(os.path.join(logs_dir, "load_report.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        with open(os.path.join(logs_dir, "simulate_requests_log.txt"), "w") as f:
+            f.write(format_report(summary) + "\n")
+        print(format_report(summary))
+
+    # Save request log to CSV
+    import pandas as pd
+
+    request_df = pd.DataFrame(list(request_log.items()), columns=["resource", "frequency"])
+    request_file = os.path.join(interim_dir, "request_data.csv")
+    request_df.to_csv(request_file, index=False)
+    print(f"Request data saved to {request_file}")
+    return request_df
+
+# One thread per client issuing plain requests.get calls; returns the 200 count per resource.
+# Each client counts into its own shard and draws its Zipf ranks in small chunks,
+# and log lines go through a bounded background writer, so memory does not grow
+# with the number of requests and the merged counts are exact.
+def simulate_threads(root, base_url, resource_list, clients, requests_per_client, rng, np_rng,
+                     think_time=THINK_TIME, progress=True, trace_writer=None):
+    total_requests = requests_per_client * clients
+    counter = ShardedCounter(len(resource_list), clients)
+    progress_bar = tqdm(total=total_requests, desc="Simulating Client Requests", disable=not progress)
+    log_writer = BatchedLogWriter(os.path.join(root, "logs", "simulate_requests_log.txt"))
+
+    # Define thread function
+    def client_thread(client_id, counts, zipf_rng, think_rng):
+        for start in range(0, requests_per_client, ZIPF_CHUNK):
+            ranks = np.clip(zipf_rng.zipf(1.5, min(ZIPF_CHUNK, requests_per_client - start)),
+                            1, len(resource_list))
+            for index in ranks.tolist():
+                resource = resource_list[index - 1]
+                started = time.time()
+                status = 0
+                try:
+                    response = requests.get(base_url + resource, headers={"X-Client-ID": str(client_id)})
+                    status = response.status_code
+                    if status == 200:
+                        counts[index - 1] += 1
+                    log_writer.write(f"Client {client_id} Request: {resource}, Status: {status}\n")
+                except requests.exceptions.RequestException as e:
+                    log_writer.write(f"Client {client_id} Error fetching {resource}: {e}\n")
+                latency = time.time() - started
+                if trace_writer is not None:
+                    trace_writer.append(started, client_id, index - 1, status, latency)
+                instrumentation.observe("simulate.request", latency)
+
+                progress_bar.update(1)
+                think = think_rng.uniform(*think_time)
+                instrumentation.count("simulate.think_time_s", think)
+                time.sleep(think)
+
+    # Launch threads
+    threads = []
+    for client_id in range(1, clients + 1):
+        zipf_rng = np.random.default_rng(np_rng.integers(2**63))
+        think_rng = random.Random(rng.random())
+        t = threading.Thread(target=client_thread,
+                             args=(client_id, counter.shard(client_id - 1), zipf_rng, think_rng))
+        t.start()
+        threads.append(t)
+
+    # Wait for all threads to finish
+    for t in threads:
+        t.join()
+
+    log_writer.close()
+    progress_bar.close()
+    return dict(zip(resource_list, counter.totals()))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate client requests against the origin or proxy")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--mode", choices=["threads", "closed", "open"], default="threads")
+    parser.add_argument("--clients", type=int, default=num_clients)
+    parser.add_argument("--requests-per-client", type=int, default=num_requests_per_client)
+    parser.add_argument("--rate", type=float, default=None, help="open loop: arrivals per second")
+    parser.add_argument("--think-time", type=float, nargs=2, default=list(THINK_TIME), metavar=("LOW", "HIGH"))
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--root", default=".", help="run directory (interim_data/ and logs/ go here)")
+    args = parser.parse_args(argv)
+    run(args.root, base_url=args.base_url, seed=args.seed, mode=args.mode, clients=args.clients,
+        requests_per_client=args.requests_per_client, rate=args.rate,
+        think_time=tuple(args.think_time), connections=args.connections)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+from src.analysis import instrumentation
+from src.server.catalog import ResourceCatalog
+from src.server.payloads import PayloadStore, resolve_payload
+
+# Asyncio origin server serving the same GET /<path:resource> contract as server.py.
+#
+# Simulated latency is an `await asyncio.sleep`, so an in-flight request costs a
+# suspended coroutine instead of a blocked thread, and a single process on one core
+# can hold thousands of concurrent fetches. Connections are HTTP/1.1 keep-alive.
+
+RESOURCE_FILE = "interim_data/web_resources.json"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5000
+MAX_HEADER_BYTES = 16384
+
+REASONS = {200: "OK", 206: "PARTIAL CONTENT", 304: "NOT MODIFIED", 400: "BAD REQUEST",
+           404: "NOT FOUND", 405: "METHOD NOT ALLOWED", 416: "REQUESTED RANGE NOT SATISFIABLE",
+           500: "INTERNAL SERVER ERROR"}
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+# Encode the status line and headers for a body of the given length
+def response_head(status, headers, length, keep_alive=True):
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    lines.append(f"Content-Length: {length}")
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+
+# Encode a JSON response with Flask-compatible status line and headers
+def json_response(status, payload, keep_alive=True):
+    body = json.dumps(payload).encode()
+    return response_head(status, JSON_HEADERS, len(body), keep_alive) + body
+
+
+# Split the raw request head into method, target and lower-cased headers
+def parse_request_head(raw):
+    lines = raw.decode("latin-1").split("\r\n")
+    method, target, version = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+class AsyncOriginServer:
+    def __init__(self, catalog, host=DEFAULT_HOST, port=DEFAULT_PORT, backlog=4096,
+                 serve_payloads=False):
+        self.catalog = catalog
+        self.payloads = PayloadStore(catalog) if serve_payloads else None
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._server = None
+
+    # Resolve a GET into (status, headers, body), awaiting the simulated origin latency
+    async def serve_resource(self, resource_path, headers):
+        web_resources = self.catalog.snapshot()
+        if not web_resources and self.catalog.last_error is not None:
+            return self.json(500, {"error": "Resource file could not be loaded",
+                                   "details": self.catalog.last_error})
+
+        entry = web_resources.get(resource_path)
+        if entry is None:
+            return self.json(404, {"error": "Resource not found"})
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(entry.latency)  # Simulate network delay without blocking
+        finally:
+            self.in_flight -= 1
+        instrumentation.count("origin.simulated_latency_s", entry.latency)
+
+        if self.payloads is not None:
+            status, response_headers, start, end = resolve_payload(
+                self.payloads, resource_path, entry,
+                if_none_match=headers.get("if-none-match"),
+                range_header=headers.get("range"),
+            )
+            return status, response_headers, self.payloads.view(start, end)
+        return self.json(200, {"message": f"Served {resource_path}", "size": entry.size})
+
+    @staticmethod
+    def json(status, payload):
+        return status, JSON_HEADERS, json.dumps(payload).encode()
+
+    async def handle_request(self, method, target, headers):
+        path = target.split("?", 1)[0]
+        if method == "POST" and path == "/admin/reload":
+            self.catalog.reload(force=True)
+            if self.catalog.last_error is not None:
+                return self.json(500, {"error": "Resource file could not be loaded",
+                                       "details": self.catalog.last_error})
+            return self.json(200, {"version": self.catalog.version, "resources": len(self.catalog)})
+        if method != "GET":
+            return self.json(405, {"error": "Method not allowed"})
+        return await self.serve_resource(path, headers)
+
+    # One coroutine per connection, looping over keep-alive requests
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    raw = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                try:
+                    method, target, version, headers = parse_request_head(raw)
+                    length = int(headers.get("content-length", 0) or 0)
+                    if length < 0:
+                        raise ValueError(f"negative Content-Length {length}")
+                except ValueError:
+                    writer.write(json_response(400, {"error": "Malformed request"}, keep_alive=False))
+                    break
+
+                # Discard any request body; the contract has none. A truncated body is a disconnect
+                if length:
+                    try:
+                        await reader.readexactly(length)
+                    except asyncio.IncompleteReadError:
+                        break
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+
+                started = time.perf_counter()
+                status, response_headers, body = await self.handle_request(method, target, headers)
+                writer.write(response_head(status, response_headers, len(body), keep_alive))
+                if len(body):
+                    writer.write(body)  # memoryview payloads are written without copying
+                await writer.drain()
+                if instrumentation.ENABLED:
+                    instrumentation.observe("origin.request", time.perf_counter() - started)
+                    instrumentation.count(f"origin.status.{status}")
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port,
+            backlog=self.backlog, limit=MAX_HEADER_BYTES,
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    # Stop accepting connections (open ones end with their handler tasks)
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+
+
+# Hosts asyncio servers (origin, proxy) on a private event loop in a daemon
+# thread, so synchronous code such as a pipeline worker can run its own
+#
+#   background = BackgroundLoop()
+#   origin = background.start(AsyncOriginServer(catalog, port=0))
+#   ...
+#   background.stop()
+class BackgroundLoop:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.servers = []
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    # Start a server's listener on the loop and wait until it is bound
+    def start(self, server):
+        asyncio.run_coroutine_threadsafe(server.start(), self.loop).result()
+        self.servers.append(server)
+        return server
+
+    # Close every server, cancel the remaining connection tasks and end the thread
+    def stop(self):
+        async def shutdown():
+            for server in reversed(self.servers):
+                server.close()
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Asyncio origin server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--resource-file", default=RESOURCE_FILE)
+    parser.add_argument("--payload", action="store_true",
+                        help="serve real payloads of the catalogued size instead of JSON")
+    args = parser.parse_args(argv)
+
+    os.makedirs("logs", exist_ok=True)
+    os.makedirs("interim_data", exist_ok=True)
+
+    # Wait for web_resources.json if it doesn't exist yet
+    for _ in range(10):
+        if os.path.exists(args.resource_file):
+            break
+        print("Waiting for web_resources.json...")
+        time.sleep(0.5)
+
+    catalog = ResourceCatalog(args.resource_file)
+    catalog.reload()
+    server = AsyncOriginServer(catalog, args.host, args.port, serve_payloads=args.payload)
+
+    print(f"Async origin serving {len(catalog)} resources on http://{args.host}:{args.port}")
+    sys.stdout.flush()
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
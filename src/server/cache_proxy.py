@@ -0,0 +1,411 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import signal
+import sys
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from src.models.cache_config import cache_capacity
+from src.models.cache_policies import DYNAMIC_POLICIES, build_policy
+from src.server.async_server import JSON_HEADERS, json_response, parse_request_head, response_head
+from src.server.cache_store import KEY_PREFIX, AsyncStore, CacheStoreError, MemoryStore, build_store
+from src.server.catalog import ResourceCatalog
+from src.server.payloads import RangeNotSatisfiable, etag_matches, parse_range
+
+# Caching reverse proxy between simulate_requests.py and the origin server.
+#
+# Resources are admitted and evicted by one of the policies in
+# src/models/cache_policies.py under a budget of CACHE_FRACTION (cache_config.py) of the catalog's
+# total size (KB, the same accounting as the offline analysis). Every request is
+# recorded with its true hit/miss outcome and end-to-end latency.
+#
+# Response bodies live in a cache store (cache_store.py): a dict in this process,
+# or a Redis server that several proxy processes share. With a shared store, a
+# resource another process cached is served as a hit too.
+#
+#   python -m src.server.cache_proxy --policy LRU --port 5001
+#   python -m src.server.cache_proxy --policy "SGD-Based" --port 5001
+#   python -m src.server.cache_proxy --policy LRU --store redis://127.0.0.1:6379/0
+
+RESOURCE_FILE = "interim_data/web_resources.json"
+CACHE_RESULTS_FILE = "interim_data/cache_results.json"
+ORIGIN_URL = "http://127.0.0.1:5000"
+DEFAULT_PORT = 5001
+
+# Origin headers worth keeping on a cached response (lower-cased -> canonical)
+FORWARDED_HEADERS = {
+    "content-type": "Content-Type",
+    "etag": "ETag",
+    "accept-ranges": "Accept-Ranges",
+    "content-range": "Content-Range",
+}
+
+
+class OriginError(Exception):
+    pass
+
+
+# Cached responses are stored as bytes: a JSON [status, headers] line, then the body
+def encode_response(status, headers, body):
+    return json.dumps([status, headers]).encode() + b"\n" + bytes(body)
+
+
+def decode_response(raw):
+    split = raw.index(b"\n")
+    status, headers = json.loads(raw[:split])
+    return status, headers, memoryview(raw)[split + 1:]
+
+
+# Keep-alive connection pool to the origin
+class OriginPool:
+    def __init__(self, origin_url, max_idle=256):
+        parts = urlsplit(origin_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.max_idle = max_idle
+        self._idle = deque()
+
+    async def _acquire(self):
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing():
+                return reader, writer
+        return await asyncio.open_connection(self.host, self.port)
+
+    def _release(self, reader, writer, reusable):
+        if reusable and len(self._idle) < self.max_idle and not writer.is_closing():
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+
+    # Forward a GET and return (status, headers, body) with lower-cased header names
+    async def fetch(self, target, request_headers=None):
+        lines = [f"GET {target} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        for name, value in (request_headers or {}).items():
+            lines.append(f"{name}: {value}")
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+        # A pooled connection may have been closed by the origin; retry once on a fresh
+        # one. Any failure, including a refused connect, ends as OriginError
+        for attempt in range(2):
+            writer = None
+            try:
+                reader, writer = await self._acquire()
+                writer.write(request)
+                head = await reader.readuntil(b"\r\n\r\n")
+                status_line, _, header_block = head.decode("latin-1").partition("\r\n")
+                status = int(status_line.split(" ", 2)[1])
+                headers = {}
+                for line in header_block.split("\r\n"):
+                    if line:
+                        name, _, value = line.partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+            except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                if writer is not None:
+                    writer.close()
+                if attempt == 1:
+                    raise OriginError(str(e)) from e
+                continue
+            self._release(reader, writer, headers.get("connection", "").lower() != "close")
+            return status, headers, body
+
+    def close(self):
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
+# Per-policy counters plus a streaming per-request log
+class ProxyStats:
+    def __init__(self, policy_name, log_path=None):
+        self.policy_name = policy_name
+        self.requests = 0
+        self.hits = 0
+        self.kb_requested = 0.0
+        self.kb_hit = 0.0
+        self.latency_total = 0.0
+        self.hit_latency_total = 0.0
+        self.errors = 0
+        self._log = None
+        self._writer = None
+        if log_path:
+            self._log = open(log_path, "w", newline="")
+            self._writer = csv.writer(self._log)
+            self._writer.writerow(["timestamp", "resource", "cache", "status", "latency"])
+
+    def record(self, resource, hit, status, size_kb, latency):
+        self.requests += 1
+        self.latency_total += latency
+        if status >= 400:
+            self.errors += 1
+        else:
+            self.kb_requested += size_kb
+        if hit:
+            self.hits += 1
+            self.kb_hit += size_kb
+            self.hit_latency_total += latency
+        if self._writer is not None:
+            self._writer.writerow([f"{time.time():.6f}", resource, "HIT" if hit else "MISS",
+                                   status, f"{latency:.6f}"])
+
+    def summary(self, policy):
+        requests = max(self.requests, 1)
+        return {
+            "Method": self.policy_name,
+            "Requests": self.requests,
+            "Hits": self.hits,
+            "Cache Hit Rate (%)": self.hits / requests * 100,
+            "Byte Hit Rate (%)": self.kb_hit / self.kb_requested * 100 if self.kb_requested else 0.0,
+            "Mean Latency (s)": self.latency_total / requests,
+            "Mean Hit Latency (s)": self.hit_latency_total / self.hits if self.hits else 0.0,
+            "Errors": self.errors,
+            "Cache Usage (KB)": policy.used,
+            "Max Cache Size (KB)": policy.capacity,
+        }
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+class CachingProxy:
+    def __init__(self, catalog, policy_name, origin_url=ORIGIN_URL, results_file=CACHE_RESULTS_FILE,
+                 host="127.0.0.1", port=DEFAULT_PORT, log_path=None, store=None):
+        self.catalog = catalog
+        self.policy_name = policy_name
+        self.results_file = results_file
+        self.host = host
+        self.port = port
+        self.origin = OriginPool(origin_url)
+        self.stats = ProxyStats(policy_name, log_path)
+        self.store = store if store is not None else MemoryStore()
+        self.store_io = AsyncStore(self.store)
+        self.policy = None
+        self._catalog_version = None
+        self._server = None
+        self._inflight = {}  # resource -> task fetching (and admitting) it from the origin
+
+    # Rebuild the (empty) cache whenever a new catalog is published. A shared
+    # store is only cleared on a reload, not when this process first starts
+    def _sync_catalog(self):
+        web_resources = self.catalog.snapshot()
+        if self.catalog.version == self._catalog_version:
+            return web_resources
+        capacity = cache_capacity(sum(entry.size for entry in web_resources.values()))
+        selection = None if self.policy_name in DYNAMIC_POLICIES else self._load_selection()
+        self.policy = build_policy(self.policy_name, capacity, selection)
+        if self._catalog_version is not None or not self.store.shared:
+            try:
+                self.store.clear()
+            except CacheStoreError:
+                pass
+        self._catalog_version = self.catalog.version
+        return web_resources
+
+    # Latest precomputed selection for a static method; empty until one exists
+    def _load_selection(self):
+        try:
+            with open(self.results_file, "r") as f:
+                return json.load(f).get(self.policy_name, [])
+        except (OSError, ValueError):
+            return []
+
+    # Answer from a cached response, honouring If-None-Match and Range
+    def _from_cache(self, cached, headers):
+        status, cached_headers, body = cached
+        response_headers = dict(cached_headers)
+        response_headers["X-Cache"] = "HIT"
+        etag = cached_headers.get("ETag")
+        if etag and etag_matches(headers.get("if-none-match"), etag):
+            return 304, response_headers, b""
+        try:
+            byte_range = parse_range(headers.get("range"), len(body))
+        except RangeNotSatisfiable:
+            response_headers["Content-Range"] = f"bytes */{len(body)}"
+            return 416, response_headers, b""
+        if byte_range is None:
+            return status, response_headers, body
+        start, end = byte_range
+        response_headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+        return 206, response_headers, memoryview(body)[start:end + 1]
+
+    async def serve_resource(self, target, headers):
+        resource = target.split("?", 1)[0]
+        web_resources = self._sync_catalog()
+        entry = web_resources.get(resource)
+        size_kb = entry.size if entry is not None else 0
+
+        # The policy decides the hit; with a shared store, an entry another process
+        # cached counts too. A store failure is served as a miss
+        known = self.policy.lookup(resource)
+        if known or (self.store.shared and entry is not None):
+            try:
+                cached = await self.store_io.get(resource)
+            except CacheStoreError:
+                cached = None
+            if cached is not None:
+                return True, self._from_cache(decode_response(cached), headers), size_kb
+
+        # Miss: concurrent misses on one resource share a single origin fetch and a
+        # single admission; every one of them answers from its result. The object is
+        # fetched and cached by path, like the hits above, so the query string is dropped
+        fetch = self._inflight.get(resource)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._fetch_and_admit(resource, entry, known, size_kb))
+            self._inflight[resource] = fetch
+        try:
+            status, kept, body = await asyncio.shield(fetch)
+        except OriginError as e:
+            return False, (502, JSON_HEADERS, json.dumps({"error": "Origin unavailable",
+                                                          "details": str(e)}).encode()), size_kb
+
+        status, response_headers, body = self._from_cache((status, kept, body), headers) \
+            if status == 200 else (status, kept, body)
+        response_headers["X-Cache"] = "MISS"
+        return False, (status, response_headers, body), size_kb
+
+    # Fetch the full object (so it can be cached) and admit / store it; returns
+    # (status, forwarded headers, body)
+    async def _fetch_and_admit(self, resource, entry, known, size_kb):
+        try:
+            status, origin_headers, body = await self.origin.fetch(resource)
+            kept = {canonical: origin_headers[name]
+                    for name, canonical in FORWARDED_HEADERS.items() if name in origin_headers}
+            if status == 200 and entry is not None:
+                # A resource the policy holds but the store lost (shared store cleared,
+                # store error) is stored again without a second admission
+                evicted = [] if known else self.policy.admit(resource, size_kb)
+                if evicted is not None:
+                    try:
+                        await self.store_io.call(self.store.replace, evicted, resource,
+                                                 encode_response(status, kept, body), size_kb)
+                    except CacheStoreError:
+                        pass
+            return status, kept, body
+        finally:
+            self._inflight.pop(resource, None)
+
+    async def handle_request(self, method, target, headers):
+        path = target.split("?", 1)[0]
+        if method == "GET" and path == "/admin/stats":
+            self._sync_catalog()
+            stats = {**self.stats.summary(self.policy), "Store": self.store.stats()}
+            return None, (200, JSON_HEADERS, json.dumps(stats).encode()), 0
+        if method != "GET":
+            return None, (405, JSON_HEADERS, b'{"error": "Method not allowed"}'), 0
+        return await self.serve_resource(target, headers)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    raw = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                start = time.perf_counter()
+                try:
+                    method, target, version, headers = parse_request_head(raw)
+                except ValueError:
+                    writer.write(json_response(400, {"error": "Malformed request"}, keep_alive=False))
+                    break
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+
+                hit, (status, response_headers, body), size_kb = \
+                    await self.handle_request(method, target, headers)
+                writer.write(response_head(status, response_headers, len(body), keep_alive))
+                if len(body):
+                    writer.write(body)
+                await writer.drain()
+                if hit is not None:
+                    # Per resource, like the cache keys: the query string is dropped
+                    self.stats.record(target.split("?", 1)[0], hit, status, size_kb,
+                                      time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self.handle_connection, self.host, self.port,
+                                                  backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        stop = loop.create_future()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set_result, None)
+        async with self._server:
+            await stop
+        self.origin.close()
+
+    # Stop accepting connections and drop the pooled origin and store connections
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        self.origin.close()
+        self.store.close()
+
+
+# Append this run's summary row to the proxy metrics CSV
+def save_summary(summary, path):
+    new_file = not os.path.exists(path)
+    with open(path, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(summary))
+        if new_file:
+            writer.writeheader()
+        writer.writerow(summary)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Caching reverse proxy")
+    parser.add_argument("--policy", default="LRU",
+                        help="LRU, LFU, or a method in cache_results.json (e.g. 'Greedy Knapsack')")
+    parser.add_argument("--origin", default=ORIGIN_URL)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--resource-file", default=RESOURCE_FILE)
+    parser.add_argument("--results-file", default=CACHE_RESULTS_FILE)
+    parser.add_argument("--store", default="memory",
+                        help="cache store: 'memory' or a Redis URL shared by several proxies")
+    parser.add_argument("--store-prefix", default=KEY_PREFIX, help="Redis key prefix of this cache")
+    args = parser.parse_args(argv)
+
+    os.makedirs("logs", exist_ok=True)
+    os.makedirs("result_data", exist_ok=True)
+
+    catalog = ResourceCatalog(args.resource_file)
+    catalog.reload()
+    log_name = args.policy.lower().replace(" ", "_").replace("-", "_")
+    proxy = CachingProxy(catalog, args.policy, args.origin, args.results_file,
+                         args.host, args.port, log_path=f"logs/cache_proxy_{log_name}.csv",
+                         store=build_store(args.store, args.store_prefix))
+
+    print(f"Caching proxy ({args.policy}, {proxy.store.name} store) on "
+          f"http://{args.host}:{args.port} -> {args.origin}")
+    sys.stdout.flush()
+    try:
+        asyncio.run(proxy.serve_forever())
+    finally:
+        proxy.stats.close()
+        proxy.store.close()
+        if proxy.policy is not None:
+            summary = proxy.stats.summary(proxy.policy)
+            save_summary(summary, "result_data/proxy_metrics.csv")
+            print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
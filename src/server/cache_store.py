@@ -0,0 +1,361 @@
+import asyncio
+import time
+
+from src.analysis.instrumentation import LatencyHistogram
+
+# Storage behind the caching proxy: where cached response bodies live.
+#
+# The policy (src/models/cache_policies.py) decides what is cached; a store only
+# holds the bytes and the size (KB) each entry is accounted at. Two backends:
+#
+#   MemoryStore   a dict in this process (the default)
+#   RedisStore    a Redis server shared by several proxy processes; one pooled
+#                 client, reads batched into MGET, writes and evictions batched
+#                 into pipelined Lua scripts that keep a per-entry size hash and
+#                 a running total, so `used` is exact however many processes write
+#
+# Both keep per-operation latency histograms (store.timings).
+#
+#   store = build_store("redis://127.0.0.1:6379/0")
+#   if store.admit(policy, "/videos_1.dat", body, 1200):   # policy picks the victims
+#       store.get("/videos_1.dat")
+#
+# The Redis server should run with maxmemory-policy noeviction: evictions are
+# the policy's, and an entry Redis dropped on its own would still be counted.
+#
+# The capacity is not shared. Each proxy's policy admits against its own budget
+# and only evicts what it admitted itself, so N proxies on one Redis prefix can
+# store up to N x capacity between them (`used` reports the shared total, the
+# policy's used its own share). Give each proxy capacity / N for a global budget.
+
+STORE_BACKENDS = ("memory", "redis")
+REDIS_URL = "redis://127.0.0.1:6379/0"
+KEY_PREFIX = "webcache"
+MAX_CONNECTIONS = 64
+PIPELINE_BATCH = 512  # entries per MGET / script call
+
+# KEYS: size hash, used counter, entry keys; ARGV: (field, value, size) per entry
+PUT_SCRIPT = """
+local delta = 0
+for i = 3, #KEYS do
+    local n = (i - 3) * 3
+    local previous = redis.call('HGET', KEYS[1], ARGV[n + 1])
+    redis.call('SET', KEYS[i], ARGV[n + 2])
+    redis.call('HSET', KEYS[1], ARGV[n + 1], ARGV[n + 3])
+    delta = delta + tonumber(ARGV[n + 3]) - (tonumber(previous) or 0)
+end
+return redis.call('INCRBYFLOAT', KEYS[2], delta)
+"""
+
+# KEYS: size hash, used counter, entry keys; ARGV: field per entry
+DELETE_SCRIPT = """
+local delta = 0
+for i = 3, #KEYS do
+    local size = redis.call('HGET', KEYS[1], ARGV[i - 2])
+    if size then
+        delta = delta + tonumber(size)
+        redis.call('HDEL', KEYS[1], ARGV[i - 2])
+    end
+    redis.call('DEL', KEYS[i])
+end
+return redis.call('INCRBYFLOAT', KEYS[2], -delta)
+"""
+
+
+class CacheStoreError(Exception):
+    pass
+
+
+# Calls, keys, errors and a latency histogram per store operation
+class StoreTimings:
+    def __init__(self):
+        self.operations = {}
+
+    def _entry(self, operation):
+        entry = self.operations.get(operation)
+        if entry is None:
+            entry = self.operations[operation] = {"calls": 0, "keys": 0, "errors": 0,
+                                                  "latency": LatencyHistogram(min_value=1e-8)}
+        return entry
+
+    def record(self, operation, elapsed, keys=1):
+        entry = self._entry(operation)
+        entry["calls"] += 1
+        entry["keys"] += keys
+        entry["latency"].record(elapsed)
+
+    def error(self, operation):
+        self._entry(operation)["errors"] += 1
+
+    # {operation: {calls, keys, errors, mean/p50/p99/max in microseconds}}
+    def summary(self):
+        report = {}
+        for operation, entry in self.operations.items():
+            latency = entry["latency"]
+            report[operation] = {
+                "calls": entry["calls"], "keys": entry["keys"], "errors": entry["errors"],
+                "mean_us": latency.mean() * 1e6, "p50_us": latency.percentile(50) * 1e6,
+                "p99_us": latency.percentile(99) * 1e6, "max_us": latency.max * 1e6,
+            }
+        return report
+
+
+# Base class: timing and error translation around the backend's _methods.
+# Keys are resource paths, values bytes, sizes KB.
+class CacheStore:
+    name = "store"
+    blocking = False  # calls wait on the network (keep them off the event loop)
+    shared = False    # entries are visible to other processes
+    errors = ()       # backend exceptions raised as CacheStoreError
+
+    def __init__(self):
+        self.timings = StoreTimings()
+
+    def _timed(self, operation, keys, method, *args):
+        start = time.perf_counter()
+        try:
+            result = method(*args)
+        except self.errors as e:
+            self.timings.error(operation)
+            raise CacheStoreError(f"{self.name} {operation} failed: {e}") from e
+        self.timings.record(operation, time.perf_counter() - start, keys)
+        return result
+
+    # Value of key, or None
+    def get(self, key):
+        return self._timed("get", 1, self._get, key)
+
+    # Values of keys (None where missing), in order
+    def get_many(self, keys):
+        return self._timed("get_many", len(keys), self._get_many, keys)
+
+    def put(self, key, value, size):
+        self._timed("put", 1, self._put_many, [(key, value, size)])
+
+    # items: (key, value, size) tuples
+    def put_many(self, items):
+        self._timed("put_many", len(items), self._put_many, items)
+
+    def delete(self, keys):
+        if keys:
+            self._timed("delete", len(keys), self._delete, keys)
+
+    # Drop `evicted` and store key in one backend round trip
+    def replace(self, evicted, key, value, size):
+        self._timed("replace", len(evicted) + 1, self._replace, evicted, key, value, size)
+
+    # Admit key under policy: the policy picks the victims by size against its
+    # capacity, the store drops them and keeps the value. False if declined
+    def admit(self, policy, key, value, size):
+        evicted = policy.admit(key, size)
+        if evicted is None:
+            return False
+        self.replace(evicted, key, value, size)
+        return True
+
+    def clear(self):
+        self._timed("clear", 0, self._clear)
+
+    # KB accounted to the stored entries
+    @property
+    def used(self):
+        return self._timed("used", 0, self._used)
+
+    def __len__(self):
+        return self._timed("len", 0, self._len)
+
+    def _replace(self, evicted, key, value, size):
+        self._delete(evicted)
+        self._put_many([(key, value, size)])
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {"backend": self.name, "operations": self.timings.summary()}
+
+
+class MemoryStore(CacheStore):
+    name = "memory"
+
+    def __init__(self):
+        super().__init__()
+        self.entries = {}
+        self.used_kb = 0.0
+
+    def _get(self, key):
+        entry = self.entries.get(key)
+        return None if entry is None else entry[0]
+
+    def _get_many(self, keys):
+        entries = self.entries
+        return [entry[0] if entry is not None else None for entry in map(entries.get, keys)]
+
+    def _put_many(self, items):
+        entries = self.entries
+        for key, value, size in items:
+            previous = entries.get(key)
+            if previous is not None:
+                self.used_kb -= previous[1]
+            entries[key] = (value, size)
+            self.used_kb += size
+
+    def _delete(self, keys):
+        for key in keys:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.used_kb -= entry[1]
+
+    def _clear(self):
+        self.entries = {}
+        self.used_kb = 0.0
+
+    def _used(self):
+        return self.used_kb
+
+    def _len(self):
+        return len(self.entries)
+
+
+class RedisStore(CacheStore):
+    name = "redis"
+    blocking = True
+    shared = True
+
+    def __init__(self, url=REDIS_URL, prefix=KEY_PREFIX, max_connections=MAX_CONNECTIONS,
+                 batch=PIPELINE_BATCH, client=None):
+        # Imported here so the memory backend works without redis-py
+        import redis
+
+        super().__init__()
+        self.errors = (redis.RedisError,)
+        self.pool = None
+        if client is None:
+            self.pool = redis.ConnectionPool.from_url(url, max_connections=max_connections)
+            client = redis.Redis(connection_pool=self.pool)
+        self.client = client
+        self.prefix = prefix
+        self.batch = batch
+        self.sizes_key = f"{prefix}:sizes"
+        self.used_key = f"{prefix}:used"
+        self._put_script = client.register_script(PUT_SCRIPT)
+        self._delete_script = client.register_script(DELETE_SCRIPT)
+
+    def _key(self, key):
+        return f"{self.prefix}:entry:{key}"
+
+    def _get(self, key):
+        return self.client.get(self._key(key))
+
+    def _get_many(self, keys):
+        values = []
+        for start in range(0, len(keys), self.batch):
+            values.extend(self.client.mget([self._key(key) for key in keys[start:start + self.batch]]))
+        return values
+
+    def _queue_put(self, pipe, items):
+        for start in range(0, len(items), self.batch):
+            chunk = items[start:start + self.batch]
+            args = []
+            for key, value, size in chunk:
+                args.extend((key, value, size))
+            self._put_script(keys=[self.sizes_key, self.used_key, *(self._key(item[0]) for item in chunk)],
+                             args=args, client=pipe)
+
+    def _queue_delete(self, pipe, keys):
+        for start in range(0, len(keys), self.batch):
+            chunk = keys[start:start + self.batch]
+            self._delete_script(keys=[self.sizes_key, self.used_key, *map(self._key, chunk)],
+                                args=chunk, client=pipe)
+
+    def _put_many(self, items):
+        with self.client.pipeline(transaction=False) as pipe:
+            self._queue_put(pipe, items)
+            pipe.execute()
+
+    def _delete(self, keys):
+        with self.client.pipeline(transaction=False) as pipe:
+            self._queue_delete(pipe, list(keys))
+            pipe.execute()
+
+    def _replace(self, evicted, key, value, size):
+        with self.client.pipeline(transaction=False) as pipe:
+            if evicted:
+                self._queue_delete(pipe, list(evicted))
+            self._queue_put(pipe, [(key, value, size)])
+            pipe.execute()
+
+    # Drop every entry under this prefix (other prefixes are left alone)
+    def _clear(self):
+        with self.client.pipeline(transaction=False) as pipe:
+            for key in self.client.scan_iter(match=f"{self.prefix}:entry:*", count=1000):
+                pipe.unlink(key)
+                if len(pipe) >= self.batch:
+                    pipe.execute()
+            pipe.delete(self.sizes_key, self.used_key)
+            pipe.execute()
+
+    def _used(self):
+        return float(self.client.get(self.used_key) or 0.0)
+
+    def _len(self):
+        return self.client.hlen(self.sizes_key)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.disconnect()
+
+
+# Store for a URL: "memory" (or None) or a redis:// / rediss:// / unix:// URL
+def build_store(url=None, prefix=KEY_PREFIX, max_connections=MAX_CONNECTIONS):
+    if url in (None, "", "memory"):
+        return MemoryStore()
+    if url.split("://", 1)[0] in ("redis", "rediss", "unix"):
+        return RedisStore(url, prefix, max_connections)
+    raise ValueError(f"Unknown cache store {url!r}; use 'memory' or a redis:// URL")
+
+
+# Asyncio front of a store. Blocking calls run on the default executor, and the
+# gets issued during one event-loop turn are coalesced into one get_many (MGET).
+class AsyncStore:
+    def __init__(self, store):
+        self.store = store
+        self._waiting = {}
+        self._scheduled = False
+
+    async def get(self, key):
+        if not self.store.blocking:
+            return self.store.get(key)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiting.setdefault(key, []).append(future)
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._flush, loop)
+        return await future
+
+    def _flush(self, loop):
+        waiting, self._waiting = self._waiting, {}
+        self._scheduled = False
+        keys = list(waiting)
+        done = loop.run_in_executor(None, self.store.get_many, keys)
+        done.add_done_callback(lambda result: self._resolve(waiting, keys, result))
+
+    @staticmethod
+    def _resolve(waiting, keys, result):
+        error = result.exception()
+        values = [None] * len(keys) if error is not None else result.result()
+        for key, value in zip(keys, values):
+            for future in waiting[key]:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(value)
+
+    # Run a store method (e.g. store.replace) without blocking the event loop
+    async def call(self, method, *args):
+        if not self.store.blocking:
+            return method(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, method, *args)
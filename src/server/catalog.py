@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+# Immutable view of a single catalogued resource
+Resource = namedtuple("Resource", ["size", "latency"])
+
+
+# In-memory index of web_resources.json that only re-parses the file when it changes.
+#
+# Every lookup compares the file's (inode, mtime, size) stamp against the one the
+# current index was built from. Writers replace the file atomically (new inode), so
+# a changed stamp means a complete new file is in place. If a reload still fails
+# (e.g. a non-atomic writer was caught mid-write) the previous index keeps serving.
+class ResourceCatalog:
+    def __init__(self, path, check_interval=0.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.version = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._index = MappingProxyType({})
+        self._next_check = 0.0
+
+    # Identity of the file on disk: a new inode or mtime means new contents
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    # Parse the file into a read-only mapping of resource path -> Resource
+    def _load(self):
+        with open(self.path, "r") as f:
+            raw = json.load(f)
+        return MappingProxyType({
+            name: Resource(entry["size"], entry["latency"])
+            for name, entry in raw.items()
+        })
+
+    # Rebuild the index; the swap is a single reference assignment so readers
+    # always see either the old or the new index, never a partial one
+    def reload(self, force=False):
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp is None:
+                self.last_error = f"{self.path} does not exist"
+                return False
+            if not force and stamp == self._stamp:
+                return False
+            try:
+                index = self._load()
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                self.last_error = str(e)
+                return False
+            self._index = index
+            self._stamp = stamp
+            self.version += 1
+            self.last_error = None
+            return True
+
+    # Current index, reloaded first if the file on disk has changed
+    def snapshot(self, now=None):
+        if self.check_interval > 0:
+            if now is None:
+                now = time.monotonic()
+            if now < self._next_check:
+                return self._index
+            self._next_check = now + self.check_interval
+
+        if self._file_stamp() != self._stamp:
+            self.reload()
+        return self._index
+
+    def get(self, resource_path):
+        return self.snapshot().get(resource_path)
+
+    def __len__(self):
+        return len(self._index)
+
+
+# Write a catalog dict atomically so readers never observe a half-written file
+def write_catalog(path, web_resources):
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(web_resources, f, indent=4)
+    os.replace(tmp_path, path)
@@ -0,0 +1,162 @@
+import functools
+import hashlib
+import mmap
+import threading
+
+# Real byte payloads for the origin servers.
+#
+# Resource bodies are never allocated per request. Payload content is a repeating
+# 256-byte pattern, so the byte at offset k of any resource is k % 256:
+#   - the asyncio server writes memoryview slices of one anonymous memory map sized
+#     to the largest catalogued resource (a Range is a narrower slice of the same map)
+#   - WSGI requires `bytes`, so the Flask server streams immutable chunks cut once
+#     from a pattern block and memoized by (phase, length); a full-body response
+#     reuses the same chunk objects for every request
+
+BYTES_PER_KB = 1024
+CONTENT_TYPE = "application/octet-stream"
+PATTERN = bytes(range(256))
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class PayloadStore:
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._buffer = None
+        self._view = memoryview(b"")
+        self._etags = {}
+
+    # Grow the shared buffer when the catalog gains a larger resource
+    def _ensure_capacity(self, length):
+        if length <= len(self._view):
+            return
+        with self._lock:
+            if length <= len(self._view):
+                return
+            largest = max((entry.size for entry in self.catalog.snapshot().values()), default=0)
+            capacity = max(length, int(largest * BYTES_PER_KB))
+            buffer = mmap.mmap(-1, capacity)
+            # Fill with the repeating pattern, doubling the filled prefix each pass
+            pattern = PATTERN[:capacity]
+            buffer[:len(pattern)] = pattern
+            filled = len(pattern)
+            while filled < capacity:
+                step = min(filled, capacity - filled)
+                buffer[filled:filled + step] = buffer[:step]
+                filled += step
+            # Older views stay valid for in-flight responses; the old map is
+            # released once nothing references it
+            self._buffer = buffer
+            self._view = memoryview(buffer)
+
+    # Bytes [start, end) of a payload as a zero-copy view
+    def view(self, start, end):
+        self._ensure_capacity(end)
+        return self._view[start:end]
+
+    # Bytes [start, end) of a payload as a sequence of shared, immutable chunks
+    def iter_bytes(self, start, end):
+        offset = start
+        while offset < end:
+            length = min(CHUNK_SIZE, end - offset)
+            yield _pattern_chunk(offset % len(PATTERN), length)
+            offset += length
+
+    # Strong validator derived from the resource identity alone: the payload bytes
+    # depend only on the size, so path + size name the content. It survives
+    # reloads that leave the resource unchanged and is the same in every process.
+    # Memoized per (path, size) so it is hashed once per resource
+    def etag(self, resource_path, entry):
+        key = (resource_path, entry.size)
+        etag = self._etags.get(key)
+        if etag is None:
+            digest = hashlib.blake2b(f"{resource_path}:{entry.size}".encode(), digest_size=8)
+            etag = f'"{digest.hexdigest()}"'
+            self._etags[key] = etag
+        return etag
+
+
+_PATTERN_BLOCK = PATTERN * (CHUNK_SIZE // len(PATTERN) + 1)
+
+
+# A pattern chunk starting at `phase` within the 256-byte period
+@functools.lru_cache(maxsize=1024)
+def _pattern_chunk(phase, length):
+    return _PATTERN_BLOCK[phase:phase + length]
+
+
+# Payload length in bytes for a catalogued resource
+def payload_length(entry):
+    return int(entry.size * BYTES_PER_KB)
+
+
+# True when an If-None-Match header matches the current validator
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+# Parse a single `bytes=` range into an inclusive (start, end) pair.
+# Returns None when the header is absent or not something we honour (multi-range,
+# other units), in which case the full body is served.
+def parse_range(range_header, length):
+    if not range_header:
+        return None
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            suffix = int(last)
+            if suffix <= 0:
+                raise RangeNotSatisfiable()
+            return max(0, length - suffix), length - 1
+        start = int(first)
+        end = int(last) if last else length - 1
+    except ValueError:
+        return None
+    if start >= length or end < start:
+        raise RangeNotSatisfiable()
+    return start, min(end, length - 1)
+
+
+# Resolve a payload GET into (status, headers, start, end) shared by both origin
+# servers; [start, end) is the byte span of the body to send
+def resolve_payload(store, resource_path, entry, if_none_match=None, range_header=None):
+    etag = store.etag(resource_path, entry)
+    headers = {"ETag": etag, "Accept-Ranges": "bytes"}
+
+    if etag_matches(if_none_match, etag):
+        return 304, headers, 0, 0
+
+    length = payload_length(entry)
+    try:
+        byte_range = parse_range(range_header, length)
+    except RangeNotSatisfiable:
+        headers["Content-Range"] = f"bytes */{length}"
+        return 416, headers, 0, 0
+
+    headers["Content-Type"] = CONTENT_TYPE
+    if byte_range is None:
+        return 200, headers, 0, length
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{length}"
+    return 206, headers, start, end + 1
@@ -1,54 +1,117 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
+import argparse
+import atexit
+import sys
 import time
-import json
 import os
 
-app = Flask(__name__)
+from src.analysis import instrumentation
+from src.server.catalog import ResourceCatalog
+from src.server.payloads import PayloadStore, resolve_payload
 
-# Ensure necessary folders exist
-os.makedirs("result_data", exist_ok=True)
-os.makedirs("result_visuals", exist_ok=True)
-os.makedirs("logs", exist_ok=True)
-os.makedirs("interim_data", exist_ok=True)
+app = Flask(__name__)
 
 # Path to dynamic resource file
 RESOURCE_FILE = "interim_data/web_resources.json"
 
-# Wait for web_resources.json if it doesn't exist yet
-for _ in range(10):
-    if os.path.exists(RESOURCE_FILE):
-        break
-    print("Waiting for web_resources.json...")
-    time.sleep(0.5)
+# Catalog is parsed on the first request and only reloaded when the file is
+# replaced; importing this module (e.g. from a WSGI server) touches no files
+catalog = ResourceCatalog(RESOURCE_FILE)
+
+# When enabled, respond with real bytes (size KB) instead of a JSON description
+SERVE_PAYLOADS = False
+payloads = PayloadStore(catalog)
+
+# Stream the resource body from the shared payload buffer (supports Range / If-None-Match)
+def payload_response(resource_path, entry):
+    status, headers, start, end = resolve_payload(
+        payloads, resource_path, entry,
+        if_none_match=request.headers.get("If-None-Match"),
+        range_header=request.headers.get("Range"),
+    )
+    headers["Content-Length"] = str(end - start)
+    return Response(payloads.iter_bytes(start, end), status=status, headers=headers,
+                    direct_passthrough=True)
+
+# Request latency histogram and status counters (WEBCACHE_PROFILE=1), written to
+# logs/flask_profile.json when the server exits
+if instrumentation.ENABLED:
+    @app.before_request
+    def start_timer():
+        g.started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        instrumentation.observe("origin.request", time.perf_counter() - g.started)
+        instrumentation.count(f"origin.status.{response.status_code}")
+        return response
+
+    atexit.register(instrumentation.write_report, "logs/flask_profile.json", server="flask")
+
+# Force a catalog reload without waiting for the file to change
+@app.route('/admin/reload', methods=['POST'])
+def reload_catalog():
+    catalog.reload(force=True)
+    if catalog.last_error is not None:
+        return jsonify({
+            "error": "Resource file could not be loaded",
+            "details": catalog.last_error
+        }), 500
+
+    return jsonify({"version": catalog.version, "resources": len(catalog)})
 
 @app.route('/<path:resource>', methods=['GET'])
 def serve_resource(resource):
     resource_path = f"/{resource}"
 
-    try:
-        with open(RESOURCE_FILE, "r") as f:
-            web_resources = json.load(f)
-    except Exception as e:
+    web_resources = catalog.snapshot()
+    if not web_resources and catalog.last_error is not None:
         return jsonify({
             "error": "Resource file could not be loaded",
-            "details": str(e)
+            "details": catalog.last_error
         }), 500
 
-    if resource_path in web_resources:
-        time.sleep(web_resources[resource_path]["latency"])  # Simulate network delay
+    entry = web_resources.get(resource_path)
+    if entry is not None:
+        time.sleep(entry.latency)  # Simulate network delay
+        instrumentation.count("origin.simulated_latency_s", entry.latency)
+        if SERVE_PAYLOADS:
+            return payload_response(resource_path, entry)
         return jsonify({
             "message": f"Served {resource_path}",
-            "size": web_resources[resource_path]["size"]
+            "size": entry.size
         })
 
     return jsonify({"error": "Resource not found"}), 404
 
-if __name__ == '__main__':
-    # Log to server_runtime.log
+# Create the run folders, wait (up to 5 s) for web_resources.json and load it
+def prepare():
+    for directory in ("result_data", "result_visuals", "logs", "interim_data"):
+        os.makedirs(directory, exist_ok=True)
+
+    for _ in range(10):
+        if os.path.exists(RESOURCE_FILE):
+            break
+        print("Waiting for web_resources.json...")
+        time.sleep(0.5)
+    catalog.reload()
+
+def main(argv=None):
+    global SERVE_PAYLOADS
     from werkzeug.serving import WSGIRequestHandler
-    import sys
 
+    parser = argparse.ArgumentParser(description="Flask origin server")
+    parser.add_argument("--payload", action="store_true",
+                        help="serve real payloads of the catalogued size instead of JSON")
+    args = parser.parse_args(argv)
+    SERVE_PAYLOADS = args.payload
+    prepare()
+
+    # Log to server_runtime.log
     sys.stdout = open("logs/server_runtime.log", "w")
     sys.stderr = sys.stdout
     WSGIRequestHandler.protocol_version = "HTTP/1.1"
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from src.server.async_server import AsyncOriginServer
+from src.server.catalog import ResourceCatalog, write_catalog
+
+# Request bodies on the origin: a malformed Content-Length is a 400, a truncated
+# body a disconnect; neither leaves the connection task failing.
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = str(tmp_path / "web_resources.json")
+    write_catalog(path, {"/page.html": {"size": 4, "latency": 0.0}})
+    return ResourceCatalog(path)
+
+
+def exchange(catalog, request, half_close=False):
+    async def run():
+        errors = []
+        loop = asyncio.get_running_loop()
+        loop.set_exception_handler(lambda _, context: errors.append(context))
+        server = AsyncOriginServer(catalog, port=0)
+        listener = await server.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(request)
+        if half_close:
+            writer.write_eof()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        listener.close()
+        await asyncio.sleep(0)
+        return response, errors
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("length", ["abc", "-1"])
+def test_malformed_content_length_is_a_400(catalog, length):
+    request = f"GET /page.html HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode()
+    response, errors = exchange(catalog, request)
+    assert response.startswith(b"HTTP/1.1 400")
+    assert errors == []
+
+
+def test_truncated_body_closes_the_connection(catalog):
+    response, errors = exchange(catalog, b"GET /page.html HTTP/1.1\r\nContent-Length: 10\r\n\r\nabc",
+                                half_close=True)
+    assert response == b""
+    assert errors == []
+
+
+def test_body_is_discarded(catalog):
+    response, _ = exchange(catalog, b"GET /page.html HTTP/1.1\r\nContent-Length: 3\r\n"
+                                    b"Connection: close\r\n\r\nabc")
+    assert response.startswith(b"HTTP/1.1 200")
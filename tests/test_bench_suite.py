@@ -0,0 +1,44 @@
+import copy
+import json
+
+import pytest
+
+from src.benchmarks import bench_suite
+
+# The benchmark suite is deterministic for a seed: the small catalogs reproduce
+# the hit metrics of the stored baseline, and compare() reports what changed.
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    with open(bench_suite.BASELINE_FILE) as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def report(baseline):
+    return bench_suite.run(sizes=[100, 1000], seed=baseline["seed"],
+                           requests_per_object=baseline["requests_per_object"],
+                           max_requests=baseline["max_requests"], min_time=0)
+
+
+def test_small_catalogs_reproduce_the_baseline_hit_metrics(report, baseline):
+    assert {(entry["method"], entry["objects"]) for entry in report["results"]} == \
+        {(method, objects) for method in bench_suite.METHODS for objects in (100, 1000)}
+    # Runtimes are only comparable on the recording machine
+    assert bench_suite.compare(report, baseline, tolerance=float("inf")) == []
+
+
+def test_compare_reports_slowdowns_and_changed_hits(report):
+    changed = copy.deepcopy(report)
+    changed["results"][0]["runtime_s"] *= 2
+    changed["results"][1]["hit_rate"] += 0.5
+
+    regressions = bench_suite.compare(changed, report, tolerance=0.25)
+    assert len(regressions) == 2
+    assert "runtime_s" in regressions[0] and "(+100%)" in regressions[0]
+    assert "hit_rate" in regressions[1]
+
+    changed["seed"] += 1
+    assert bench_suite.compare(changed, report) == [
+        "workload settings differ from the baseline (seed / requests); nothing compared"]
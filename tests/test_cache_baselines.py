@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from src.models.cache_baselines import knapsack_caching, lfu_caching, lru_caching
+
+# The trace-driven baselines replay request_sequence(df, seed) when no trace is
+# given, so a seed fixes their cache contents; the greedy knapsack is a first
+# fit by value ratio that leaves the caller's frame alone.
+
+
+def catalog():
+    return pd.DataFrame({"resource": [f"/r{i}.html" for i in range(40)],
+                         "frequency": [(i % 7) + 1 for i in range(40)],
+                         "size": [(i % 5) + 1 for i in range(40)]})
+
+
+def test_default_sequence_follows_the_seed():
+    df = catalog()
+    for baseline in (lru_caching, lfu_caching):
+        assert baseline(df, 20, seed=3) == baseline(df, 20, seed=3)
+        assert any(baseline(df, 20, seed=3) != baseline(df, 20, seed=seed) for seed in range(4, 10))
+
+
+def test_knapsack_caching_matches_a_sequential_first_fit():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"resource": [f"/r{i}.dat" for i in range(300)],
+                       "frequency": rng.integers(1, 50, 300),
+                       "size": rng.integers(1, 200, 300),
+                       "latency": rng.uniform(0.05, 2.0, 300).round(2)})
+    before = df.copy()
+    capacity = int(df["size"].sum() * 0.1)
+
+    # The loop the vectorized version replaced
+    ranked = df.assign(value_ratio=(df["frequency"] / df["size"]) * (1 / df["latency"] + 1))
+    expected, used = [], 0
+    for _, row in ranked.sort_values(by="value_ratio", ascending=False).iterrows():
+        if used + row["size"] <= capacity:
+            expected.append(row["resource"])
+            used += row["size"]
+
+    assert knapsack_caching(df, capacity) == expected
+    pd.testing.assert_frame_equal(df, before)
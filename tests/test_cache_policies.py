@@ -0,0 +1,104 @@
+import os
+import subprocess
+import sys
+
+from src.models.cache_policies import CountMinSketch, LFUPolicy, LRUPolicy
+
+# Eviction order of the online policies and the TinyLFU admission sketch.
+
+
+def test_lru_evicts_least_recently_used_by_size():
+    policy = LRUPolicy(capacity=10)
+    for key in "abc":
+        policy.access(key, 3)
+    policy.lookup("a")
+
+    assert policy.admit("d", 5) == ["b", "c"]
+    assert list(policy.entries) == ["a", "d"] and policy.used == 8
+    assert policy.admit("huge", 11) is None
+
+
+def test_lfu_evicts_lowest_count_then_oldest():
+    policy = LFUPolicy(capacity=3)
+    for key in "abc":
+        policy.access(key, 1)
+    for key in "aab":
+        policy.lookup(key)
+
+    # counts: a=3, b=2, c=1
+    assert list(policy.ordered_keys()) == ["c", "b", "a"]
+    assert policy.admit("d", 1) == ["c"]
+    # The newcomer starts at count 1, below b
+    assert list(policy.ordered_keys()) == ["d", "b", "a"]
+    assert policy.admit("e", 2) == ["d", "b"]
+    assert sorted(policy.entries) == ["a", "e"] and policy.used == 3
+
+
+def test_lfu_ties_break_least_recently_used():
+    policy = LFUPolicy(capacity=2)
+    policy.access("a", 1)
+    policy.access("b", 1)
+    policy.lookup("a")
+    policy.lookup("b")
+
+    assert policy.admit("c", 1) == ["a"]
+
+
+def test_lfu_decay_halves_counts_and_keeps_order():
+    policy = LFUPolicy(capacity=10, decay_interval=1000)
+    policy.access("a", 1)
+    policy.access("b", 1)
+    for _ in range(4):
+        policy.lookup("a")
+    policy.lookup("b")
+
+    policy.decay()
+    counts = {key: entry[0].count for key, entry in policy.entries.items()}
+    assert counts == {"a": 3, "b": 1}
+    assert list(policy.ordered_keys()) == ["b", "a"]
+
+
+def test_count_min_sketch_counts_saturate_and_halve():
+    sketch = CountMinSketch(width=1024, sample_size=10**6)
+    for _ in range(20):
+        sketch.increment("hot")
+    for _ in range(3):
+        sketch.increment("warm")
+
+    assert sketch.estimate("hot") == CountMinSketch.MAX_COUNT
+    assert sketch.estimate("warm") == 3
+    assert sketch.estimate("cold") == 0
+    sketch.halve()
+    assert (sketch.estimate("hot"), sketch.estimate("warm")) == (7, 1)
+
+
+def test_count_min_sketch_indexes_do_not_depend_on_the_hash_seed():
+    code = ("from src.models.cache_policies import CountMinSketch; "
+            "print(CountMinSketch(4096)._indexes('/r1.html'), CountMinSketch(4096)._indexes(17))")
+    outputs = set()
+    for seed in ("1", "2"):
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        outputs.add(subprocess.run([sys.executable, "-c", code], env=env, capture_output=True,
+                                   text=True, check=True).stdout)
+    assert len(outputs) == 1
+
+    indexes = CountMinSketch(4096)._indexes("/r1.html")
+    assert len(set(indexes)) > 1  # the rows hash independently
+
+
+def test_tinylfu_admits_only_keys_more_popular_than_the_victim():
+    policy = LFUPolicy(capacity=2, admission="tinylfu")
+    for key in "ab":
+        policy.access(key, 1)
+    for _ in range(3):
+        policy.lookup("a")
+        policy.lookup("b")
+
+    # One request for a newcomer is not enough to displace b
+    assert not policy.access("c", 1)
+    assert "c" not in policy and sorted(policy.entries) == ["a", "b"]
+
+    # Once the sketch has seen c more often than the victim it is admitted
+    for _ in range(4):
+        policy.access("c", 1)
+    assert "c" in policy and len(policy) == 2
@@ -0,0 +1,72 @@
+import asyncio
+import csv
+
+import pytest
+
+from src.server.cache_proxy import CachingProxy
+from src.server.catalog import ResourceCatalog, write_catalog
+
+# CachingProxy over a recording origin: misses coalesce on the path (whatever
+# query strings they carried), the log is keyed by path, and a malformed request
+# head is answered with 400.
+
+
+class RecordingOrigin:
+    def __init__(self):
+        self.targets = []
+
+    async def fetch(self, target, request_headers=None):
+        self.targets.append(target)
+        await asyncio.sleep(0.01)
+        return 200, {"content-type": "text/plain"}, f"body of {target}".encode()
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = str(tmp_path / "web_resources.json")
+    # Capacity is CACHE_FRACTION of the total size: room for /x.dat, not /big.dat
+    write_catalog(path, {"/x.dat": {"size": 1, "latency": 0.0}, "/big.dat": {"size": 100, "latency": 0.0}})
+    return ResourceCatalog(path)
+
+
+# Send raw requests over one connection to a started proxy; returns the raw response
+def exchange(proxy, request):
+    async def run():
+        listener = await proxy.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", proxy.port)
+        writer.write(request)
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        listener.close()
+        return response
+    return asyncio.run(run())
+
+
+def test_misses_with_different_queries_share_one_path_fetch(catalog):
+    proxy = CachingProxy(catalog, "LRU")
+    proxy.origin = RecordingOrigin()
+
+    async def requests():
+        return await asyncio.gather(proxy.serve_resource("/x.dat?a", {}),
+                                    proxy.serve_resource("/x.dat?b", {}))
+    responses = asyncio.run(requests())
+
+    assert proxy.origin.targets == ["/x.dat"]
+    assert [body for _, (_, _, body), _ in responses] == [b"body of /x.dat"] * 2
+
+
+def test_log_records_the_path(catalog, tmp_path):
+    log_path = str(tmp_path / "proxy.csv")
+    proxy = CachingProxy(catalog, "LRU", port=0, log_path=log_path)
+    proxy.origin = RecordingOrigin()
+    exchange(proxy, b"GET /x.dat?a HTTP/1.1\r\n\r\nGET /x.dat?b HTTP/1.1\r\nConnection: close\r\n\r\n")
+    proxy.stats.close()
+
+    with open(log_path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["resource"], row["cache"]) for row in rows] == [("/x.dat", "MISS"), ("/x.dat", "HIT")]
+
+
+def test_malformed_request_head_is_a_400(catalog):
+    proxy = CachingProxy(catalog, "LRU", port=0)
+    assert exchange(proxy, b"GARBAGE\r\n\r\n").startswith(b"HTTP/1.1 400")
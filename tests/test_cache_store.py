@@ -0,0 +1,123 @@
+import asyncio
+
+import fakeredis
+import lupa  # noqa: F401 (fakeredis runs the Lua scripts with it; without it this module must fail, not skip)
+import pytest
+
+from src.models.cache_policies import build_policy
+from src.server.cache_store import AsyncStore, CacheStoreError, RedisStore
+
+# RedisStore against fakeredis: the Lua PUT/DELETE scripts, the INCRBYFLOAT size
+# accounting, _clear and the AsyncStore MGET coalescing.
+#
+#   pip install -r requirements-test.txt
+#   python -m pytest -q tests
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def redis_store(server, prefix="test", batch=512):
+    return RedisStore(prefix=prefix, batch=batch, client=fakeredis.FakeRedis(server=server))
+
+
+def test_put_accounts_sizes(server):
+    store = redis_store(server)
+    store.put("/a.dat", b"a" * 10, 10)
+    store.put_many([("/b.dat", b"b", 20.5), ("/c.dat", b"c", 1.25)])
+    assert store.used == pytest.approx(31.75)
+    assert len(store) == 3
+    assert store.get("/a.dat") == b"a" * 10
+    assert store.get_many(["/c.dat", "/missing.dat", "/b.dat"]) == [b"c", None, b"b"]
+
+    # Rewriting an entry replaces its size instead of adding to it
+    store.put("/a.dat", b"a", 4)
+    assert store.used == pytest.approx(25.75)
+    assert len(store) == 3
+
+
+def test_delete_and_replace(server):
+    store = redis_store(server)
+    store.put_many([("/a.dat", b"a", 10), ("/b.dat", b"b", 20)])
+    store.delete(["/a.dat", "/missing.dat"])
+    assert store.used == pytest.approx(20)
+    assert store.get("/a.dat") is None and len(store) == 1
+
+    store.replace(["/b.dat"], "/c.dat", b"c", 7)
+    assert store.used == pytest.approx(7)
+    assert store.get_many(["/b.dat", "/c.dat"]) == [None, b"c"]
+
+
+def test_batches_split_across_script_calls(server):
+    store = redis_store(server, batch=2)
+    items = [(f"/{i}.dat", str(i).encode(), i + 0.5) for i in range(5)]
+    store.put_many(items)
+    assert store.used == pytest.approx(sum(size for _, _, size in items))
+    assert store.get_many([key for key, _, _ in items]) == [value for _, value, _ in items]
+    store.delete([key for key, _, _ in items])
+    assert store.used == pytest.approx(0) and len(store) == 0
+
+
+def test_admit_matches_policy(server):
+    store = redis_store(server)
+    policy = build_policy("LRU", 30)
+    for key, size in [("/a.dat", 10), ("/b.dat", 15), ("/c.dat", 12), ("/a.dat", 10), ("/d.dat", 40)]:
+        if not policy.lookup(key):
+            store.admit(policy, key, key.encode(), size)
+    assert store.used == pytest.approx(policy.used)
+    assert len(store) == len(policy.entries)
+    assert store.get("/d.dat") is None
+
+
+def test_stores_on_one_server_share_entries(server):
+    first, second = redis_store(server), redis_store(server)
+    first.put("/a.dat", b"a", 10)
+    second.put("/b.dat", b"b", 5)
+    assert first.get("/b.dat") == b"b" and second.get("/a.dat") == b"a"
+    assert first.used == second.used == pytest.approx(15)
+
+
+def test_clear_keeps_other_prefixes(server):
+    store, other = redis_store(server), redis_store(server, prefix="other")
+    store.put_many([(f"/{i}.dat", b"x", 1) for i in range(5)])
+    other.put("/a.dat", b"a", 3)
+    store.batch = 2  # _clear flushes its pipeline every `batch` unlinks
+    store.clear()
+    assert store.used == 0.0 and len(store) == 0
+    assert store.get_many(["/0.dat", "/4.dat"]) == [None, None]
+    assert other.get("/a.dat") == b"a" and other.used == pytest.approx(3)
+
+
+def test_errors_raise_cache_store_error(server):
+    store = redis_store(server)
+    server.connected = False
+    with pytest.raises(CacheStoreError):
+        store.put("/a.dat", b"a", 1)
+    assert store.timings.summary()["put"]["errors"] == 1
+
+
+def test_async_gets_coalesce_into_one_mget(server):
+    store = redis_store(server)
+    store.put_many([("/a.dat", b"a", 1), ("/b.dat", b"b", 2)])
+    io = AsyncStore(store)
+
+    async def gets():
+        return await asyncio.gather(io.get("/a.dat"), io.get("/b.dat"), io.get("/a.dat"), io.get("/c.dat"))
+
+    assert asyncio.run(gets()) == [b"a", b"b", b"a", None]
+    operations = store.timings.summary()
+    assert "get" not in operations
+    assert operations["get_many"]["calls"] == 1 and operations["get_many"]["keys"] == 3
+
+
+def test_async_get_errors_reach_every_waiter(server):
+    io = AsyncStore(redis_store(server))
+    server.connected = False
+
+    async def gets():
+        return await asyncio.gather(io.get("/a.dat"), io.get("/b.dat"), return_exceptions=True)
+
+    results = asyncio.run(gets())
+    assert all(isinstance(result, CacheStoreError) for result in results)
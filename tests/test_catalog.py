@@ -0,0 +1,50 @@
+import os
+
+from src.server.catalog import Resource, ResourceCatalog, write_catalog
+
+# ResourceCatalog parses web_resources.json once and re-parses only when the
+# file on disk changes; a broken file keeps the previous index serving.
+
+
+def test_reloads_only_when_the_file_changes(tmp_path, monkeypatch):
+    path = str(tmp_path / "web_resources.json")
+    write_catalog(path, {"/a.html": {"size": 10, "latency": 0.1}})
+    catalog = ResourceCatalog(path)
+    assert catalog.get("/a.html") == Resource(10, 0.1)
+
+    loads = []
+    load = catalog._load
+    monkeypatch.setattr(catalog, "_load", lambda: loads.append(1) or load())
+    for _ in range(5):
+        catalog.get("/a.html")
+    assert loads == [] and catalog.version == 1
+
+    write_catalog(path, {"/a.html": {"size": 10, "latency": 0.1}, "/b.html": {"size": 5, "latency": 0.2}})
+    assert catalog.get("/b.html") == Resource(5, 0.2)
+    assert loads == [1] and catalog.version == 2 and len(catalog) == 2
+
+
+def test_broken_file_keeps_the_previous_index(tmp_path):
+    path = str(tmp_path / "web_resources.json")
+    write_catalog(path, {"/a.html": {"size": 10, "latency": 0.1}})
+    catalog = ResourceCatalog(path)
+    index = catalog.snapshot()
+
+    with open(path, "w") as f:
+        f.write('{"/a.html": {"size": ')
+    assert catalog.snapshot() is index
+    assert catalog.last_error is not None
+
+    os.remove(path)
+    assert catalog.get("/a.html") == Resource(10, 0.1)
+
+
+def test_check_interval_limits_stat_calls(tmp_path):
+    path = str(tmp_path / "web_resources.json")
+    write_catalog(path, {"/a.html": {"size": 10, "latency": 0.1}})
+    catalog = ResourceCatalog(path, check_interval=1.0)
+    catalog.snapshot(now=100.0)
+
+    write_catalog(path, {"/b.html": {"size": 5, "latency": 0.2}})
+    assert "/b.html" not in catalog.snapshot(now=100.5)
+    assert "/b.html" in catalog.snapshot(now=101.0)
@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+
+from src.models import checkpoint
+from src.models.checkpoint import CheckpointStore
+
+# CheckpointStore step numbering, pruning and a latest step removed between
+# listing and reading.
+
+
+def test_save_numbers_steps_and_prunes(tmp_path):
+    store = CheckpointStore(str(tmp_path), keep=2)
+    for value in range(4):
+        store.save("sgd", {"theta": np.full(3, float(value))}, learning_rate=0.1)
+
+    assert store.steps("sgd") == [3, 4]
+    arrays, metadata = store.load("sgd")
+    assert metadata["step"] == 4 and arrays["theta"].tolist() == [3.0, 3.0, 3.0]
+    assert store.load("sgd", step=1) is None
+
+
+def test_load_looks_up_a_pruned_latest_step_again(tmp_path, monkeypatch):
+    store = CheckpointStore(str(tmp_path))
+    store.save("sgd", {"theta": np.zeros(2)})
+    store.save("sgd", {"theta": np.ones(2)})
+    read = checkpoint.read_checkpoint
+
+    # Step 2 disappears after load() listed it but before it is read
+    def removed_before_read(path):
+        monkeypatch.setattr(checkpoint, "read_checkpoint", read)
+        os.remove(path)
+        return read(path)
+    monkeypatch.setattr(checkpoint, "read_checkpoint", removed_before_read)
+
+    arrays, metadata = store.load("sgd")
+    assert metadata["step"] == 1 and arrays["theta"].tolist() == [0.0, 0.0]
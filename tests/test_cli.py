@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src import cli
+
+# The CLI imports only the chosen stage, and importing a stage module does not
+# pull in the heavy libraries it only needs once it runs. Imports are checked in
+# fresh interpreters.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIGHT_STAGES = ["serve", "proxy", "load", "workload", "preprocess", "sgd", "baselines"]
+
+
+def loaded_modules(code, tmp_path):
+    code += "; import sys, json; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=REPO_ROOT), check=True)
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+@pytest.mark.parametrize("stage", LIGHT_STAGES)
+def test_stage_import_skips_heavy_libraries(stage, tmp_path):
+    modules = loaded_modules(f"import {cli.STAGES[stage][0]}", tmp_path)
+    assert not modules & {"pandas", "matplotlib", "flask"}
+
+
+def test_cli_help_imports_no_stage(tmp_path):
+    modules = loaded_modules("from src import cli", tmp_path)
+    assert not modules & {"numpy", "pandas", "flask"}
+    assert not {module for module, _ in cli.STAGES.values()} & modules
+
+
+def test_stage_receives_its_arguments(capsys, monkeypatch):
+    monkeypatch.setattr(sys, "argv", list(sys.argv))  # main() renames the program for the stage
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["load", "--help"])
+    assert exit_info.value.code == 0
+    assert capsys.readouterr().out.startswith("usage: python -m src.cli load")
+
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["no-such-stage"])
+    assert exit_info.value.code == 2
@@ -0,0 +1,70 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.data.data_preprocessing import (
+    CATEGORY_NAMES,
+    CATEGORY_RANGES,
+    DEFAULT_RANGES,
+    category_codes,
+    draw_size_and_latency,
+    run,
+)
+
+# Vectorized preprocessing: category codes in the original if/elif priority,
+# draws inside each category's ranges, and sizes taken from the origin catalog.
+
+
+def reference_category(resource):
+    return next((name for name in CATEGORY_RANGES if name in resource), "other")
+
+
+def test_category_codes_follow_the_priority_order():
+    resources = ["/videos/small_images_thumb.jpg", "/large_images/a.png", "/scripts/app.css",
+                 "/css/site.css", "/index.html", "/videos/clip.mp4"]
+    codes = category_codes(pd.Series(resources, index=[5, 3, 9, 1, 0, 2]))
+    assert [CATEGORY_NAMES[code] for code in codes] == [reference_category(r) for r in resources]
+    assert category_codes([]).size == 0
+
+
+def test_draws_stay_inside_the_category_ranges():
+    codes = np.repeat(np.arange(len(CATEGORY_NAMES)), 2000)
+    size, latency = draw_size_and_latency(codes, np.random.default_rng(0))
+    ranges = list(CATEGORY_RANGES.values()) + [DEFAULT_RANGES]
+    for code, spec in enumerate(ranges):
+        rows = codes == code
+        low, high = spec["size_range"]
+        assert low <= size[rows].min() and size[rows].max() <= high
+        low, high = spec["latency_range"]
+        assert low <= latency[rows].min() and latency[rows].max() <= high
+
+    # Both ends of a size range can be drawn, as with the per-row randint
+    scripts = size[codes == CATEGORY_NAMES.index("scripts")]
+    assert scripts.min() == CATEGORY_RANGES["scripts"]["size_range"][0]
+    assert scripts.max() == CATEGORY_RANGES["scripts"]["size_range"][1]
+
+    again = draw_size_and_latency(codes, np.random.default_rng(0))
+    assert np.array_equal(size, again[0]) and np.array_equal(latency, again[1])
+
+
+def test_catalog_source_uses_the_served_sizes(tmp_path):
+    interim = tmp_path / "interim_data"
+    interim.mkdir()
+    pd.DataFrame({"resource": ["/videos/a.mp4", "/css/b.css", "/new.html"],
+                  "frequency": [4, 2, 1]}).to_csv(interim / "request_data.csv", index=False)
+    with open(interim / "web_resources.json", "w") as f:
+        json.dump({"/videos/a.mp4": {"size": 1234, "latency": 0.75},
+                   "/css/b.css": {"size": 7, "latency": 0.04}}, f)
+
+    df = run(str(tmp_path), seed=1, source="catalog")
+    assert df["size"].tolist()[:2] == [1234, 7] and df["latency"].tolist()[:2] == [0.75, 0.04]
+    assert DEFAULT_RANGES["size_range"][0] <= df["size"].iloc[2] <= DEFAULT_RANGES["size_range"][1]
+    saved = pd.read_csv(os.path.join(interim, "processed_request_data.csv"))
+    assert saved["size"].tolist() == df["size"].tolist()
+
+    # The default source draws every resource, and the same seed draws the same values
+    drawn = run(str(tmp_path), seed=1)
+    assert drawn["size"].iloc[0] != 1234
+    assert drawn["size"].tolist() == run(str(tmp_path), seed=1)["size"].tolist()
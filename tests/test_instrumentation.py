@@ -0,0 +1,110 @@
+import json
+import threading
+import tracemalloc
+
+import pytest
+
+from src.analysis import instrumentation
+from src.analysis.instrumentation import HISTOGRAM_EDGES, LatencyHistogram, Profiler
+
+# The profiler behind WEBCACHE_PROFILE: stage timings, counters, histograms and
+# the report, and the module functions doing nothing while it is off.
+
+
+def test_stages_counters_and_report(tmp_path):
+    profiler = Profiler()
+    for _ in range(3):
+        with profiler.stage("sgd"):
+            sum(range(10000))
+    profiler.count("sgd.retries", 4)
+    profiler.count("sgd.retries")
+    profiler.gauge("sgd.converged", True)
+    for seconds in (0.001, 0.002, 0.004):
+        profiler.observe("origin.request", seconds)
+
+    path = profiler.write(str(tmp_path / "logs" / "profile.json"), iteration=7)
+    with open(path) as f:
+        report = json.load(f)
+
+    assert report["context"] == {"iteration": 7}
+    stage = report["stages"]["sgd"]
+    assert stage["calls"] == 3 and 0 < stage["max_wall_s"] <= stage["wall_s"]
+    assert report["counters"] == {"sgd.retries": 5}
+    assert report["gauges"] == {"sgd.converged": True}
+    histogram = report["histograms"]["origin.request"]
+    assert histogram["count"] == 3 and histogram["max_s"] == 0.004
+    assert histogram["p50_s"] == pytest.approx(0.002, rel=0.01)
+
+    profiler.reset()
+    assert profiler.report()["stages"] == {} and profiler.report()["counters"] == {}
+
+
+def test_counts_from_many_threads_add_up():
+    profiler = Profiler()
+
+    def work():
+        for _ in range(1000):
+            profiler.count("requests")
+            profiler.observe("latency", 0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = profiler.report()
+    assert report["counters"]["requests"] == 8000
+    assert report["histograms"]["latency"]["count"] == 8000
+
+
+def test_allocation_tracing_reports_memory():
+    profiler = Profiler(trace_allocations=True)
+    try:
+        with profiler.stage("outer"):
+            with profiler.stage("inner"):
+                block = bytearray(4 * 1024 * 1024)
+            del block
+    finally:
+        tracemalloc.stop()
+
+    stages = profiler.report()["stages"]
+    assert stages["inner"]["alloc_peak_kb"] >= 4000
+    assert stages["outer"]["alloc_peak_kb"] >= stages["inner"]["alloc_peak_kb"]
+
+
+def test_module_functions_are_no_ops_when_disabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(instrumentation, "ENABLED", False)
+    monkeypatch.setattr(instrumentation, "PROFILER", Profiler())
+
+    def work(value):
+        return value + 1
+
+    assert instrumentation.timed("work")(work) is work
+    assert instrumentation.stage("work") is instrumentation.stage("other")
+    instrumentation.count("requests")
+    assert instrumentation.PROFILER.report()["counters"] == {}
+    assert instrumentation.write_report(str(tmp_path / "profile.json")) is None
+
+    monkeypatch.setattr(instrumentation, "ENABLED", True)
+    timed = instrumentation.timed("work")(work)
+    assert timed(1) == 2 and timed.__wrapped__ is work
+    instrumentation.count("requests")
+    report = instrumentation.PROFILER.report()
+    assert report["stages"]["work"]["calls"] == 1 and report["counters"] == {"requests": 1}
+
+
+def test_histogram_merge_and_display_buckets():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    for value in (0.0005, 0.003, 0.003):
+        first.record(value)
+    for value in (0.3, 10.0):
+        second.record(value)
+    first.merge(second)
+
+    assert first.total == 5 and first.max == 10.0
+    counts = first.bucket_counts().tolist()
+    assert len(counts) == len(HISTOGRAM_EDGES) + 1
+    assert counts[0] == 1 and counts[HISTOGRAM_EDGES.index(0.005)] == 2
+    assert counts[HISTOGRAM_EDGES.index(0.5)] == 1 and counts[-1] == 1
+    assert LatencyHistogram().percentile(99) == 0.0
@@ -0,0 +1,71 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from src.models.knapsack_solver import (
+    fractional_bound,
+    optimality_gap,
+    solve,
+    solve_branch_and_bound,
+    solve_dp,
+    solve_fptas,
+)
+
+# Exact, approximate and branch-and-bound knapsack references against brute force.
+
+
+def instance(seed, count=12):
+    rng = np.random.default_rng(seed)
+    values = rng.integers(1, 100, count).astype(np.float64)
+    sizes = rng.integers(1, 40, count).astype(np.float64)
+    return values, sizes, float(sizes.sum() // 3)
+
+
+def brute_force(values, sizes, capacity):
+    best = 0.0
+    for mask in itertools.product([False, True], repeat=len(values)):
+        mask = np.array(mask)
+        if sizes[mask].sum() <= capacity:
+            best = max(best, values[mask].sum())
+    return best
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_dp_and_branch_and_bound_are_optimal(seed):
+    values, sizes, capacity = instance(seed)
+    optimum = brute_force(values, sizes, capacity)
+
+    for solution in (solve_dp(values, sizes, capacity), solve_branch_and_bound(values, sizes, capacity)):
+        assert solution.exact and solution.value == optimum
+        assert solution.size <= capacity
+        assert solution.value == values[solution.selected].sum()
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("eps", [0.5, 0.1])
+def test_fptas_is_within_one_minus_eps(seed, eps):
+    values, sizes, capacity = instance(seed, count=60)
+    optimum = solve_dp(values, sizes, capacity).value
+    solution = solve_fptas(values, sizes, capacity, eps=eps)
+
+    assert solution.size <= capacity
+    assert (1 - eps) * optimum <= solution.value <= optimum <= solution.upper_bound
+
+
+def test_coarse_dp_stays_feasible_and_bounded():
+    values, sizes, capacity = instance(7, count=60)
+    optimum = solve_dp(values, sizes, capacity).value
+    coarse = solve_dp(values, sizes, capacity, max_cells=500)
+
+    assert not coarse.exact and coarse.size <= capacity
+    assert coarse.value <= optimum <= coarse.upper_bound
+    assert fractional_bound(values, sizes, capacity) >= optimum
+
+
+def test_solve_dispatch_and_gap():
+    values, sizes, capacity = instance(8)
+    assert solve(values, sizes, capacity).value == brute_force(values, sizes, capacity)
+    with pytest.raises(ValueError):
+        solve(values, sizes, capacity, method="simplex")
+    assert optimality_gap(90.0, 120.0) == 25.0 and optimality_gap(5.0, 0.0) == 0.0
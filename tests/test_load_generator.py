@@ -0,0 +1,85 @@
+import asyncio
+import sys
+
+import numpy as np
+import pytest
+
+from src.pipeline import load_generator, pipeline_automation
+from src.pipeline.load_generator import ConnectionPool, LatencyHistogram, generate_load
+from src.server.async_server import AsyncOriginServer, BackgroundLoop
+from src.server.catalog import ResourceCatalog, write_catalog
+
+# The asyncio load generator against a live origin on a background loop: pooled
+# keep-alive connections, both client models and the latency histogram.
+
+RESOURCES = [f"/r{i}.html" for i in range(20)]
+
+
+@pytest.fixture
+def origin(tmp_path):
+    path = str(tmp_path / "web_resources.json")
+    write_catalog(path, {name: {"size": 1, "latency": 0.0} for name in RESOURCES})
+    background = BackgroundLoop()
+    server = background.start(AsyncOriginServer(ResourceCatalog(path), port=0))
+    yield f"http://127.0.0.1:{server.port}"
+    background.stop()
+
+
+def test_pool_reuses_keep_alive_connections(origin):
+    async def run():
+        pool = ConnectionPool(origin, max_connections=4)
+        statuses = [await pool.get(RESOURCES[i % 3]) for i in range(20)]
+        statuses += await asyncio.gather(*(pool.get(name) for name in RESOURCES))
+        pool.close()
+        return statuses, pool.opened
+
+    statuses, opened = asyncio.run(run())
+    assert statuses == [200] * 40
+    assert opened <= 4
+
+
+def test_closed_loop_sends_every_request(origin):
+    report = generate_load(origin, RESOURCES, mode="closed", clients=50, requests_per_client=4,
+                           connections=8, seed=0)
+    summary = report.summary()
+
+    assert (summary["requests"], summary["ok"], summary["errors"]) == (200, 200, 0)
+    assert sum(report.resource_counts.values()) == 200
+    assert sum(summary["histogram"]["counts"]) == 200
+    assert 0 < summary["p50 (s)"] <= summary["p99 (s)"]
+
+
+def test_open_loop_needs_a_rate(origin, tmp_path, monkeypatch):
+    report = generate_load(origin, RESOURCES, mode="open", rate=2000, total_requests=100, seed=0)
+    assert report.summary()["ok"] == 100
+
+    with pytest.raises(ValueError):
+        generate_load(origin, RESOURCES, mode="open")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["pipeline_automation", "--simulate-mode", "open"])
+    with pytest.raises(SystemExit) as exit_info:
+        pipeline_automation.main()
+    assert exit_info.value.code == 2
+
+
+def test_unreachable_origin_counts_errors():
+    report = generate_load("http://127.0.0.1:9", RESOURCES, clients=3, requests_per_client=2, timeout=1)
+    assert report.summary()["errors"] == 6
+
+
+def test_zipf_paths_are_reproducible():
+    first = load_generator.zipf_paths(RESOURCES, 1000, np.random.default_rng(5))
+    second = load_generator.zipf_paths(RESOURCES, 1000, np.random.default_rng(5))
+    assert (first == second).all() and set(first) <= set(RESOURCES)
+    assert (first == RESOURCES[0]).sum() > (first == RESOURCES[1]).sum()
+
+
+def test_histogram_percentiles_are_within_precision():
+    values = np.random.default_rng(0).lognormal(-5, 1, 10000)
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    for p in (50, 95, 99):
+        assert histogram.percentile(p) == pytest.approx(np.percentile(values, p), rel=0.02)
+    assert histogram.mean() == pytest.approx(values.mean(), rel=0.02)
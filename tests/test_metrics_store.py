@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.metrics_store import MetricsStore, parse_comprehensive
+
+# The SQLite metrics store: trigger-maintained aggregates agree with the raw
+# rows, re-recording an iteration replaces it, and old text logs still parse.
+
+METRICS = ["Cache Hit Rate (%)", "Latency Reduction (%)"]
+
+
+def table(seed):
+    values = np.random.default_rng(seed).uniform(0, 100, (2, 2)).round(3)
+    return pd.DataFrame(values, index=["LRU", "SGD-Based"], columns=METRICS)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with MetricsStore(str(tmp_path / "metrics.sqlite")) as store:
+        yield store
+
+
+def test_aggregates_match_the_recorded_rows(store):
+    tables = {iteration: table(iteration) for iteration in range(1, 6)}
+    for iteration, metrics_df in tables.items():
+        assert store.record(iteration, metrics_df) == 4
+
+    summary = store.summary().set_index(["Method", "Metric"])
+    for method in ("LRU", "SGD-Based"):
+        for metric in METRICS:
+            values = np.array([metrics_df.loc[method, metric] for metrics_df in tables.values()])
+            row = summary.loc[(method, metric)]
+            assert row["Iterations"] == 5
+            assert row["Mean"] == pytest.approx(values.mean())
+            assert row["Std"] == pytest.approx(values.std(ddof=1))
+            half_width = 1.959964 * values.std(ddof=1) / np.sqrt(5)
+            assert row["CI95 High"] - row["Mean"] == pytest.approx(half_width)
+
+    averages = store.averages().set_index("Method")
+    assert averages.loc["LRU", METRICS[0]] == pytest.approx(np.mean([t.loc["LRU", METRICS[0]]
+                                                                     for t in tables.values()]))
+    assert averages.loc["LRU", "Iteration"] == 3
+    assert list(averages.columns) == ["Iteration"] + METRICS
+
+
+def test_recording_an_iteration_again_replaces_it(store):
+    store.record(1, table(1))
+    store.record(2, table(2))
+    store.record(2, table(3))
+
+    assert store.iterations() == 2 and store.next_iteration() == 3
+    expected = (table(1).loc["LRU", METRICS[0]] + table(3).loc["LRU", METRICS[0]]) / 2
+    summary = store.summary().set_index(["Method", "Metric"])
+    assert summary.loc[("LRU", METRICS[0]), "Mean"] == pytest.approx(expected)
+
+    frame = store.frame()
+    assert list(frame.columns) == ["Iteration", "Method"] + METRICS
+    assert frame[["Iteration", "Method"]].values.tolist() == [[1, "LRU"], [1, "SGD-Based"],
+                                                              [2, "LRU"], [2, "SGD-Based"]]
+    assert store.series(METRICS[1]).loc[2, "SGD-Based"] == table(3).loc["SGD-Based", METRICS[1]]
+
+    store.clear()
+    assert store.summary().empty and store.next_iteration() == 1
+
+
+def test_concurrent_stores_share_one_database(tmp_path):
+    path = str(tmp_path / "metrics.sqlite")
+    with MetricsStore(path) as first, MetricsStore(path) as second:
+        first.record(1, table(1))
+        second.record(2, table(2))
+        assert first.iterations() == 2
+
+
+def test_parse_comprehensive(tmp_path):
+    path = tmp_path / "comprehensive_metrics.txt"
+    path.write_text(
+        "--- Iteration ---\n"
+        "           Cache Hit Rate (%)  Latency Reduction (%)\n"
+        "LRU                     41.5                   12.0\n"
+        "SGD-Based               48.25                  20.5\n"
+        "\n--- Iteration ---\n"
+        "           Cache Hit Rate (%)  Latency Reduction (%)\n"
+        "LRU                     40.0                   not a number\n"
+        "SGD-Based               47.0                   19.0\n")
+
+    tables = dict(parse_comprehensive(str(path)))
+    assert list(tables) == [1, 2]
+    assert tables[1].loc["SGD-Based", "Cache Hit Rate (%)"] == 48.25
+    assert list(tables[2].index) == ["SGD-Based"]
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from src.analysis.miss_ratio_curve import lru_curve, sample_mask
+from src.models.cache_policies import LRUPolicy
+
+# One-pass LRU curves from byte stack distances: exact against the simulated
+# policy while every object fits, approximate with SHARDS sampling.
+
+
+def zipf_keys(count, objects, exponent, seed):
+    return np.clip(np.random.default_rng(seed).zipf(exponent, count), 1, objects) - 1
+
+
+def simulated(trace, sizes, capacity):
+    return LRUPolicy(capacity).replay(trace.tolist(), sizes.tolist()) / len(trace) * 100
+
+
+@pytest.mark.parametrize("unit_sizes", [True, False])
+def test_curve_matches_simulated_lru(unit_sizes):
+    trace = zipf_keys(20000, 300, 1.2, seed=0)
+    sizes = np.ones(300) if unit_sizes else np.random.default_rng(1).integers(1, 20, 300).astype(np.float64)
+    capacities = [20, 50, 100, 400]
+
+    # Several chunks and far more requests than tree slots, so the tree is compacted
+    hits, byte_hits = lru_curve(np.array_split(trace, 3), sizes, capacities)
+    assert hits.tolist() == pytest.approx([simulated(trace, sizes, capacity) for capacity in capacities])
+    assert np.all(np.diff(hits) >= 0) and np.all(byte_hits <= 100)
+
+
+def test_oversized_objects_lower_the_stack_curve():
+    # Object 0 is never admitted by LRUPolicy but still counts in every distance spanning it
+    trace = np.tile([0, 1, 2], 100)
+    sizes = np.array([50.0, 1.0, 1.0])
+    hits, _ = lru_curve([trace], sizes, [10])
+    assert hits[0] < simulated(trace, sizes, 10)
+
+
+def test_shards_sampling_stays_close_to_the_exact_curve():
+    trace = zipf_keys(100000, 20000, 1.1, seed=2)
+    sizes = np.random.default_rng(3).integers(1, 20, 20000).astype(np.float64)
+    capacities = [1000, 10000, 50000]
+
+    exact, _ = lru_curve([trace], sizes, capacities)
+    sampled, _ = lru_curve([trace], sizes, capacities, sample_rate=0.1)
+    assert np.abs(sampled - exact).max() < 3.0
+
+    kept = sample_mask(np.arange(100000), 0.1).mean()
+    assert kept == pytest.approx(0.1, abs=0.01)
@@ -0,0 +1,87 @@
+import numpy as np
+
+from src.models.knapsack_solver import solve_dp
+from src.models.online_sgd import OnlineSGDOptimizer
+
+# The streaming SGD optimizer: mini-batching does not depend on how requests
+# arrive, the selection approaches the knapsack optimum of the request mix and
+# follows a popularity shift, and a saved state restores by resource key.
+
+OBJECTS = 200
+
+
+def catalog(seed=0):
+    sizes = np.random.default_rng(seed).integers(1, 50, OBJECTS).astype(np.float64)
+    return [f"/r{i}.dat" for i in range(OBJECTS)], sizes, float(sizes.sum() * 0.1)
+
+
+def stream(count, seed, hot_offset=0):
+    ranks = np.clip(np.random.default_rng(seed).zipf(1.3, count), 1, OBJECTS) - 1
+    return (ranks + hot_offset) % OBJECTS
+
+
+def optimizer_for(keys, sizes, capacity):
+    optimizer = OnlineSGDOptimizer(capacity, batch_size=64)
+    optimizer.add_resources(keys, sizes)
+    return optimizer
+
+
+def test_chunking_does_not_change_the_updates():
+    keys, sizes, capacity = catalog()
+    requests = stream(5000, seed=1)
+
+    chunked = optimizer_for(keys, sizes, capacity)
+    for chunk in np.array_split(requests, 7):
+        chunked.observe(chunk)
+    one_by_one = optimizer_for(keys, sizes, capacity)
+    for index in requests.tolist():
+        one_by_one.observe_one(index)
+
+    assert chunked.updates == one_by_one.updates == 5000 // 64
+    np.testing.assert_array_equal(chunked.theta, one_by_one.theta)
+    chunked.flush()
+    assert chunked.requests == 5000
+
+
+def test_selection_approaches_the_knapsack_optimum():
+    keys, sizes, capacity = catalog()
+    optimizer = optimizer_for(keys, sizes, capacity)
+    requests = stream(200000, seed=2)
+    optimizer.observe(requests)
+
+    counts = np.bincount(requests, minlength=OBJECTS).astype(np.float64)
+    cached = optimizer.selection().astype(bool)
+    assert sizes[cached].sum() <= capacity
+    assert counts[cached].sum() >= 0.9 * solve_dp(counts, sizes, capacity).value
+
+
+def test_selection_follows_a_popularity_shift():
+    keys, sizes, capacity = catalog()
+    optimizer = optimizer_for(keys, sizes, capacity)
+    optimizer.observe(stream(50000, seed=3))
+    before = optimizer.selection().copy()
+
+    optimizer.observe(stream(200000, seed=4, hot_offset=100))
+    after = optimizer.selection()
+    shifted = np.bincount(stream(50000, seed=5, hot_offset=100), minlength=OBJECTS)
+    assert shifted[after == 1].sum() > 2 * shifted[before == 1].sum()
+
+
+def test_saved_state_restores_by_key(tmp_path):
+    keys, sizes, capacity = catalog()
+    optimizer = optimizer_for(keys, sizes, capacity)
+    optimizer.observe(stream(20000, seed=6))
+    path = str(tmp_path / "online_sgd_state.npz")
+    optimizer.save(path)
+
+    # A later iteration registers its resources in another order, plus a new one
+    order = np.random.default_rng(7).permutation(OBJECTS)
+    restored = OnlineSGDOptimizer(capacity, batch_size=64)
+    restored.add_resources([keys[i] for i in order] + ["/new.dat"], np.append(sizes[order], 5.0))
+    restored.load(path)
+
+    ids = restored.add_resources(keys, sizes)
+    np.testing.assert_array_equal(restored.theta[ids], optimizer.theta)
+    np.testing.assert_array_equal(restored.freq[ids], optimizer.freq)
+    assert restored.price == optimizer.price and restored.updates == optimizer.updates
+    assert restored.theta[restored.index["/new.dat"]] == 0.0
@@ -0,0 +1,80 @@
+import pytest
+
+from src.server.catalog import ResourceCatalog, write_catalog
+from src.server.payloads import (
+    BYTES_PER_KB,
+    PayloadStore,
+    RangeNotSatisfiable,
+    etag_matches,
+    parse_range,
+    resolve_payload,
+)
+
+# Payload bytes, Range parsing and ETag validators shared by both origin servers.
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = str(tmp_path / "web_resources.json")
+    write_catalog(path, {"/a.dat": {"size": 2, "latency": 0.0}, "/b.dat": {"size": 1, "latency": 0.0}})
+    catalog = ResourceCatalog(path)
+    catalog.reload(force=True)
+    return catalog
+
+
+def test_payload_byte_k_is_k_mod_256(catalog):
+    store = PayloadStore(catalog)
+    entry = catalog.get("/a.dat")
+    status, headers, start, end = resolve_payload(store, "/a.dat", entry)
+
+    assert (status, start, end) == (200, 0, 2 * BYTES_PER_KB)
+    body = bytes(store.view(start, end))
+    assert body == bytes(k % 256 for k in range(2 * BYTES_PER_KB))
+    assert b"".join(store.iter_bytes(300, 900)) == body[300:900]
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-10", (990, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=5-4", "bytes=-0"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, 1000)
+
+
+def test_range_and_conditional_requests(catalog):
+    store = PayloadStore(catalog)
+    entry = catalog.get("/b.dat")
+    etag = store.etag("/b.dat", entry)
+
+    status, headers, start, end = resolve_payload(store, "/b.dat", entry, range_header="bytes=10-19")
+    assert (status, start, end, headers["Content-Range"]) == (206, 10, 20, f"bytes 10-19/{BYTES_PER_KB}")
+    assert resolve_payload(store, "/b.dat", entry, if_none_match=f'W/{etag}')[0] == 304
+    assert resolve_payload(store, "/b.dat", entry, range_header="bytes=5000-")[0] == 416
+    assert etag_matches("*", etag) and not etag_matches('"other"', etag)
+
+
+def test_etag_depends_only_on_the_resource(catalog, tmp_path):
+    store = PayloadStore(catalog)
+    before = {path: store.etag(path, catalog.get(path)) for path in ("/a.dat", "/b.dat")}
+    assert before["/a.dat"] != before["/b.dat"]
+
+    # A reload that changes /b.dat keeps the validator of the unchanged /a.dat
+    write_catalog(catalog.path, {"/a.dat": {"size": 2, "latency": 0.5},
+                                 "/b.dat": {"size": 3, "latency": 0.0}})
+    catalog.reload(force=True)
+    assert store.etag("/a.dat", catalog.get("/a.dat")) == before["/a.dat"]
+    assert store.etag("/b.dat", catalog.get("/b.dat")) != before["/b.dat"]
+
+    # A fresh store, as in another process, agrees
+    assert PayloadStore(catalog).etag("/a.dat", catalog.get("/a.dat")) == before["/a.dat"]
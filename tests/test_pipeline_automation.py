@@ -0,0 +1,58 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.pipeline import pipeline_automation
+
+# The iteration executor: per-iteration seeds, metrics merged in iteration order
+# whatever order the workers finish in, and failures reported in the exit status.
+# Iterations run in threads with stub stages here.
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pipeline_automation, "ProcessPoolExecutor", ThreadPoolExecutor)
+    calls = {"seeds": {}, "appended": [], "averaged": 0}
+
+    def run_iteration(iteration, run_dir, seed, *args):
+        calls["seeds"][iteration] = seed
+        if iteration in calls.get("fail", ()):
+            raise RuntimeError("stage failed")
+        return iteration, f"metrics {iteration}"
+
+    def calculate_average(*args):
+        calls["averaged"] += 1
+
+    monkeypatch.setattr(pipeline_automation, "run_iteration", run_iteration)
+    monkeypatch.setattr(pipeline_automation, "append_metrics",
+                        lambda iteration, metrics_df: calls["appended"].append((iteration, metrics_df)))
+    monkeypatch.setattr(pipeline_automation, "calculate_average", calculate_average)
+    return calls
+
+
+def test_iterations_merge_in_order_with_distinct_seeds(pipeline):
+    assert pipeline_automation.run_pipeline(5, workers=3, seed=10) == []
+
+    assert pipeline["appended"] == [(i, f"metrics {i}") for i in range(1, 6)]
+    assert pipeline["seeds"] == {i: 10 + i for i in range(1, 6)}
+    assert pipeline["averaged"] == 1
+    assert pipeline_automation.iteration_seed(None, 3) is None
+
+
+def test_failed_iterations_are_reported_and_exit_nonzero(pipeline, monkeypatch):
+    pipeline["fail"] = {2, 4}
+    assert pipeline_automation.run_pipeline(4, workers=2) == [2, 4]
+    assert [iteration for iteration, _ in pipeline["appended"]] == [1, 3]
+
+    monkeypatch.setattr(sys, "argv", ["pipeline_automation", "--iterations", "4", "--workers", "2"])
+    with pytest.raises(SystemExit) as exit_info:
+        pipeline_automation.main()
+    assert exit_info.value.code == "2 of 4 iterations failed"
+
+
+def test_no_average_when_every_iteration_fails(pipeline):
+    pipeline["fail"] = {1, 2}
+    assert pipeline_automation.run_pipeline(2, workers=1) == [1, 2]
+    assert pipeline["appended"] == [] and pipeline["averaged"] == 0
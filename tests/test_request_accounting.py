@@ -0,0 +1,48 @@
+import threading
+
+from src.pipeline.request_accounting import BatchedLogWriter, ShardedCounter
+
+# Per-thread count shards and the bounded background log writer.
+
+
+def test_sharded_counts_sum_across_threads():
+    counter = ShardedCounter(size=5, shards=8)
+
+    def work(index):
+        counts = counter.shard(index)
+        for step in range(10000):
+            counts[step % 5] += 1
+
+    threads = [threading.Thread(target=work, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.totals() == [16000] * 5
+    assert ShardedCounter(size=3, shards=0).totals() == [0, 0, 0]
+
+
+def test_log_writer_keeps_every_line_in_order(tmp_path):
+    path = tmp_path / "requests.log"
+    with BatchedLogWriter(str(path), max_pending=10, batch_size=7) as writer:
+        for index in range(1000):
+            writer.write(f"line {index}\n")
+
+    assert path.read_text().splitlines() == [f"line {index}" for index in range(1000)]
+    assert writer.written == 1000
+    writer.close()  # closing twice is harmless
+
+
+def test_log_writer_flushes_while_running(tmp_path):
+    path = tmp_path / "requests.log"
+    writer = BatchedLogWriter(str(path), flush_interval=0.05)
+    writer.write("first\n")
+    try:
+        for _ in range(100):
+            if path.read_text() == "first\n":
+                break
+            threading.Event().wait(0.02)
+        assert path.read_text() == "first\n"
+    finally:
+        writer.close()
@@ -0,0 +1,87 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.resource_table import ResourceTable, ResourceTableError, load_table, table_path
+
+# The array-backed resource table: saving it, attaching to the file read-only
+# (also from another process), masks over the rows and the CSV fallback.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({"resource": ["/a.html", "/b.jpg", "/ü.dat"], "frequency": [5, 0, 12],
+                         "size": [10, 200, 3], "latency": [0.1, 0.25, 1.5]})
+
+
+def test_save_and_open_round_trip(frame, tmp_path):
+    path = str(tmp_path / "resource_table")
+    ResourceTable.from_frame(frame).save(path)
+
+    with ResourceTable.open(path) as table:
+        assert len(table) == 3 and table.names() == frame["resource"].tolist()
+        assert table.frequency.dtype == np.int32 and table.latency.dtype == np.float64
+        assert not table.size.flags.writeable
+        pd.testing.assert_frame_equal(table.frame(), frame)
+        copy = table.frame()
+    assert table.resource is None and copy["size"].tolist() == [10, 200, 3]
+
+
+def test_masks_and_selections(frame):
+    table = ResourceTable.from_frame(frame)
+    cached = table.mask(["/ü.dat", "/missing.html", "/a.html"])
+
+    assert cached.tolist() == [True, False, True]
+    assert table.ids(["/b.jpg", "/missing.html"]).tolist() == [1, -1]
+    assert table.select(cached) == ["/a.html", "/ü.dat"]
+    assert table.frequency[cached].sum() == 17
+
+
+def test_another_process_attaches_to_the_same_file(frame, tmp_path):
+    path = str(tmp_path / "resource_table")
+    ResourceTable.from_frame(frame).save(path)
+    code = ("from src.data.resource_table import ResourceTable; import sys; "
+            "table = ResourceTable.open(sys.argv[1]); "
+            "print(int(table.size[table.mask(['/a.html', '/b.jpg'])].sum())); table.close()")
+    result = subprocess.run([sys.executable, "-c", code, path], capture_output=True, text=True, check=True,
+                            env=dict(os.environ, PYTHONPATH=REPO_ROOT))
+    assert result.stdout.strip() == "210"
+
+
+def test_empty_table_and_version_check(tmp_path):
+    path = str(tmp_path / "resource_table")
+    ResourceTable.from_arrays([], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64),
+                              np.zeros(0)).save(path)
+    with ResourceTable.open(path) as table:
+        assert len(table) == 0 and table.names() == []
+
+    with open(path + ".json") as f:
+        meta = json.load(f)
+    meta["version"] = 99
+    with open(path + ".json", "w") as f:
+        json.dump(meta, f)
+    with pytest.raises(ResourceTableError):
+        ResourceTable.open(path)
+
+
+def test_load_table_prefers_a_newer_csv(frame, tmp_path):
+    interim = str(tmp_path)
+    csv = os.path.join(interim, "processed_request_data.csv")
+    frame.to_csv(csv, index=False)
+    ResourceTable.from_frame(frame).save(table_path(interim))
+
+    with load_table(interim) as table:
+        assert table.owner is not None  # attached to the published file
+
+    frame.assign(frequency=frame["frequency"] + 1).to_csv(csv, index=False)
+    stamp = os.path.getmtime(table_path(interim) + ".json") + 10
+    os.utime(csv, (stamp, stamp))
+    table = load_table(interim)
+    assert table.owner is None and table.frequency.tolist() == [6, 1, 13]
@@ -0,0 +1,150 @@
+import numpy as np
+
+from src.models.sgd_core import (
+    ETA_INITIAL,
+    MARGIN,
+    THETA_CLIP,
+    adaptive_retry_optimizer,
+    batched_retry_optimizer,
+    cleanup_selection,
+    cleanup_selection_batch,
+    enforce_capacity,
+    gradient,
+    update_cache_probabilities,
+)
+
+# Array core of the SGD optimizer: the fused update, the first-fit cleanup, the
+# batched search and the warm start from a checkpointed theta.
+
+
+def first_fit(cache_prob, size, capacity):
+    cached, used = np.zeros(len(size), dtype=np.int8), 0.0
+    for index in np.argsort(-cache_prob, kind="stable"):
+        if used + size[index] <= capacity:
+            cached[index] = 1
+            used += size[index]
+    return cached
+
+
+def workload(seed, count=200):
+    rng = np.random.default_rng(seed)
+    frequency = rng.integers(1, 1000, count).astype(np.float64)
+    size = rng.integers(1, 100, count).astype(np.float64)
+    return frequency, size, float(size.sum() * 0.1)
+
+
+def test_fused_update_equals_the_step_by_step_loop():
+    frequency, size, _ = workload(0)
+    grad = gradient(frequency, size)
+    theta0 = np.random.default_rng(1).uniform(-0.1, 0.1, len(size))
+
+    theta = theta0.copy()
+    for _ in range(50):
+        theta = np.clip(theta + 0.001 * grad, -THETA_CLIP, THETA_CLIP)
+    expected = 1 / (1 + np.exp(-theta))
+
+    np.testing.assert_allclose(update_cache_probabilities(grad, theta0, 0.001, iterations=50), expected)
+
+
+def test_enforce_capacity_scales_down_only():
+    size = np.array([2.0, 4.0])
+    assert enforce_capacity(np.array([1.0, 1.0]), size, 3.0).tolist() == [0.5, 0.5]
+    assert enforce_capacity(np.array([0.5, 0.5]), size, 3.0).tolist() == [0.5, 0.5]
+
+
+def test_cleanup_selection_is_a_first_fit_by_probability():
+    frequency, size, capacity = workload(2)
+    cache_prob = np.random.default_rng(3).random(len(size))
+
+    cached = cleanup_selection(cache_prob, size, capacity)
+    assert cached.tolist() == first_fit(cache_prob, size, capacity).tolist()
+    assert size @ cached <= capacity
+
+
+def test_adaptive_search_lands_within_the_margin():
+    frequency, size, capacity = workload(4)
+    cache_prob, usage, retries, _ = adaptive_retry_optimizer(frequency, size, capacity,
+                                                             rng=np.random.default_rng(0))
+
+    assert capacity * (1 - MARGIN) <= usage <= capacity
+    assert usage == size @ cleanup_selection(cache_prob, size, capacity)
+
+
+def test_batch_cleanup_matches_the_row_by_row_cleanup():
+    _, size, capacity = workload(5)
+    cache_prob = np.random.default_rng(6).random((8, len(size)))
+
+    cached = cleanup_selection_batch(cache_prob, size, capacity)
+    for row in range(len(cache_prob)):
+        assert cached[row].tolist() == cleanup_selection(cache_prob[row], size, capacity).tolist()
+
+
+def test_batched_search_is_reproducible_for_a_seed():
+    frequency, size, capacity = workload(7)
+    first = batched_retry_optimizer(frequency, size, capacity, seed=11)
+    second = batched_retry_optimizer(frequency, size, capacity, seed=11, max_cells=len(size) * 3)
+
+    # Chunking changes only the matmul blocking, never the draws or the pick
+    np.testing.assert_allclose(first[0], second[0])
+    assert first[1:] == second[1:]
+    assert (cleanup_selection(first[0], size, capacity) == cleanup_selection(second[0], size, capacity)).all()
+    assert capacity * (1 - MARGIN) <= first[1] <= capacity
+
+
+def warm_search(warm_theta, frequency, size, capacity):
+    cache_prob, usage, retries, _ = adaptive_retry_optimizer(
+        frequency, size, capacity, ETA_INITIAL, rng=np.random.default_rng(0), warm_theta=warm_theta)
+    return cleanup_selection(cache_prob, size, capacity), usage, retries
+
+
+def test_warm_theta_decides_the_selection():
+    # grad = [970, 970, -35]: SGD_ITERATIONS steps would clip both candidates to
+    # +THETA_CLIP whatever the warm theta held
+    frequency = np.array([1000.0, 1000.0, 5.0])
+    size = np.array([3.0, 3.0, 4.0])
+    capacity = 3.0
+
+    first, usage, retries = warm_search([5.0, -5.0, -5.0], frequency, size, capacity)
+    second, _, _ = warm_search([-5.0, 5.0, -5.0], frequency, size, capacity)
+
+    assert retries == 0 and usage == capacity
+    assert first.tolist() == [1, 0, 0]
+    assert second.tolist() == [0, 1, 0]
+
+
+def test_warm_step_moves_theta_by_one_learning_rate_step():
+    frequency = np.array([1000.0, 0.0])
+    size = np.array([1.0, 1.0])
+    # grad = [990, -10]: one step at ETA_INITIAL moves theta by [0.495, -0.005],
+    # not enough to overturn a warm theta that prefers the second resource
+    cached, _, retries = warm_search([-2.0, 2.0], frequency, size, 1.0)
+
+    assert retries == 0
+    assert cached.tolist() == [0, 1]
+
+
+def test_warm_step_is_bounded_by_warm_step():
+    # grad = [99990, -990]: an unscaled step would move theta by ~50 and pick the
+    # first resource; the bounded step moves it by at most WARM_STEP
+    frequency = np.array([100000.0, 10.0])
+    size = np.array([1.0, 100.0])
+    cached, _, retries = warm_search([-2.0, 2.0], frequency, size, 100.0)
+
+    assert retries == 0
+    assert cached.tolist() == [0, 1]
+
+
+def test_warm_and_cold_starts_pick_different_selections():
+    rng = np.random.default_rng(1)
+    frequency = rng.integers(1, 1000, 50).astype(np.float64)
+    size = rng.integers(1, 100, 50).astype(np.float64)
+    capacity = float(size.sum() * 0.1)
+
+    cache_prob, _, _, _ = adaptive_retry_optimizer(frequency, size, capacity,
+                                                   rng=np.random.default_rng(0))
+    cold = cleanup_selection(cache_prob, size, capacity)
+    # A checkpoint that ranks the cold selection last
+    warm, usage, retries = warm_search(np.where(cold == 1, -5.0, 5.0), frequency, size, capacity)
+
+    assert retries == 0 and usage <= capacity
+    assert (warm & cold).sum() < cold.sum() // 2
@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.data.trace_format import (
+    TRACE_DTYPE,
+    TraceReader,
+    TraceWriter,
+    iter_resource_positions,
+    trace_exists,
+)
+
+# Writing a trace record by record, by id and in blocks, and reading it back.
+
+RESOURCES = ["/a.html", "/b.jpg", "/c.dat"]
+
+
+def test_round_trip_across_chunks(tmp_path):
+    path = str(tmp_path / "trace")
+    with TraceWriter(path, RESOURCES, chunk_size=4) as writer:
+        for index in range(10):
+            writer.record(1000.0 + index, index % 3, RESOURCES[index % 3], 200, 0.01 * index)
+        writer.append(2000.0, 7, 2, 0, 1.5)
+        block = np.zeros(5, dtype=TRACE_DTYPE)
+        block["resource"] = 1
+        block["status"] = 404
+        writer.extend(block)
+
+    reader = TraceReader(path + ".bin")
+    records = reader.records()
+    assert len(reader) == 16 and reader.resources == RESOURCES
+    assert records["timestamp"][:10].tolist() == [1000.0 + index for index in range(10)]
+    assert records["resource"][:10].tolist() == [index % 3 for index in range(10)]
+    assert records["latency"][:10] == pytest.approx([0.01 * index for index in range(10)])
+    assert tuple(records[10])[1:4] == (7, 2, 0)
+    assert records["status"][11:].tolist() == [404] * 5
+
+    chunks = list(reader.iter_chunks(chunk_size=6))
+    assert [len(chunk) for chunk in chunks] == [6, 6, 4]
+    assert np.concatenate(chunks).tobytes() == records.tobytes()
+
+
+def test_frequencies_and_positions_count_successful_requests(tmp_path):
+    path = str(tmp_path / "trace")
+    with TraceWriter(path, RESOURCES) as writer:
+        for resource, status in [(0, 200), (0, 200), (1, 200), (2, 0), (1, 404), (2, 200)]:
+            writer.append(0.0, 1, resource, status, 0.0)
+
+    reader = TraceReader(path)
+    assert reader.frequencies().tolist() == [2, 1, 1]
+    assert reader.frequencies(status=None).tolist() == [2, 2, 2]
+
+    # Positions into another ordering of the names; /b.jpg is not in it
+    positions = np.concatenate(list(iter_resource_positions(reader, ["/c.dat", "/a.html"], chunk_size=2)))
+    assert positions.tolist() == [1, 1, 0]
+
+
+def test_empty_trace_and_version_check(tmp_path):
+    path = str(tmp_path / "trace")
+    assert not trace_exists(path)
+    TraceWriter(path, RESOURCES).close()
+    assert trace_exists(path)
+    assert len(TraceReader(path).records()) == 0
+
+    with open(path + ".json") as f:
+        meta = json.load(f)
+    meta["version"] = 99
+    with open(path + ".json", "w") as f:
+        json.dump(meta, f)
+    with pytest.raises(ValueError):
+        TraceReader(path)
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from src.data.trace_format import TraceReader
+from src.data.workload_generator import (
+    CATEGORIES,
+    BoundedZipf,
+    WorkloadGenerator,
+    apply_locality,
+    generate_catalog,
+    load_catalog,
+)
+
+# Seeded synthetic workloads: bounded Zipf popularity, catalog ranges, locality,
+# drift, and the trace plus catalog arrays they are written to.
+
+
+def test_bounded_zipf_matches_its_pmf():
+    zipf = BoundedZipf(100, alpha=0.9)
+    pmf = zipf.pmf()
+    weights = np.arange(1, 101) ** -0.9
+    np.testing.assert_allclose(pmf, weights / weights.sum())
+
+    counts = np.bincount(zipf.sample(np.random.default_rng(0), 200000), minlength=100) / 200000
+    assert counts[0] == pytest.approx(pmf[0], rel=0.03)
+    # No mass piles up on the last rank the way clipped zipf() draws do
+    assert counts[-1] == pytest.approx(pmf[-1], rel=0.2)
+
+
+def test_catalog_sizes_follow_the_category_ranges():
+    category, size, latency = generate_catalog(10000, np.random.default_rng(1))
+    for code, spec in enumerate(CATEGORIES.values()):
+        rows = category == code
+        assert rows.mean() == pytest.approx(spec["share"], abs=0.02)
+        assert spec["size_range"][0] <= size[rows].min() and size[rows].max() <= spec["size_range"][1]
+        assert spec["latency_range"][0] <= latency[rows].min() and latency[rows].max() <= spec["latency_range"][1]
+
+    _, pareto, _ = generate_catalog(1000, np.random.default_rng(1), size_distribution="pareto")
+    assert pareto.min() >= 5
+    with pytest.raises(ValueError):
+        generate_catalog(10, np.random.default_rng(1), size_distribution="uniform")
+
+
+def test_same_seed_same_trace():
+    first = np.concatenate(list(WorkloadGenerator(1000, seed=3).chunks(5000, chunk_size=1024)))
+    second = np.concatenate(list(WorkloadGenerator(1000, seed=3).chunks(5000, chunk_size=1024)))
+    assert first.tobytes() == second.tobytes()
+    assert np.all(np.diff(first["timestamp"]) > 0) and first["resource"].max() < 1000
+
+
+def test_locality_repeats_recent_requests():
+    rng = np.random.default_rng(4)
+    objects = rng.integers(0, 10**6, 10000)
+    repeat = rng.random(10000) < 0.5
+    result = apply_locality(objects, repeat, np.zeros(0, dtype=np.int64), 10, rng)
+
+    assert np.array_equal(result[~repeat], objects[~repeat])
+    for position in np.flatnonzero(repeat)[1:200]:
+        if position >= 10:
+            assert result[position] in result[position - 10:position]
+
+
+def test_drift_splits_chunks_and_reassigns_ranks():
+    generator = WorkloadGenerator(1000, seed=5, drift_interval=3000, drift_fraction=0.1)
+    ranks = generator.rank_object.copy()
+    sizes = [len(chunk) for chunk in generator.chunks(7000, chunk_size=2000)]
+
+    assert sizes == [2000, 1000, 2000, 1000, 1000]
+    assert (generator.rank_object != ranks).sum() > 0
+    assert sorted(generator.rank_object) == list(range(1000))
+
+
+def test_write_saves_the_trace_and_its_catalog(tmp_path):
+    path = str(tmp_path / "request_trace")
+    generator = WorkloadGenerator(500, seed=6)
+    assert generator.write(path, 3000, chunk_size=1000) == 3000
+
+    reader = TraceReader(path)
+    assert len(reader) == 3000 and len(set(reader.resources)) == 500
+    assert reader.resources[0].startswith("/") and reader.resources[0].endswith("_1.dat")
+    size, latency = load_catalog(path)
+    np.testing.assert_array_equal(size, generator.size)
+    records = reader.records()
+    np.testing.assert_array_equal(records["latency"], latency[records["resource"]].astype(np.float32))